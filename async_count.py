@@ -0,0 +1,147 @@
+# Date: October 18, 2026
+
+# async_count.py
+# ===================================================
+# Count the words of many byte streams at once with
+# asyncio, e.g. sockets, pipes and the stdout of
+# subprocesses. Each stream is read and tokenized as
+# its data arrives, and the words are counted into one
+# shared hash map in batches with increment_many().
+# The batches wait in a bounded queue, and a stream is
+# not read while the queue is full, so memory stays
+# bounded however fast the streams are.
+# ===================================================
+
+import asyncio
+import codecs
+from word_count import CHUNK_SIZE
+from word_count import TrailingRun
+from word_count import _find_lower_words
+from word_count import new_table
+from word_count import top_entries
+
+
+# Number of batches of words that may wait to be counted before the streams
+# stop being read
+QUEUE_SIZE = 16
+
+
+async def open_pipe(pipe):
+    """
+    Wrap the read end of a pipe (e.g. from os.pipe(), or sys.stdin) in a
+    stream that count_streams() can read.
+
+    :param pipe: a file object for the read end of the pipe
+    :return: an asyncio.StreamReader
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    return reader
+
+
+async def read_word_batches(reader, queue, chunk_size=CHUNK_SIZE,
+                            encoding="utf-8"):
+    """
+    Read a byte stream to its end, putting one list of lowercase words per
+    chunk read on a queue. While the queue is full, the stream is not read.
+
+    :param reader: an asyncio.StreamReader, or any object with a coroutine
+    read(n) that returns b"" at the end of the stream
+    :param queue: the asyncio.Queue to put the lists of words on
+    :param chunk_size: the largest number of bytes to read at a time
+    :param encoding: the encoding of the stream
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    carry = TrailingRun()
+    while True:
+        data = await reader.read(chunk_size)
+
+        # Hold back a word that may continue in the next chunk, unless the
+        # stream has ended
+        text = carry.split(decoder.decode(data, final=not data))
+        if not data:
+            text += carry.flush()
+        if text:
+            words = _find_lower_words(text)
+            if words:
+                await queue.put(words)
+        if not data:
+            return
+
+
+async def count_streams(readers, engine="chained", hash_function="crc32",
+                        chunk_size=CHUNK_SIZE, encoding="utf-8",
+                        queue_size=QUEUE_SIZE, table=None):
+    """
+    Count the words of several byte streams at once.
+
+    :param readers: an iterable of asyncio.StreamReader objects (or objects
+    with a coroutine read(n))
+    :param engine: the name of the hash map engine to count with
+    :param hash_function: the hash function for the table to use
+    :param chunk_size: the largest number of bytes to read at a time
+    :param encoding: the encoding of the streams
+    :param queue_size: the number of batches of words that may wait to be
+    counted, which bounds the memory used by words read but not yet counted
+    :param table: the hash map to add the counts to, or None to create one
+    :return: the hash map of word counts
+    """
+    if table is None:
+        table = new_table(engine, hash_function)
+    queue = asyncio.Queue(maxsize=queue_size)
+
+    async def consume():
+        while True:
+            words = await queue.get()
+            if words is None:
+                return
+            table.increment_many(words)
+
+    producers = [asyncio.ensure_future(read_word_batches(reader, queue,
+                                                         chunk_size, encoding))
+                 for reader in readers]
+    consumer = asyncio.ensure_future(consume())
+    tasks = producers + [consumer]
+    try:
+        # The consumer only finishes before the streams if it failed, and the
+        # streams could then wait forever on the full queue
+        reading = asyncio.gather(*producers)
+        await asyncio.wait([reading, consumer],
+                           return_when=asyncio.FIRST_COMPLETED)
+        if consumer.done():
+            consumer.result()
+        await reading
+        await queue.put(None)
+        await consumer
+    finally:
+        # If a stream failed, stop reading the others
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return table
+
+
+async def top_words_async(readers, number, engine="chained",
+                          hash_function="crc32", chunk_size=CHUNK_SIZE,
+                          encoding="utf-8", queue_size=QUEUE_SIZE):
+    """
+    Count the words of several byte streams at once and return the most
+    common ones.
+
+    :param readers: an iterable of asyncio.StreamReader objects
+    :param number: the number of top results to return, or None to return the
+    counts of all words
+    :param engine: the name of the hash map engine to count with
+    :param hash_function: the hash function for the table to use
+    :param chunk_size: the largest number of bytes to read at a time
+    :param encoding: the encoding of the streams
+    :param queue_size: the number of batches of words that may wait to be
+    counted
+    :return: a list of tuples of the form (word, count), sorted by most common
+    word and then alphabetically
+    """
+    table = await count_streams(readers, engine, hash_function, chunk_size,
+                                encoding, queue_size)
+    return top_entries(table, number)
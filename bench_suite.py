@@ -0,0 +1,332 @@
+# Date: October 18, 2026
+
+# bench_suite.py
+# ===================================================
+# A reproducible benchmark suite for the hash maps and
+# top_words(). It times put(), get(), contains_key(),
+# remove() and resize_table() at several table sizes,
+# and the throughput and peak memory of top_words() on
+# synthetic corpora made by perturbing alice.txt with a
+# fixed seed. Results are written as JSON, and two
+# result files can be compared to flag regressions, e.g.
+#     python bench_suite.py run -o before.json
+#     python bench_suite.py run -o after.json
+#     python bench_suite.py compare before.json after.json
+# ===================================================
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from benchmarks import time_per_op
+from benchmarks import write_corpus
+from word_count import iter_token_batches
+from word_count import new_table
+
+
+# Version of the layout of the result files
+SUITE_VERSION = 1
+
+# Seed of every random choice the suite makes, so that two runs time the same
+# keys and corpora
+SEED = 42
+
+# Numbers of keys in the tables of the microbenchmarks. 10,000,000 keys can be
+# added with --sizes, given several GB of memory.
+SIZES = [1000, 10000, 100000, 1000000]
+
+# Sizes of the synthetic corpora in megabytes
+CORPUS_SIZES = [10]
+
+# Largest number of keys looked up, removed or updated per measurement
+SAMPLE_SIZE = 100000
+
+# Fraction by which a result may get worse before it is flagged
+THRESHOLD = 0.10
+
+# Directory holding this file, alice.txt and the modules the suite imports
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Program run in a new interpreter for each top_words() measurement, so that
+# the peak memory it reports belongs to that measurement alone. On Linux,
+# ru_maxrss keeps the peak of the process that started the interpreter, so the
+# peak of the interpreter's own memory (VmHWM) is read from /proc instead.
+_TOP_WORDS_CHILD = """
+import json, resource, sys, time
+from word_count import top_words
+source, engine, mode = sys.argv[1:4]
+start = time.perf_counter()
+top_words(source, 10, engine, mode=mode)
+seconds = time.perf_counter() - start
+try:
+    with open("/proc/self/status") as f:
+        peak = next(int(line.split()[1]) * 1024 for line in f
+                    if line.startswith("VmHWM:"))
+except OSError:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak *= 1024
+print(json.dumps({"seconds": seconds, "peak_rss": peak}))
+"""
+
+
+def run_micro(engine, size, repeat=3, seed=SEED):
+    """
+    Time the operations of a hash map holding `size` keys. Each measurement is
+    repeated and the fastest time is kept.
+
+    :param engine: the name of the hash map engine, "chained" or "open"
+    :param size: the number of keys to put in the table
+    :param repeat: the number of times to build the table and measure
+    :param seed: the seed of the order in which keys are looked up
+    :return: a dictionary mapping each operation (put, get, contains_key,
+    miss, remove and resize_table) to its fastest time in nanoseconds per key
+    """
+    rng = random.Random(seed)
+    keys = ["w%x" % i for i in range(size)]
+    sample = rng.sample(keys, min(size, SAMPLE_SIZE))
+    missing = ["m%x" % i for i in range(len(sample))]
+    best = {}
+
+    for i in range(repeat):
+        # Insert every key into a table that grows from the size top_words()
+        # starts with
+        table = new_table(engine)
+        times = {"put": time_per_op(lambda key: table.put(key, 1), keys)}
+        times["get"] = time_per_op(table.get, sample)
+        times["contains_key"] = time_per_op(table.contains_key, sample)
+        times["miss"] = time_per_op(table.contains_key, missing)
+
+        start = time.perf_counter()
+        table.resize_table(table.capacity * 2)
+        times["resize_table"] = (time.perf_counter() - start) / size * 1e9
+
+        times["remove"] = time_per_op(table.remove, sample)
+        del table
+
+        for name, ns in times.items():
+            best[name] = min(ns, best.get(name, ns))
+    return best
+
+
+def run_top_words(source, engine, mode):
+    """
+    Time top_words() over a file in a new interpreter.
+
+    :param source: the file to count
+    :param engine: the name of the hash map engine to count with
+    :param mode: the mode of top_words(), "stream" or "mmap"
+    :return: a dictionary with the keys seconds and peak_rss (the peak
+    resident memory of the interpreter in bytes)
+    """
+    env = dict(os.environ)
+    if env.get("PYTHONPATH"):
+        env["PYTHONPATH"] = HERE + os.pathsep + env["PYTHONPATH"]
+    else:
+        env["PYTHONPATH"] = HERE
+    result = subprocess.run(
+        [sys.executable, "-c", _TOP_WORDS_CHILD, source, engine, mode],
+        cwd=HERE, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def _result(value, unit, better):
+    """
+    Helper function for run_suite() that describes one result.
+
+    :param value: the measured value
+    :param unit: the unit of the value
+    :param better: "lower" or "higher", whichever is an improvement
+    :return: a dictionary with the keys value, unit and better
+    """
+    return {"value": value, "unit": unit, "better": better}
+
+
+def run_suite(sizes=None, corpus_sizes=None, engines=("chained", "open"),
+              repeat=3, seed=SEED, report=print):
+    """
+    Run every benchmark of the suite.
+
+    :param sizes: the numbers of keys of the microbenchmarks, or None for
+    SIZES
+    :param corpus_sizes: the sizes of the corpora in megabytes, or None for
+    CORPUS_SIZES
+    :param engines: the names of the hash map engines to measure
+    :param repeat: the number of times to repeat each microbenchmark
+    :param seed: the seed of the keys and corpora
+    :param report: a function called with a line of text for each result as
+    it is measured, or None to stay quiet
+    :return: a dictionary with the keys version, seed, python, platform, date
+    and results. results maps names such as "micro/chained/put/1000" to
+    dictionaries with the keys value, unit and better.
+    """
+    if sizes is None:
+        sizes = SIZES
+    if corpus_sizes is None:
+        corpus_sizes = CORPUS_SIZES
+
+    results = {}
+    for engine in engines:
+        for size in sizes:
+            times = run_micro(engine, size, repeat, seed)
+            for name, ns in times.items():
+                results["micro/%s/%s/%d" % (engine, name, size)] = \
+                    _result(ns, "ns/op", "lower")
+            if report is not None:
+                report("micro  %-7s  %8d keys  " % (engine, size)
+                       + "  ".join("%s %.0f" % item for item in times.items()))
+
+    for megabytes in corpus_sizes:
+        source = write_corpus(megabytes, seed=seed)
+        try:
+            size = os.path.getsize(source)
+            tokens = sum(len(batch) for batch in iter_token_batches(source))
+            for engine in engines:
+                for mode in ["stream", "mmap"]:
+                    run = run_top_words(source, engine, mode)
+                    name = "top_words/%s/%s/%dMB/" % (engine, mode, megabytes)
+                    results[name + "MB_per_s"] = _result(
+                        size / 1e6 / run["seconds"], "MB/s", "higher")
+                    results[name + "tokens_per_s"] = _result(
+                        tokens / run["seconds"], "tokens/s", "higher")
+                    results[name + "peak_rss"] = _result(
+                        run["peak_rss"] / 1e6, "MB", "lower")
+                    if report is not None:
+                        report("top_words  %-7s  %-6s  %3d MB  %6.2f MB/s  "
+                               "%9.0f tokens/s  %6.1f MB peak RSS"
+                               % (engine, mode, megabytes,
+                                  size / 1e6 / run["seconds"],
+                                  tokens / run["seconds"],
+                                  run["peak_rss"] / 1e6))
+        finally:
+            os.remove(source)
+
+    return {
+        "version": SUITE_VERSION,
+        "seed": seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare_results(baseline, current, threshold=THRESHOLD):
+    """
+    Compare the results of two runs of the suite.
+
+    :param baseline: the results of the earlier run, as returned by
+    run_suite()
+    :param current: the results of the later run
+    :param threshold: the fraction by which a result may get worse before it
+    is flagged as a regression
+    :return: a list of (name, baseline value, current value, change, flag)
+    tuples for the results found in both runs, sorted by name. change is the
+    relative change of the value, and flag is "regression", "improvement" or
+    "".
+    """
+    rows = []
+    old_results = baseline["results"]
+    for name, new in sorted(current["results"].items()):
+        old = old_results.get(name)
+        if old is None or not old["value"]:
+            continue
+        change = new["value"] / old["value"] - 1
+
+        # Count a change as better or worse by which direction is better
+        gain = -change if new["better"] == "lower" else change
+        flag = ""
+        if gain < -threshold:
+            flag = "regression"
+        elif gain > threshold:
+            flag = "improvement"
+        rows.append((name, old["value"], new["value"], change, flag))
+    return rows
+
+
+def format_comparison(rows):
+    """
+    Format the rows of compare_results() as a table.
+
+    :param rows: the rows returned by compare_results()
+    :return: the table as a string
+    """
+    width = max([len(row[0]) for row in rows] + [4])
+    lines = ["%-*s  %12s  %12s  %7s" % (width, "name", "baseline", "current",
+                                        "change")]
+    for name, old, new, change, flag in rows:
+        lines.append("%-*s  %12.4g  %12.4g  %+6.1f%%  %s"
+                     % (width, name, old, new, change * 100, flag))
+    return "\n".join(lines)
+
+
+def _parse_sizes(text):
+    """
+    Parse a comma-separated list of sizes such as "1e3,1e4,100000".
+
+    :param text: the list as a string
+    :return: a list of integers
+    """
+    return [int(float(size)) for size in text.split(",")]
+
+
+def main(argv=None):
+    """
+    Run the suite and write its results, or compare two result files.
+
+    :param argv: the command line arguments, or None to use sys.argv
+    :return: 1 if a comparison found a regression, otherwise 0
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the hash maps and top_words().")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmarks")
+    run.add_argument("-o", "--output", default="bench_results.json",
+                     help="the JSON file to write the results to")
+    run.add_argument("--sizes", type=_parse_sizes, default=SIZES,
+                     help="comma-separated numbers of keys for the "
+                          "microbenchmarks, e.g. 1e3,1e4,1e5,1e6,1e7")
+    run.add_argument("--corpus", type=_parse_sizes, default=CORPUS_SIZES,
+                     help="comma-separated corpus sizes in megabytes")
+    run.add_argument("--engines", default="chained,open",
+                     help="comma-separated hash map engines to measure")
+    run.add_argument("--repeat", type=int, default=3,
+                     help="the number of times to repeat each microbenchmark")
+    run.add_argument("--seed", type=int, default=SEED,
+                     help="the seed of the keys and corpora")
+
+    compare = commands.add_parser("compare", help="compare two result files")
+    compare.add_argument("baseline", help="the results of the earlier run")
+    compare.add_argument("current", help="the results of the later run")
+    compare.add_argument("--threshold", type=float, default=THRESHOLD,
+                         help="the fraction by which a result may get worse "
+                              "before it is flagged")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_suite(args.sizes, args.corpus, args.engines.split(","),
+                            args.repeat, args.seed)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print("wrote " + args.output)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare_results(baseline, current, args.threshold)
+    print(format_comparison(rows))
+    regressions = [row for row in rows if row[4] == "regression"]
+    print("%d regression(s) above %.0f%%" % (len(regressions),
+                                             args.threshold * 100))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
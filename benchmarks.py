@@ -0,0 +1,798 @@
+# Date: October 18, 2026
+
+# benchmarks.py
+# ===================================================
+# Performance benchmarks for the HashMap class and the
+# top_words() function. Each benchmark prints its
+# results as a table. Run one benchmark by passing its
+# name on the command line (e.g. python benchmarks.py
+# lookup), or run all of them by passing no arguments.
+# ===================================================
+
+import os
+import pickle
+import re
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from hash_map import HashMap
+from hash_map import HASH_FUNCTIONS
+from hash_map import hash_batch
+
+
+# Directory holding this file and alice.txt
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def time_per_op(function, keys):
+    """
+    Call `function` once for every key and return the average time per call.
+
+    :param function: a function that takes a single key
+    :param keys: the keys to pass to the function
+    :return: the average number of nanoseconds per call
+    """
+    start = time.perf_counter()
+    for key in keys:
+        function(key)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(keys) * 1e9
+
+
+def bench_lookup():
+    """
+    Measure the per-token cost of contains_key(), get() and put() as the
+    table grows. The load factor is held at 1.0, so each bucket holds one key
+    on average and the cost of a lookup should stay flat as capacity grows.
+    Python's built-in hash() is used so that the results measure the lookup
+    path rather than the spread of a particular hash function.
+    """
+    print("capacity  contains_key (ns)  get (ns)  put (ns)")
+    for capacity in [1000, 10000, 100000, 1000000]:
+        hash_m = HashMap(capacity, hash)
+        keys = ["word" + str(i) for i in range(capacity)]
+        for key in keys:
+            hash_m.put(key, 1)
+
+        # Time each operation over a sample of the keys in the table
+        sample = keys[::max(1, capacity // 10000)]
+        contains_ns = time_per_op(hash_m.contains_key, sample)
+        get_ns = time_per_op(hash_m.get, sample)
+        put_ns = time_per_op(lambda key: hash_m.put(key, 2), sample)
+        print("%8d  %17.0f  %8.0f  %8.0f"
+              % (capacity, contains_ns, get_ns, put_ns))
+
+
+def bench_memory():
+    """
+    Measure the memory used by a HashMap per entry at several vocabulary sizes,
+    using tracemalloc. The keys are created before tracing starts, so only the
+    memory used by the table itself (buckets, nodes and the bucket array) is
+    counted. The table starts at the capacity top_words() uses and grows with a
+    maximum load factor of 1.0.
+    """
+    print("entries  capacity  table bytes  bytes/entry")
+    for size in [1000, 10000, 100000, 1000000]:
+        keys = ["word" + str(i) for i in range(size)]
+
+        tracemalloc.start()
+        hash_m = HashMap(2500, hash, max_load_factor=1.0)
+        for key in keys:
+            hash_m.put(key, 1)
+        table_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        print("%7d  %8d  %11d  %11.1f"
+              % (size, hash_m.capacity, table_bytes, table_bytes / size))
+
+
+def bench_hash():
+    """
+    Measure the per-token cost of each registered hash function over the words
+    of alice.txt, hashing one token at a time and hashing the whole list with
+    hash_batch().
+    """
+    with open("alice.txt") as f:
+        text = f.read().lower()
+    tokens = re.findall(r"\w[\w']*\w|\w", text)
+
+    print("function          single (ns)  batch (ns)")
+    for name in HASH_FUNCTIONS:
+        function = HASH_FUNCTIONS[name][0]
+        single_ns = time_per_op(function, tokens)
+
+        start = time.perf_counter()
+        hash_batch(name, tokens)
+        batch_ns = (time.perf_counter() - start) / len(tokens) * 1e9
+        print("%-16s  %11.0f  %10.0f" % (name, single_ns, batch_ns))
+
+
+def write_corpus(megabytes, newlines=True, seed=None):
+    """
+    Write a temporary corpus made of copies of alice.txt. The caller removes
+    the file when done with it.
+
+    Given a seed, some words of each copy are perturbed: given a numeric
+    suffix, which adds new words to the vocabulary as the corpus grows, given
+    a typo (two letters swapped), or capitalized. The same arguments always
+    write the same file.
+
+    :param megabytes: the approximate size of the corpus in megabytes
+    :param newlines: False to replace every line break with a space, making
+    the whole corpus a single line
+    :param seed: the seed of the perturbations, or None to write exact copies
+    :return: the name of the corpus file
+    """
+    with open(os.path.join(HERE, "alice.txt"), "rb") as f:
+        text = f.read()
+    if not newlines:
+        text = text.replace(b"\r\n", b" ")
+
+    copies = max(1, megabytes * 1000000 // len(text))
+    with tempfile.NamedTemporaryFile(suffix=".txt", delete=False) as f:
+        if seed is None:
+            for i in range(copies):
+                f.write(text)
+            return f.name
+
+        import random
+        from word_count import rgx
+
+        rng = random.Random(seed)
+        text = text.decode("utf-8")
+
+        def perturb(match):
+            word = match.group()
+            roll = rng.random()
+            if roll < 0.02:
+                return word + str(rng.randrange(100000))
+            if roll < 0.04 and len(word) > 3:
+                i = rng.randrange(len(word) - 1)
+                return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+            if roll < 0.06:
+                return word.capitalize()
+            return word
+
+        for i in range(copies):
+            f.write(rgx.sub(perturb, text).encode("utf-8"))
+    return f.name
+
+
+def bench_tokenize():
+    """
+    Measure the time and peak memory of reading every word of a 20 MB corpus
+    written as a single line, reading it line by line (the approach top_words()
+    used before) and with the chunked iter_tokens().
+    """
+    from word_count import iter_tokens
+    from word_count import rgx
+
+    def by_line(source):
+        with open(source, encoding="utf-8") as f:
+            for line in f:
+                for w in rgx.findall(line):
+                    yield w.lower()
+
+    source = write_corpus(20, newlines=False)
+    try:
+        print("reader       seconds  peak MB")
+        for name, reader in [("by line", by_line),
+                             ("iter_tokens", iter_tokens)]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            for w in reader(source):
+                pass
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print("%-11s  %7.2f  %7.1f" % (name, elapsed, peak / 1e6))
+    finally:
+        os.remove(source)
+
+
+def bench_ingest():
+    """
+    Measure top_words() throughput on a 50 MB corpus with the chunked text
+    reader and with the memory-mapped byte reader.
+    """
+    from word_count import top_words
+
+    source = write_corpus(50)
+    megabytes = os.path.getsize(source) / 1e6
+    try:
+        print("mode    seconds   MB/s")
+        for mode in ["stream", "mmap"]:
+            start = time.perf_counter()
+            top_words(source, 10, mode=mode)
+            elapsed = time.perf_counter() - start
+            print("%-6s  %7.2f  %5.1f" % (mode, elapsed, megabytes / elapsed))
+    finally:
+        os.remove(source)
+
+
+def bench_parallel():
+    """
+    Measure top_words() on a 50 MB corpus with 1 to N worker processes, where
+    N is the number of CPUs (at least 2).
+    """
+    from word_count import top_words
+
+    source = write_corpus(50)
+    megabytes = os.path.getsize(source) / 1e6
+    try:
+        print("workers  seconds   MB/s  speedup")
+        serial = None
+        for workers in range(1, max(2, os.cpu_count() or 1) + 1):
+            start = time.perf_counter()
+            top_words(source, 10, mode="mmap", workers=workers)
+            elapsed = time.perf_counter() - start
+            if serial is None:
+                serial = elapsed
+            print("%7d  %7.2f  %5.1f  %7.2f"
+                  % (workers, elapsed, megabytes / elapsed, serial / elapsed))
+    finally:
+        os.remove(source)
+
+
+def bench_snapshot():
+    """
+    Compare saving and loading a HashMap with dump()/load() against pickle, at
+    several vocabulary sizes. The counts follow a rough Zipf distribution, like
+    the counts of words in a text.
+    """
+    print("entries  format   size (KB)  save (s)  load (s)")
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "table")
+    try:
+        for size in [10000, 100000, 1000000]:
+            hash_m = HashMap(2500, "crc32", max_load_factor=1.0)
+            for i in range(size):
+                hash_m.put("word" + str(i), size // (i + 1))
+
+            def save_pickle():
+                with open(path, "wb") as f:
+                    pickle.dump(hash_m, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            def load_pickle():
+                with open(path, "rb") as f:
+                    return pickle.load(f)
+
+            formats = [
+                ("pickle", save_pickle, load_pickle),
+                ("dump", lambda: hash_m.dump(path),
+                 lambda: HashMap.load(path)),
+            ]
+            for name, save, load in formats:
+                start = time.perf_counter()
+                save()
+                save_seconds = time.perf_counter() - start
+                start = time.perf_counter()
+                load()
+                load_seconds = time.perf_counter() - start
+                print("%7d  %-9s %9.0f  %8.3f  %8.3f"
+                      % (size, name, os.path.getsize(path) / 1024,
+                         save_seconds, load_seconds))
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+        os.rmdir(directory)
+
+
+def bench_frozen():
+    """
+    Compare the cost of get() on a HashMap with the same lookups on a
+    FrozenHashMap built from it, for keys in the table and keys missing from
+    it. Both tables use crc32, so the results compare the two lookup paths
+    rather than two hash functions. The time to load the HashMap from a dump()
+    file is shown next to the time to open the frozen table.
+    """
+    from frozen_hash_map import FrozenHashMap
+
+    print("entries  HashMap hit (ns)  frozen hit (ns)  HashMap miss (ns)  "
+          "frozen miss (ns)  load (ms)  open (ms)  file (KB)")
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "table.fhm")
+    snapshot = os.path.join(directory, "table.hmap")
+    try:
+        for size in [1000, 10000, 100000, 1000000]:
+            hash_m = HashMap(2500, "crc32", max_load_factor=1.0)
+            keys = ["word" + str(i) for i in range(size)]
+            for key in keys:
+                hash_m.put(key, 1)
+
+            # Compare getting a table into a new process: loading a dump()
+            # builds every node, while opening a frozen table only maps it
+            hash_m.dump(snapshot)
+            start = time.perf_counter()
+            HashMap.load(snapshot)
+            load_ms = (time.perf_counter() - start) * 1000
+            FrozenHashMap.build(hash_m, path).close()
+            start = time.perf_counter()
+            frozen = FrozenHashMap(path)
+            open_ms = (time.perf_counter() - start) * 1000
+
+            sample = keys[::max(1, size // 10000)]
+            missing = ["missing" + str(i) for i in range(len(sample))]
+            with frozen:
+                print("%7d  %16.0f  %15.0f  %17.0f  %16.0f  %9.1f  %9.3f  %9.0f"
+                      % (size, time_per_op(hash_m.get, sample),
+                         time_per_op(frozen.get, sample),
+                         time_per_op(hash_m.get, missing),
+                         time_per_op(frozen.get, missing), load_ms, open_ms,
+                         os.path.getsize(path) / 1024))
+    finally:
+        for name in [path, snapshot]:
+            if os.path.exists(name):
+                os.remove(name)
+        os.rmdir(directory)
+
+
+def bench_cache():
+    """
+    Measure top_words() throughput on a 10 MB corpus with and without a token
+    cache, for a cheap hash function (crc32) and an expensive one
+    (hash_function_2), along with the hit rate of each cache.
+    """
+    from token_cache import TokenCache
+    from word_count import top_words
+
+    source = write_corpus(10)
+    megabytes = os.path.getsize(source) / 1e6
+    try:
+        print("hash function    cache        seconds   MB/s  hit rate")
+        for hash_function in ["crc32", "hash_function_2"]:
+            caches = [("none", None)]
+            for maxsize in [256, 4096]:
+                for policy in ["lru", "fifo"]:
+                    caches.append(("%s %d" % (policy, maxsize),
+                                   TokenCache(hash_function, maxsize, policy)))
+            for name, cache in caches:
+                start = time.perf_counter()
+                top_words(source, 10, hash_function=hash_function,
+                          token_cache=cache)
+                elapsed = time.perf_counter() - start
+                print("%-15s  %-10s  %7.2f  %5.1f  %8s"
+                      % (hash_function, name, elapsed, megabytes / elapsed,
+                         "-" if cache is None
+                         else "%.3f" % cache.hit_rate()))
+    finally:
+        os.remove(source)
+
+
+def bench_resize():
+    """
+    Measure the time to double the capacity of a HashMap of 1M keys. The
+    resize_table() column reuses the hash stored in each node, while the
+    rebuild column puts every entry into a new table, hashing every key again
+    (what resize_table() used to do).
+    """
+    size = 1000000
+    keys = ["word" + str(i) for i in range(size)]
+    print("hash function    resize_table (s)  rebuild (s)")
+    for hash_function in ["crc32", "fnv1a"]:
+        hash_m = HashMap(size, hash_function)
+        for key in keys:
+            hash_m.put(key, 1)
+
+        start = time.perf_counter()
+        rebuilt = HashMap(size * 2, hash_function)
+        for key, value in hash_m.items():
+            rebuilt.put(key, value)
+        rebuild_seconds = time.perf_counter() - start
+        del rebuilt
+
+        start = time.perf_counter()
+        hash_m.resize_table(size * 2)
+        resize_seconds = time.perf_counter() - start
+        print("%-15s  %16.2f  %11.2f"
+              % (hash_function, resize_seconds, rebuild_seconds))
+
+
+def bench_heavy():
+    """
+    Compare top_words() with exact counts against approximate counts from
+    HeavyHitters sketches of several sizes, on copies of alice.txt with three
+    random IDs added to every line (a long tail of words seen once). For each
+    sketch, recall is the fraction of the exact top 10 and top 100 words that
+    it returns, and the largest overcount is compared with the error bound it
+    reports. Memory is the peak traced by tracemalloc while counting.
+    """
+    import random
+    from heavy_hitters import HeavyHitters
+    from word_count import top_words
+
+    rng = random.Random(42)
+    with open("alice.txt", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False,
+                                     encoding="utf-8") as f:
+        for copy in range(5):
+            for line in lines:
+                ids = ["id%010x" % rng.getrandbits(40) for i in range(3)]
+                f.write(line + " " + " ".join(ids) + "\n")
+    source = f.name
+
+    def measure(sketch):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = top_words(source, 100, sketch=sketch)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, elapsed, peak
+
+    try:
+        exact, elapsed, peak = measure(None)
+        counts = dict(top_words(source, None))
+        print("%d words, %d distinct" % (sum(counts.values()), len(counts)))
+        print("counter                 seconds  peak MB  recall@10  "
+              "recall@100  max over  bound")
+        print("%-22s  %7.2f  %7.1f  %9.2f  %10.2f  %8d  %5d"
+              % ("exact HashMap", elapsed, peak / 1e6, 1.0, 1.0, 0, 0))
+
+        top_10 = set(word for word, count in exact[:10])
+        top_100 = set(word for word, count in exact)
+        for capacity, epsilon in [(200, 1e-3), (1000, 1e-4), (5000, 1e-5)]:
+            sketch = HeavyHitters(capacity, epsilon)
+            result, elapsed, peak = measure(sketch)
+            found = set(word for word, count in result)
+            overcount = max(count - counts[word] for word, count in result)
+            print("%-22s  %7.2f  %7.1f  %9.2f  %10.2f  %8d  %5d"
+                  % ("sketch %d, eps %g" % (capacity, epsilon), elapsed,
+                     peak / 1e6, len(found & top_10) / 10,
+                     len(found & top_100) / 100, overcount,
+                     sketch.report()["error_bound"]))
+    finally:
+        os.remove(source)
+
+# Program run in each subprocess of bench_async(): write a file to stdout in
+# 64 KB chunks, sleeping between chunks like a slow network peer
+_SLOW_WRITER = """
+import sys, time
+delay = float(sys.argv[2])
+with open(sys.argv[1], "rb") as f:
+    while True:
+        chunk = f.read(1 << 16)
+        if not chunk:
+            break
+        sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+        time.sleep(delay)
+"""
+
+
+def bench_async():
+    """
+    Count the words of 8 subprocesses that each write a 1 MB corpus to a pipe,
+    with a delay after every 64 KB. Reading the pipes one after another waits
+    for each writer in turn, while count_streams() reads all of them as their
+    data arrives. With no delay, the difference is the overhead of asyncio.
+    """
+    import asyncio
+    import subprocess
+    from async_count import count_streams
+    from word_count import new_table
+    from word_count import tokenize_chunks
+
+    streams = 8
+    source = write_corpus(1)
+    megabytes = streams * os.path.getsize(source) / 1e6
+
+    def sequential(delay):
+        table = new_table()
+        for i in range(streams):
+            proc = subprocess.Popen([sys.executable, "-c", _SLOW_WRITER,
+                                     source, str(delay)],
+                                    stdout=subprocess.PIPE)
+            with proc.stdout as pipe:
+                chunks = iter(lambda: pipe.read(1 << 16).decode("utf-8"), "")
+                for words in tokenize_chunks(chunks):
+                    for w in words:
+                        table.increment(w)
+            proc.wait()
+        return table
+
+    async def concurrent(delay):
+        procs = [await asyncio.create_subprocess_exec(
+                     sys.executable, "-c", _SLOW_WRITER, source, str(delay),
+                     stdout=subprocess.PIPE)
+                 for i in range(streams)]
+        table = await count_streams([proc.stdout for proc in procs])
+        for proc in procs:
+            await proc.wait()
+        return table
+
+    try:
+        print("delay (ms)  method      seconds   MB/s")
+        for delay in [0, 0.025, 0.1]:
+            for name, run in [("sequential", sequential),
+                              ("asyncio", lambda d: asyncio.run(
+                                  concurrent(d)))]:
+                start = time.perf_counter()
+                table = run(delay)
+                elapsed = time.perf_counter() - start
+                print("%10g  %-10s  %7.2f  %5.1f"
+                      % (delay * 1000, name, elapsed, megabytes / elapsed))
+        assert table.get("alice") > 0
+    finally:
+        os.remove(source)
+
+def bench_batch():
+    """
+    Compare counting the words of a 20 MB corpus one increment() at a time
+    against one increment_many() per chunk, and inserting 1,000,000 distinct
+    keys with put() against put_many() in batches of 10,000. The words are
+    tokenized before timing, so only the table updates are measured.
+    """
+    from word_count import iter_token_batches
+    from word_count import new_table
+
+    source = write_corpus(20)
+    try:
+        batches = list(iter_token_batches(source))
+    finally:
+        os.remove(source)
+    words = sum(len(batch) for batch in batches)
+    keys = ["key%d" % i for i in range(1000000)]
+    pairs = [keys[i:i + 10000] for i in range(0, len(keys), 10000)]
+
+    def count_each(table):
+        increment = table.increment
+        for batch in batches:
+            for w in batch:
+                increment(w)
+
+    def count_batches(table):
+        for batch in batches:
+            table.increment_many(batch)
+
+    def put_each(table):
+        put = table.put
+        for i, key in enumerate(keys):
+            put(key, i)
+
+    def put_batches(table):
+        for batch in pairs:
+            table.put_many(zip(batch, range(len(batch))))
+
+    print("                    ns/op")
+    print("engine   operation  single  batch  speedup")
+    for engine in ["chained", "open"]:
+        for name, single, batched, ops in [
+                ("increment", count_each, count_batches, words),
+                ("put", put_each, put_batches, len(keys))]:
+            results = []
+            for run in [single, batched]:
+                table = new_table(engine)
+                start = time.perf_counter()
+                run(table)
+                results.append((time.perf_counter() - start) / ops * 1e9)
+            print("%-7s  %-9s  %6.0f  %5.0f  %7.2f"
+                  % (engine, name, results[0], results[1],
+                     results[0] / results[1]))
+
+def bench_startup():
+    """
+    Measure how long a new interpreter takes to start and import the modules
+    of the word counter, to print the command line help, and to count
+    alice.txt. Each command runs 10 times and the median is reported.
+    """
+    import statistics
+    import subprocess
+
+    commands = [
+        ("python -c pass", ["-c", "pass"]),
+        ("import hash_map", ["-c", "import hash_map"]),
+        ("import word_count", ["-c", "import word_count"]),
+        ("word_count.py --help", ["word_count.py", "--help"]),
+        ("word_count.py alice.txt", ["word_count.py", "alice.txt"]),
+    ]
+    print("command                  median ms")
+    for name, args in commands:
+        times = []
+        for i in range(10):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + args, check=True,
+                           stdout=subprocess.DEVNULL)
+            times.append((time.perf_counter() - start) * 1000)
+        print("%-23s  %9.1f" % (name, statistics.median(times)))
+
+def bench_instrument():
+    """
+    Measure the cost of instrumentation on a 10 MB corpus. top_words() without
+    stats is compared with the same loop written out without any of the
+    instrumentation hooks, which should cost the same when the hooks are off,
+    and with top_words() recording a TopWordsStats and counting with an
+    InstrumentedHashMap. get() and increment() on a HashMap and an
+    InstrumentedHashMap are compared too. Each time is the best of 5 runs.
+    """
+    from instrumentation import InstrumentedHashMap
+    from instrumentation import TopWordsStats
+    from word_count import iter_token_batches
+    from word_count import new_table
+    from word_count import top_entries
+    from word_count import top_words
+
+    source = write_corpus(10)
+
+    def bare():
+        table = new_table()
+        for words in iter_token_batches(source):
+            table.increment_many(words)
+        return top_entries(table, 10)
+
+    def best_of(function, runs=5):
+        times = []
+        for i in range(runs):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    try:
+        baseline = best_of(bare)
+        print("top_words              seconds  overhead")
+        for name, function in [
+                ("without hooks", bare),
+                ("stats off", lambda: top_words(source, 10)),
+                ("stats on", lambda: top_words(source, 10,
+                                               stats=TopWordsStats()))]:
+            seconds = baseline if function is bare else best_of(function)
+            print("%-20s  %8.3f  %+7.1f%%"
+                  % (name, seconds, (seconds / baseline - 1) * 100))
+    finally:
+        os.remove(source)
+
+    keys = ["word" + str(i) for i in range(100000)]
+    print("table                 get (ns)  increment (ns)")
+    for table_class in [HashMap, InstrumentedHashMap]:
+        table = table_class(2500, "crc32", max_load_factor=1.0)
+        for key in keys:
+            table.put(key, 1)
+        get_ns = min(time_per_op(table.get, keys) for i in range(5))
+        increment_ns = min(time_per_op(table.increment, keys)
+                           for i in range(5))
+        print("%-20s  %8.0f  %14.0f"
+              % (table_class.__name__, get_ns, increment_ns))
+
+def bench_iterate():
+    """
+    Compare ways of reading every entry of a HashMap of 1,000,000 words: the
+    list made by get_tuples(), and the items() and values() generators. Peak
+    memory is traced by tracemalloc. Then time pickling the table, which now
+    keeps its keys and values in two flat lists instead of a list of tuples,
+    and __str__, which now joins its lines once instead of adding them to a
+    string one at a time.
+    """
+    keys = ["word" + str(i) for i in range(1000000)]
+    hash_m = HashMap(2500, "crc32", max_load_factor=1.0)
+    hash_m.put_many(zip(keys, range(len(keys))))
+
+    def measure(function):
+        tracemalloc.start()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return elapsed, peak
+
+    print("sum of 1M counts       seconds  peak MB")
+    for name, function in [
+            ("get_tuples()", lambda: sum(v for k, v in hash_m.get_tuples())),
+            ("items()", lambda: sum(v for k, v in hash_m.items())),
+            ("values()", lambda: sum(hash_m.values()))]:
+        elapsed, peak = measure(function)
+        print("%-20s  %8.3f  %7.1f" % (name, elapsed, peak / 1e6))
+
+    print("pickle state           dumps (s)  loads (s)  MB")
+    state = hash_m.__getstate__()
+    old_state = dict(state)
+    old_state["items"] = list(zip(old_state.pop("keys"),
+                                  old_state.pop("values")))
+    for name, table_state in [("(key, value) list", old_state),
+                              ("keys, values lists", state)]:
+        start = time.perf_counter()
+        data = pickle.dumps(table_state)
+        dumped = time.perf_counter()
+        copy = HashMap.__new__(HashMap)
+        copy.__setstate__(pickle.loads(data))
+        loaded = time.perf_counter()
+        print("%-20s  %10.3f  %9.3f  %4.1f"
+              % (name, dumped - start, loaded - dumped, len(data) / 1e6))
+
+    def concatenated(table):
+        out = ""
+        for index, bucket in enumerate(table._buckets):
+            out = out + str(index) + ': ' + str(bucket) + '\n'
+        return out
+
+    print("buckets  __str__ (s)  concatenated (s)")
+    for size in [10000, 30000, 100000]:
+        table = HashMap(size, "crc32")
+        table.put_many(zip(keys[:size], range(size)))
+        joined_seconds = measure(lambda: str(table))[0]
+        concatenated_seconds = measure(lambda: concatenated(table))[0]
+        print("%7d  %11.3f  %16.3f"
+              % (size, joined_seconds, concatenated_seconds))
+
+
+def bench_interleaved():
+    """
+    Measure a workload that counts words one at a time, as a Concordance does,
+    and asks for the top 10 words every `interval` words. top_entries() on a
+    HashMap scans the whole vocabulary on every query, while an IndexedHashMap
+    keeps its words sorted by count and reads them off its index. The words
+    are 300,000 draws from a vocabulary of 100,000 words with Zipf-like
+    frequencies, as in natural text.
+    """
+    import random
+    from frequency_index import IndexedHashMap
+    from word_count import top_entries
+
+    vocabulary = ["word" + str(i) for i in range(100000)]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    words = random.Random(42).choices(vocabulary, weights, k=300000)
+
+    def run(table_class, interval):
+        table = table_class(2500, "crc32", max_load_factor=1.0)
+        increment = table.increment
+        start = time.perf_counter()
+        for i, word in enumerate(words, 1):
+            increment(word)
+            if i % interval == 0:
+                top_entries(table, 10)
+        return time.perf_counter() - start
+
+    print("%d words, %d distinct" % (len(words), len(set(words))))
+    print("query every   HashMap (s)  IndexedHashMap (s)  speedup")
+    for interval in [len(words) + 1, 10000, 1000]:
+        plain = min(run(HashMap, interval) for i in range(3))
+        indexed = min(run(IndexedHashMap, interval) for i in range(3))
+        label = "never" if interval > len(words) else str(interval)
+        print("%-11s  %11.3f  %18.3f  %6.1fx"
+              % (label, plain, indexed, plain / indexed))
+
+    # The cost of one query as the vocabulary grows
+    print("distinct    top_entries (us)  top_k (us)")
+    for size in [1000, 10000, 100000]:
+        plain = HashMap(2500, "crc32", max_load_factor=1.0)
+        indexed = IndexedHashMap(2500, "crc32", max_load_factor=1.0)
+        for i in range(size):
+            plain.put("word" + str(i), i % 1000)
+            indexed.put("word" + str(i), i % 1000)
+        plain_us = min(timeit.timeit(lambda: top_entries(plain, 10), number=10)
+                       for i in range(3)) / 10 * 1e6
+        indexed_us = min(timeit.timeit(lambda: indexed.top_k(10), number=10)
+                         for i in range(3)) / 10 * 1e6
+        print("%8d  %16.1f  %10.1f" % (size, plain_us, indexed_us))
+
+
+BENCHMARKS = {
+    "lookup": bench_lookup,
+    "memory": bench_memory,
+    "hash": bench_hash,
+    "tokenize": bench_tokenize,
+    "ingest": bench_ingest,
+    "parallel": bench_parallel,
+    "snapshot": bench_snapshot,
+    "frozen": bench_frozen,
+    "cache": bench_cache,
+    "resize": bench_resize,
+    "heavy": bench_heavy,
+    "async": bench_async,
+    "batch": bench_batch,
+    "startup": bench_startup,
+    "instrument": bench_instrument,
+    "iterate": bench_iterate,
+    "interleaved": bench_interleaved,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print("=== " + name + " ===")
+        BENCHMARKS[name]()
@@ -0,0 +1,244 @@
+# Date: October 18, 2026
+
+# concordance.py
+# ===================================================
+# Keep word counts of an append-only corpus up to date
+# without recounting it. For each file, the count state
+# records how many bytes have been counted, so a refresh
+# only reads the bytes appended since the last one.
+# ===================================================
+
+import os
+import pickle
+from word_count import CHUNK_SIZE
+from word_count import TrailingRun
+from word_count import boundary_byte_rgx
+from word_count import expand_sources
+from word_count import iter_buffer_token_batches
+from word_count import iter_buffer_tokens
+from word_count import new_table
+from word_count import top_entries
+
+
+# Number of bytes at the start of each file kept to notice replaced files
+HEAD_SIZE = 1024
+
+
+class FileState:
+    """
+    Record how much of one file has been counted.
+
+    :param offset: the number of bytes of the file counted so far
+    :param size: the size of the file when it was last read
+    :param mtime_ns: the modification time of the file when it was last read
+    :param head: the first bytes of the file, up to HEAD_SIZE of them
+    :param tail: the bytes at the end of the file that might be the start of
+    a longer word, included in `offset`
+    :param tail_words: the words in `tail`, which are counted until more of
+    the file is read
+    """
+    __slots__ = ('offset', 'size', 'mtime_ns', 'head', 'tail', 'tail_words')
+
+    def __init__(self, offset=0, size=0, mtime_ns=0, head=b"", tail=b"",
+                 tail_words=()):
+        self.offset = offset
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.head = head
+        self.tail = tail
+        self.tail_words = tail_words
+
+    def __getstate__(self):
+        return (self.offset, self.size, self.mtime_ns, self.head, self.tail,
+                self.tail_words)
+
+    def __setstate__(self, state):
+        (self.offset, self.size, self.mtime_ns, self.head, self.tail,
+         self.tail_words) = state
+
+
+class Concordance:
+    """
+    Create word counts of a corpus that can be brought up to date by counting
+    only what was appended to its files.
+
+    Files are expected to only grow. If a counted file shrinks, disappears or
+    has its first bytes changed, it has been replaced, and the next refresh
+    recounts the whole corpus.
+
+    :param engine: the name of the hash map engine to count with
+    :param hash_function: the hash function for the table to use
+    :param chunk_size: the number of bytes to read from a file at a time
+    :param indexed: True to keep the words sorted by count as they are
+    counted, so that top_words() does not visit the whole vocabulary. This
+    suits a corpus that is queried often between refreshes, and makes
+    counting slower.
+    """
+    def __init__(self, engine="chained", hash_function="crc32",
+                 chunk_size=CHUNK_SIZE, indexed=False):
+        self.engine = engine
+        self.hash_function = hash_function
+        self.chunk_size = chunk_size
+        self.indexed = indexed
+        self.counts = new_table(engine, hash_function, indexed=indexed)
+        self.files = {}  # Maps each file name to its FileState
+
+    def reset(self):
+        """
+        Forget every count, so that the next refresh recounts the corpus.
+        """
+        self.counts = new_table(self.engine, self.hash_function,
+                                indexed=self.indexed)
+        self.files = {}
+
+    def _is_replaced(self, source, state, stat):
+        """
+        Check whether a counted file has been replaced instead of appended to.
+
+        :param source: the file name
+        :param state: the FileState of the file
+        :param stat: the result of os.stat() on the file
+        :return: True if the counted part of the file may have changed
+        """
+        if stat.st_size < state.offset:
+            return True
+        if stat.st_size == state.size and stat.st_mtime_ns == state.mtime_ns:
+            return False
+        with open(source, "rb") as f:
+            return f.read(len(state.head)) != state.head
+
+    def _add(self, words, delta):
+        """
+        Add `delta` to the count of each word as one batch, removing words
+        whose count drops to 0.
+
+        :param words: a list or tuple of words
+        :param delta: 1 to count the words, or -1 to uncount them
+        """
+        counts = self.counts
+        counts.increment_many(words, delta)
+
+        # Only uncounting can bring a count down to 0
+        if delta < 0:
+            for w in set(words):
+                if counts.get(w) == 0:
+                    counts.remove(w)
+
+    def _count_new_bytes(self, source, state, stat):
+        """
+        Count the bytes appended to a file since it was last read.
+
+        :param source: the file name
+        :param state: the FileState of the file, which is updated
+        :param stat: the result of os.stat() on the file
+        :return: the number of bytes read
+        """
+        # The held back tail will be counted again with what follows it
+        self._add(state.tail_words, -1)
+        carry = TrailingRun(boundary_byte_rgx, state.tail)
+        read = 0
+
+        with open(source, "rb") as f:
+            if len(state.head) < HEAD_SIZE:
+                state.head = f.read(HEAD_SIZE)
+            f.seek(state.offset)
+            while True:
+                data = f.read(self.chunk_size)
+                if not data:
+                    break
+                read += len(data)
+
+                # Hold back the trailing run of word bytes, which may continue
+                # in the next chunk
+                data = carry.split(data)
+                if data:
+                    for words in iter_buffer_token_batches(data):
+                        self._add(words, 1)
+
+        # Count the words of the tail for now, unless the tail ends in the
+        # middle of a character that has not been fully written yet
+        carry = carry.flush()
+        try:
+            tail_words = tuple(iter_buffer_tokens(carry))
+        except UnicodeDecodeError:
+            tail_words = ()
+        self._add(tail_words, 1)
+
+        state.offset += read
+        state.size = stat.st_size
+        state.mtime_ns = stat.st_mtime_ns
+        state.tail = carry
+        state.tail_words = tail_words
+        return read
+
+    def refresh(self, sources):
+        """
+        Bring the counts up to date with a corpus, reading only the bytes that
+        were appended since the last refresh.
+
+        :param sources: a list of file names, directory names and glob patterns
+        :return: the number of bytes read
+        """
+        sources = list(expand_sources(sources))
+        listed = set(sources)
+
+        # If a counted file was replaced or removed, its old words cannot be
+        # told apart from the rest, so start over
+        for source in list(self.files):
+            if source not in listed or not os.path.exists(source):
+                self.reset()
+                break
+            if self._is_replaced(source, self.files[source],
+                                 os.stat(source)):
+                self.reset()
+                break
+
+        read = 0
+        for source in sources:
+            stat = os.stat(source)
+            state = self.files.get(source)
+            if state is None:
+                state = self.files[source] = FileState()
+            if stat.st_size != state.offset:
+                read += self._count_new_bytes(source, state, stat)
+            else:
+                state.mtime_ns = stat.st_mtime_ns
+        return read
+
+    def top_words(self, number):
+        """
+        Return the most common words counted so far.
+
+        :param number: the number of top results to return, or None to return
+        every count
+        :return: a list of tuples of the form (word, count), sorted by most
+        common word and then alphabetically
+        """
+        return top_entries(self.counts, number)
+
+    def save(self, path):
+        """
+        Save the counts and the state of every file.
+
+        :param path: the file to save to
+        """
+        # Write a new file and move it into place, so that a crash while
+        # saving never leaves a half-written state behind
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load counts saved by save().
+
+        :param path: the file to load from
+        :return: a Concordance
+        """
+        with open(path, "rb") as f:
+            concordance = pickle.load(f)
+        if not isinstance(concordance, cls):
+            raise TypeError(path + " does not hold a " + cls.__name__)
+        return concordance
@@ -0,0 +1,278 @@
+# Date: October 18, 2026
+
+# frequency_index.py
+# ===================================================
+# Keep the words of a live count table sorted by count,
+# so that the most common words can be read off at any
+# time without scanning the vocabulary. Words are kept
+# in groups of equal count, and the groups in a doubly
+# linked list from the highest count to the lowest, as
+# in an LFU cache. Adding 1 to a count, or taking 1
+# away, moves its word to the next group in O(1) time.
+# IndexedHashMap is a HashMap that keeps such an index
+# of its values.
+# ===================================================
+
+import heapq
+from hash_map import HashMap
+from hash_map import hash_batch
+
+
+class _CountGroup:
+    """
+    Create a group of the keys that share a count.
+
+    :param count: the count of every key in the group
+    """
+    __slots__ = ('count', 'keys', 'higher', 'lower')
+
+    def __init__(self, count):
+        self.count = count
+        self.keys = {}  # A dict used as an ordered set of keys
+        self.higher = None  # The group with the next higher count
+        self.lower = None  # The group with the next lower count
+
+
+class FrequencyIndex:
+    """
+    Create an index of keys sorted by count. The index does not hold the
+    counts itself: the owner of the counts reports every change with update().
+
+    Moving a key to a count that already has a group costs O(1). A count with
+    no group yet is linked in next to the group the key leaves (or, for a new
+    key, next to the lowest count), walking past one group for each count in
+    between, so changes by 1 and new keys counted from 1 always cost O(1).
+    """
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return self._size
+
+    def clear(self):
+        """
+        Remove every key from the index.
+        """
+        self._groups = {}  # Maps each count to its _CountGroup
+        self._top = None  # The group with the highest count
+        self._bottom = None  # The group with the lowest count
+        self._size = 0
+
+    def update(self, key, old, new):
+        """
+        Move a key from one count to another.
+
+        :param key: the key whose count changed
+        :param old: the count the key had, or None if it is new
+        :param new: the count the key has now, or None if it was removed
+        """
+        groups = self._groups
+        group = None
+        if old is not None:
+            group = groups[old]
+            del group.keys[key]
+        else:
+            self._size += 1
+
+        if new is not None:
+            target = groups.get(new)
+            if target is None:
+                target = self._create_group(new, group)
+            target.keys[key] = None
+        else:
+            self._size -= 1
+
+        # Unlink the group the key left only now, since the new group may
+        # have been linked in next to it
+        if group is not None and not group.keys:
+            self._unlink(group)
+
+    def _create_group(self, count, near):
+        """
+        Helper method for update() that links in a new group for a count.
+
+        :param count: the count of the group, which has no group yet
+        :param near: a group to start looking for the place of the new group
+        from, or None to start from the group with the lowest count
+        :return: the new _CountGroup
+        """
+        group = _CountGroup(count)
+        self._groups[count] = group
+        if near is None:
+            near = self._bottom
+
+        # The first group is both the highest and the lowest
+        if near is None:
+            self._top = self._bottom = group
+            return group
+
+        # Walk to the groups on either side of the new count
+        if count > near.count:
+            while near.higher is not None and near.higher.count < count:
+                near = near.higher
+            lower, higher = near, near.higher
+        else:
+            while near.lower is not None and near.lower.count > count:
+                near = near.lower
+            lower, higher = near.lower, near
+
+        group.lower = lower
+        group.higher = higher
+        if lower is not None:
+            lower.higher = group
+        else:
+            self._bottom = group
+        if higher is not None:
+            higher.lower = group
+        else:
+            self._top = group
+        return group
+
+    def _unlink(self, group):
+        """
+        Helper method for update() that removes an empty group.
+
+        :param group: the _CountGroup to remove
+        """
+        del self._groups[group.count]
+        if group.lower is not None:
+            group.lower.higher = group.higher
+        else:
+            self._bottom = group.higher
+        if group.higher is not None:
+            group.higher.lower = group.lower
+        else:
+            self._top = group.lower
+
+    def top_k(self, number):
+        """
+        Return the keys with the highest counts. Only the groups holding the
+        results are visited, so this takes O(number) time whatever the number
+        of keys, except that ties at the last count returned are broken by
+        choosing the smallest keys of that group.
+
+        :param number: the number of keys to return, or None to return every
+        key
+        :return: a list of tuples of the form (key, count), sorted by
+        descending count and then by key
+        """
+        results = []
+        group = self._top
+        while group is not None:
+            if number is not None:
+                remaining = number - len(results)
+                if remaining <= 0:
+                    break
+                if len(group.keys) > remaining:
+                    keys = heapq.nsmallest(remaining, group.keys)
+                else:
+                    keys = sorted(group.keys)
+            else:
+                keys = sorted(group.keys)
+            count = group.count
+            results.extend((key, count) for key in keys)
+            group = group.lower
+        return results
+
+
+class IndexedHashMap(HashMap):
+    """
+    Create a HashMap of counts that keeps a FrequencyIndex of its values in
+    `index`, so that top_k() answers without sorting the table. Every change
+    to a value updates the index, and every update except increment() looks
+    the key up once more to find its old value, so the table is slower to
+    change than a HashMap and holds a second reference to each key. The values
+    must be numbers.
+
+    :param capacity: the total number of buckets to be created in the hash table
+    :param function: the hash function to use for hashing values, or the name
+    of a function in HASH_FUNCTIONS
+    :param max_load_factor: the load factor above which the table grows, or
+    None to never grow automatically
+    :param min_load_factor: the load factor below which the table shrinks, or
+    None to never shrink automatically
+    """
+    def __init__(self, capacity, function, max_load_factor=None,
+                 min_load_factor=None):
+        self.index = FrequencyIndex()
+        super().__init__(capacity, function, max_load_factor, min_load_factor)
+
+    def top_k(self, number):
+        """
+        Return the most common keys, read from the index.
+
+        :param number: the number of top results to return, or None to return
+        every entry
+        :return: a list of tuples of the form (key, value), sorted by
+        descending value and then by key
+        """
+        return self.index.top_k(number)
+
+    def clear(self):
+        super().clear()
+        self.index.clear()
+
+    def put(self, key, value, hash_value=None):
+        if self.capacity == 0:
+            return None
+        if hash_value is None:
+            hash_value = self._hash_function(key)
+        old = self.get(key, hash_value)
+        super().put(key, value, hash_value)
+        self.index.update(key, old, value)
+
+    def increment(self, key, delta=1, hash_value=None):
+        # The size only stays the same if the key was already in the table,
+        # so its old value is found without looking it up again
+        size = self.size
+        value = super().increment(key, delta, hash_value)
+        if value is not None:
+            old = value - delta if self.size == size else None
+            self.index.update(key, old, value)
+        return value
+
+    def upsert(self, key, function, default=None):
+        old = self.get(key)
+        value = super().upsert(key, function, default)
+        if value is not None:
+            self.index.update(key, old, value)
+        return value
+
+    def _update_many(self, entries, combine, hashes=None):
+        """
+        Find the old values of a batch before adding it with
+        HashMap._update_many(), and move its keys in the index. The keys are
+        hashed once, for both.
+        """
+        if self.capacity == 0 or not entries:
+            return
+        keys = list(entries)
+        if hashes is None:
+            hashes = hash_batch(self._hash_function, keys)
+        old_values = [self.get(key, hash_value) for key, hash_value
+                      in zip(keys, hashes)]
+        super()._update_many(entries, combine, hashes)
+
+        update = self.index.update
+        for key, old in zip(keys, old_values):
+            value = entries[key]
+            if old is not None and combine is not None:
+                value = combine(old, value)
+            update(key, old, value)
+
+    def remove(self, key):
+        old = self.get(key)
+        super().remove(key)
+        if old is not None:
+            self.index.update(key, old, None)
+
+    @classmethod
+    def load(cls, path, function=None):
+        # A snapshot is linked into the buckets directly, so index the loaded
+        # table afterwards
+        table = super().load(path, function)
+        table.index.clear()
+        update = table.index.update
+        for key, value in table.items():
+            update(key, None, value)
+        return table
@@ -0,0 +1,315 @@
+# Date: October 18, 2026
+# Description: This file contains a read-only hash map stored in a single file.
+# The file holds an open addressing table with a power of two number of slots,
+# laid out as four arrays (hashes, key offsets, key lengths and values) followed
+# by the UTF-8 bytes of every key. The file is memory-mapped, so any number of
+# processes can look words up in one copy of the table in the page cache.
+
+# frozen_hash_map.py
+# ===================================================
+# Implement a read-only, memory-mapped hash map
+# ===================================================
+
+import mmap
+import struct
+import sys
+from array import array
+from hash_map import _hash_function_name
+from hash_map import get_hash_function
+
+
+# The file starts with this header: the magic bytes, the format version, 1 if
+# the arrays are big-endian, the number of slots, the number of keys and the
+# length of the hash function name. The name follows, padded to 8 bytes so that
+# the arrays after it stay aligned.
+FROZEN_MAGIC = b"FHMP"
+FROZEN_VERSION = 1
+_FROZEN_HEADER = struct.Struct("<4sBBxxQQQ")
+
+# Key length stored in a slot that holds no key
+_EMPTY = 0xffffffffffffffff
+
+# Hashes are stored as 64-bit unsigned integers
+_HASH_MASK = 0xffffffffffffffff
+
+
+def _padded(length):
+    """
+    Round a length up to a multiple of 8 bytes.
+
+    :param length: a number of bytes
+    :return: the smallest multiple of 8 that is at least `length`
+    """
+    return (length + 7) & ~7
+
+
+class FrozenHashMap:
+    """
+    Open a table written by FrozenHashMap.build(). The table cannot be changed.
+
+    :param path: the file holding the table
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        try:
+            self._open(view)
+        except (ValueError, TypeError):
+            # The view has to be released before the map can be closed
+            view.release()
+            self._mmap.close()
+            raise
+
+    def _open(self, view):
+        """
+        Read the header and set up typed views of the arrays in the file.
+
+        :param view: a memoryview of the whole file
+        """
+        if len(view) < _FROZEN_HEADER.size:
+            raise ValueError(self.path + " is not a FrozenHashMap file")
+        magic, version, big_endian, capacity, size, name_length = \
+            _FROZEN_HEADER.unpack_from(view)
+        if magic != FROZEN_MAGIC:
+            raise ValueError(self.path + " is not a FrozenHashMap file")
+        if version != FROZEN_VERSION:
+            raise ValueError("unsupported FrozenHashMap version: "
+                             + str(version))
+
+        # The arrays are read in native byte order without copying them
+        if big_endian != (sys.byteorder == "big"):
+            raise ValueError(self.path + " was written on a machine with a "
+                             "different byte order")
+
+        pos = _FROZEN_HEADER.size
+        self.hash_function_name = str(view[pos:pos + name_length], 'utf-8')
+        self._hash_function = get_hash_function(self.hash_function_name)
+        pos += _padded(name_length)
+
+        array_bytes = capacity * 8
+        self._hashes = view[pos:pos + array_bytes].cast('Q')
+        pos += array_bytes
+        self._offsets = view[pos:pos + array_bytes].cast('Q')
+        pos += array_bytes
+        self._lengths = view[pos:pos + array_bytes].cast('Q')
+        pos += array_bytes
+        self._values = view[pos:pos + array_bytes].cast('q')
+        pos += array_bytes
+        self._blob_start = pos  # The keys are read from the mmap itself
+        self._view = view
+
+        self.capacity = capacity
+        self.size = size
+        self._mask = capacity - 1
+
+    @classmethod
+    def build(cls, table, path):
+        """
+        Write the entries of a hash map to a file as a frozen table, and open
+        it.
+
+        :param table: a HashMap or OpenHashMap whose values are integers that
+        fit in 64 bits, using a hash function registered in HASH_FUNCTIONS
+        :param path: the file to write
+        :return: a FrozenHashMap of the file
+        """
+        name = _hash_function_name(table._hash_function)
+        if name is None:
+            raise ValueError("only tables using a hash function registered in "
+                             "HASH_FUNCTIONS can be frozen")
+        function = table._hash_function
+
+        # Use at least twice as many slots as keys, so that probe sequences
+        # stay short and every sequence ends at an empty slot
+        capacity = 1
+        while capacity < 2 * table.size:
+            capacity *= 2
+        mask = capacity - 1
+
+        hashes = array('Q', bytes(capacity * 8))
+        offsets = array('Q', bytes(capacity * 8))
+        lengths = array('Q', [_EMPTY]) * capacity
+        values = array('q', bytes(capacity * 8))
+        blob = bytearray()
+
+        # Insert each key with linear probing, as OpenHashMap does
+        for key, value in table.items():
+            hash_value = function(key)
+            index = hash_value & mask
+            while lengths[index] != _EMPTY:
+                index = (index + 1) & mask
+            encoded = key.encode('utf-8')
+            hashes[index] = hash_value & _HASH_MASK
+            offsets[index] = len(blob)
+            lengths[index] = len(encoded)
+            values[index] = value
+            blob += encoded
+
+        name = name.encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(_FROZEN_HEADER.pack(
+                FROZEN_MAGIC, FROZEN_VERSION, sys.byteorder == "big",
+                capacity, table.size, len(name)))
+            f.write(name.ljust(_padded(len(name)), b'\0'))
+            for column in (hashes, offsets, lengths, values):
+                column.tofile(f)
+            f.write(blob)
+        return cls(path)
+
+    def close(self):
+        """
+        Release the memory map. The table cannot be used afterwards.
+        """
+        for name in ('_hashes', '_offsets', '_lengths', '_values', '_view'):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getstate__(self):
+        """
+        Pickle the table as the name of its file, so that a process receiving
+        it maps the same file instead of getting a copy.
+
+        :return: the name of the file
+        """
+        return self.path
+
+    def __setstate__(self, path):
+        """
+        Open the file named by __getstate__().
+
+        :param path: the name of the file
+        """
+        self.__init__(path)
+
+    def _find_slot(self, key):
+        """
+        Probe the table for the given key.
+
+        :param key: the key (string) to look for
+        :return: the index of the key's slot, or None if the key is not in the
+        table
+        """
+        hash_value = self._hash_function(key)
+        index = hash_value & self._mask
+        hash_value &= _HASH_MASK
+        hashes = self._hashes
+        lengths = self._lengths
+        encoded = None
+
+        while True:
+            length = lengths[index]
+
+            # An empty slot ends the probe sequence
+            if length == _EMPTY:
+                return None
+
+            # Compare hashes before comparing the keys themselves
+            if hashes[index] == hash_value:
+                if encoded is None:
+                    encoded = key.encode('utf-8')
+                # Slicing the mmap compares faster than slicing a memoryview
+                offset = self._blob_start + self._offsets[index]
+                if self._mmap[offset:offset + length] == encoded:
+                    return index
+
+            index = (index + 1) & self._mask
+
+    def get(self, key):
+        """
+        Return the value associated with the given key.
+
+        :param key: the key (string) to look for
+        :return: the value associated with the key. If the key is not in the
+        hash map, return None.
+        """
+        index = self._find_slot(key)
+        if index is None:
+            return None
+        return self._values[index]
+
+    def contains_key(self, key):
+        """
+        Search to see if the hash map contains the given key.
+
+        :param key: the key (string) to look for
+        :return: True if the key is in the hash map, otherwise False
+        """
+        return self._find_slot(key) is not None
+
+    def items(self):
+        """
+        Generate the key-value pairs in the table one at a time, without
+        building a list of all of them first.
+
+        :return: a generator of (key, value) tuples
+        """
+        blob = self._mmap
+        start = self._blob_start
+        offsets = self._offsets
+        values = self._values
+        for index, length in enumerate(self._lengths):
+            if length != _EMPTY:
+                offset = start + offsets[index]
+                yield str(blob[offset:offset + length], 'utf-8'), values[index]
+
+    def keys(self):
+        """
+        Generate the keys in the table one at a time, in the same order as
+        items() and values().
+
+        :return: a generator of keys
+        """
+        blob = self._mmap
+        start = self._blob_start
+        offsets = self._offsets
+        for index, length in enumerate(self._lengths):
+            if length != _EMPTY:
+                offset = start + offsets[index]
+                yield str(blob[offset:offset + length], 'utf-8')
+
+    def values(self):
+        """
+        Generate the values in the table one at a time, in the same order as
+        items() and keys().
+
+        :return: a generator of values
+        """
+        values = self._values
+        for index, length in enumerate(self._lengths):
+            if length != _EMPTY:
+                yield values[index]
+
+    def __iter__(self):
+        return self.keys()
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        return self.contains_key(key)
+
+    def get_tuples(self):
+        """
+        Return a list of tuples consisting of all key-value pairs in the table.
+
+        :return: a list of (key, value) tuples
+        """
+        return list(self.items())
+
+    def table_load(self):
+        """
+        Return the load factor of the table.
+
+        :return: the ratio of the number of keys to the number of slots
+        """
+        return self.size / self.capacity
@@ -0,0 +1,251 @@
+# Date: October 18, 2026
+
+# hash_diagnostics.py
+# ===================================================
+# Measure how evenly a hash map spreads its keys. The
+# report covers the chain length histogram, the longest
+# chain, the average number of probes per successful
+# and unsuccessful lookup, and a chi-square uniformity
+# score. Run this file to compare every registered hash
+# function over a corpus, e.g.
+#     python hash_diagnostics.py alice.txt -c 2500
+# ===================================================
+
+import argparse
+from hash_map import HASH_FUNCTIONS
+from hash_map import HashMap
+from open_hash_map import OpenHashMap
+from open_hash_map import _TOMBSTONE
+from word_count import rgx
+
+
+def _chained_lengths(table):
+    """
+    Return the length of every chain in a HashMap.
+
+    :param table: a HashMap
+    :return: a list with the number of nodes in each bucket
+    """
+    lengths = []
+    for bucket in table._buckets:
+        length = 0
+        if bucket is not None:
+            cur = bucket.head
+            while cur is not None:
+                length += 1
+                cur = cur.next
+        lengths.append(length)
+    return lengths
+
+
+def _analyze_chained(table):
+    """
+    Count the probes needed to look up keys in a HashMap. A probe is one node
+    comparison.
+
+    :param table: a HashMap
+    :return: a tuple (home_counts, hit_probes, miss_probes), where home_counts
+    is the number of keys hashed to each bucket, hit_probes is the total probes
+    to find every key once, and miss_probes is the total probes for one failed
+    lookup starting in each bucket
+    """
+    lengths = _chained_lengths(table)
+
+    # Finding the i-th node of a chain takes i probes, and a failed lookup
+    # compares against the whole chain
+    hit_probes = sum(length * (length + 1) // 2 for length in lengths)
+    miss_probes = sum(lengths)
+    return lengths, hit_probes, miss_probes
+
+
+def _analyze_open(table):
+    """
+    Count the probes needed to look up keys in an OpenHashMap. A probe is one
+    slot visited.
+
+    :param table: an OpenHashMap
+    :return: a tuple (home_counts, hit_probes, miss_probes) as described in
+    _analyze_chained()
+    """
+    capacity = table.capacity
+    home_counts = [0] * capacity
+    hit_probes = 0
+
+    # A key is found after visiting every slot from its home slot to its own
+    for index in range(capacity):
+        key = table._keys[index]
+        if key is None or key is _TOMBSTONE:
+            continue
+        home = table._hashes[index] % capacity
+        home_counts[home] += 1
+        hit_probes += (index - home) % capacity + 1
+
+    # A failed lookup visits every slot up to and including the next never
+    # used slot. Walk the table backwards so each slot's count builds on the
+    # count of the slot after it.
+    miss_probes = 0
+    if None in table._keys:
+        # Start just after a never used slot, so the walk wraps correctly
+        start = table._keys.index(None)
+        probes = 1
+        for step in range(capacity):
+            index = (start - step) % capacity
+            if table._keys[index] is None:
+                probes = 1
+            else:
+                probes += 1
+            miss_probes += probes
+    else:
+        # A table without never used slots makes every failed lookup visit
+        # every slot
+        miss_probes = capacity * capacity
+
+    return home_counts, hit_probes, miss_probes
+
+
+def analyze(table):
+    """
+    Measure how evenly a hash map spreads its keys.
+
+    The chi-square score compares the number of keys hashed to each bucket (or
+    home slot) with the even spread size / capacity. Dividing it by the degrees
+    of freedom (capacity - 1) gives about 1.0 for a hash function that behaves
+    like a random one; larger values mean the keys are clumping.
+
+    :param table: a HashMap or an OpenHashMap
+    :return: a dictionary with the keys capacity, size, load, empty_buckets,
+    chain_histogram (a dictionary from chain length to number of buckets),
+    max_chain, avg_probes_hit, avg_probes_miss, chi_square and
+    chi_square_per_df
+    """
+    if isinstance(table, OpenHashMap):
+        home_counts, hit_probes, miss_probes = _analyze_open(table)
+    else:
+        home_counts, hit_probes, miss_probes = _analyze_chained(table)
+
+    capacity = table.capacity
+    size = table.size
+
+    # Count how many buckets have each chain length
+    histogram = {}
+    for count in home_counts:
+        histogram[count] = histogram.get(count, 0) + 1
+
+    # Compare the spread of keys with an even spread
+    chi_square = 0.0
+    if capacity > 0 and size > 0:
+        expected = size / capacity
+        for count in home_counts:
+            chi_square += (count - expected) ** 2 / expected
+
+    return {
+        "capacity": capacity,
+        "size": size,
+        "load": size / capacity if capacity else 0.0,
+        "empty_buckets": table.empty_buckets(),
+        "chain_histogram": dict(sorted(histogram.items())),
+        "max_chain": max(home_counts) if home_counts else 0,
+        "avg_probes_hit": hit_probes / size if size else 0.0,
+        "avg_probes_miss": miss_probes / capacity if capacity else 0.0,
+        "chi_square": chi_square,
+        "chi_square_per_df": chi_square / (capacity - 1) if capacity > 1
+        else 0.0,
+    }
+
+
+def read_vocabulary(source):
+    """
+    Read the distinct lowercase words of a text file.
+
+    :param source: the file name containing the text
+    :return: a list of the distinct words, in order of first appearance
+    """
+    seen = {}
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            for w in rgx.findall(line):
+                seen[w.lower()] = None
+    return list(seen)
+
+
+def compare_hash_functions(keys, capacity, engine="chained", names=None):
+    """
+    Insert the same keys into one table per hash function and analyze each
+    table. The tables do not resize, so they all keep the given capacity.
+    Open addressing tables get at least two slots per key.
+
+    :param keys: the keys to insert
+    :param capacity: the number of buckets (or slots) in each table
+    :param engine: "chained" for HashMap or "open" for OpenHashMap
+    :param names: the names of the hash functions to compare, or None for
+    every function in HASH_FUNCTIONS
+    :return: a list of (name, report) tuples, where each report is the result
+    of analyze()
+    """
+    if names is None:
+        names = list(HASH_FUNCTIONS)
+
+    results = []
+    for name in names:
+        if engine == "open":
+            # Open addressing needs a slot for every key, and long probe
+            # sequences drown out the hash function, so keep the load at
+            # 0.5 or below
+            table = OpenHashMap(max(capacity, 2 * len(keys)), name,
+                                max_load_factor=None)
+        else:
+            table = HashMap(capacity, name)
+        for key in keys:
+            table.put(key, 1)
+        results.append((name, analyze(table)))
+    return results
+
+
+def format_report(results):
+    """
+    Format the results of compare_hash_functions() as a table.
+
+    :param results: a list of (name, report) tuples
+    :return: the table as a string
+    """
+    lines = ["function          max chain  probes/hit  probes/miss  "
+             "empty  chi2/df"]
+    for name, report in results:
+        lines.append("%-16s  %9d  %10.3f  %11.3f  %5d  %7.3f" % (
+            name, report["max_chain"], report["avg_probes_hit"],
+            report["avg_probes_miss"], report["empty_buckets"],
+            report["chi_square_per_df"]))
+
+    # Show the chain length histogram of each function below the table
+    for name, report in results:
+        histogram = ", ".join("%d: %d" % item
+                              for item in report["chain_histogram"].items())
+        lines.append(name + " chain lengths {" + histogram + "}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Compare every registered hash function over the vocabulary of a corpus and
+    print the report.
+
+    :param argv: the command line arguments, or None to use sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        description="Compare hash functions over the words of a text file.")
+    parser.add_argument("source", help="the text file to read words from")
+    parser.add_argument("-c", "--capacity", type=int, default=2500,
+                        help="the number of buckets in each table")
+    parser.add_argument("-e", "--engine", choices=["chained", "open"],
+                        default="chained", help="the hash map engine")
+    args = parser.parse_args(argv)
+
+    keys = read_vocabulary(args.source)
+    print("%d distinct words, capacity %d, %s engine"
+          % (len(keys), args.capacity, args.engine))
+    print(format_report(compare_hash_functions(keys, args.capacity,
+                                               args.engine)))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,57 +3,104 @@
 # Description: This file contains an implementation of a hash map. This hash map
 # uses a hash table of buckets, where each bucket contains a linked list of
 # hash links. Each hash link stores a key-value pair and a pointer to the next
-# link in the list.
+# link in the list. Empty buckets are stored as None, and a bucket's linked list
+# is only created when the first link is added to it.
 
 # hash_map.py
 # ===================================================
 # Implement a hash map with chaining
 # ===================================================
 
+import contextlib
+import gc
+import math
+import operator
+import struct
+import zlib
+from collections import Counter
+
+# NumPy is optional. When it is installed, FNV-1a hashes a batch of keys with
+# vectorized array operations instead of one key at a time. Importing NumPy
+# takes longer than importing everything else, so it is imported by
+# _import_numpy() the first time a batch is hashed, and is _NOT_IMPORTED until
+# then.
+_NOT_IMPORTED = object()
+numpy = _NOT_IMPORTED
+
+
+def _import_numpy():
+    """
+    Import NumPy, if it is installed, the first time it is needed.
+
+    :return: the numpy module, or None if NumPy is not installed
+    """
+    global numpy
+    if numpy is _NOT_IMPORTED:
+        try:
+            import numpy as module
+        except ImportError:
+            module = None
+        numpy = module
+    return numpy
+
 
 class SLNode:
-    def __init__(self, key, value):
+    # Nodes are created once per key, so leave out the per-instance __dict__
+    __slots__ = ('next', 'key', 'value', 'hash')
+
+    def __init__(self, key, value, hash_value):
         self.next = None
         self.key = key
         self.value = value
+        self.hash = hash_value  # Full hash of the key, kept to avoid rehashing
 
     def __str__(self):
         return '(' + str(self.key) + ', ' + str(self.value) + ')'
 
 
 class LinkedList:
+    __slots__ = ('head', 'size')
+
     def __init__(self):
         self.head = None
         self.size = 0
 
-    def add_front(self, key, value):
+    def add_front(self, key, value, hash_value):
         """
         Create a new node and insert it at the front of the linked list.
 
         :param key: the key for the new node
         :param value: the value for the new node
+        :param hash_value: the full hash of the key, stored in the node so that
+        the table can find it again and move it when resizing
         """
-        new_node = SLNode(key, value)
+        new_node = SLNode(key, value, hash_value)
         new_node.next = self.head
         self.head = new_node
         self.size = self.size + 1
 
-    def remove(self, key):
+    def remove(self, key, hash_value=None):
         """
         Remove a node from the linked list.
 
         :param key: the key of the node that is to be removed
+        :param hash_value: the full hash of the key, or None to compare the
+        keys only
         """
         if self.head is None:
             return False
-        if self.head.key == key:
+
+        # Compare hashes before comparing the keys themselves
+        if ((hash_value is None or self.head.hash == hash_value)
+                and self.head.key == key):
             self.head = self.head.next
             self.size = self.size - 1
             return True
         cur = self.head.next
         prev = self.head
         while cur is not None:
-            if cur.key == key:
+            if ((hash_value is None or cur.hash == hash_value)
+                    and cur.key == key):
                 prev.next = cur.next
                 self.size = self.size - 1
                 return True
@@ -61,32 +108,41 @@ class LinkedList:
             cur = cur.next
         return False
 
-    def contains(self, key):
+    def contains(self, key, hash_value=None):
         """
         Search the linked list for a node with the given key.
 
         :param key: the key of the target node
+        :param hash_value: the full hash of the key, or None to compare the
+        keys only
         :return: the node with the matching key, otherwise None
         """
-        if self.head is not None:
-            cur = self.head
+        cur = self.head
+        if hash_value is None:
             while cur is not None:
                 if cur.key == key:
                     return cur
                 cur = cur.next
+            return None
+
+        # Compare hashes before comparing the keys themselves, so that keys in
+        # the same bucket but with other hashes are skipped without comparing
+        # their strings
+        while cur is not None:
+            if cur.hash == hash_value and cur.key == key:
+                return cur
+            cur = cur.next
         return None
 
     def __str__(self):
-        out = '['
-        if self.head != None:
-            cur = self.head
-            out = out + str(self.head)
+        # Collect the nodes and join them once, since adding to a string in a
+        # loop copies everything built so far
+        nodes = []
+        cur = self.head
+        while cur is not None:
+            nodes.append(str(cur))
             cur = cur.next
-            while cur != None:
-                out = out + ' -> ' + str(cur)
-                cur = cur.next
-        out = out + ']'
-        return out
+        return '[' + ' -> '.join(nodes) + ']'
 
 
 def hash_function_1(key):
@@ -105,20 +161,372 @@ def hash_function_2(key):
     return hash
 
 
-class HashMap:
+# FNV-1a constants for 64-bit hashes
+FNV_OFFSET_BASIS = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+def fnv1a_hash(key, seed=0):
+    """
+    Hash the UTF-8 bytes of a key with 64-bit FNV-1a. Unlike hash_function_1
+    and hash_function_2, every byte changes the whole hash, so anagrams and
+    short keys spread over the full 64-bit range.
+
+    :param key: the key as a string
+    :param seed: a seed mixed into the starting value of the hash
+    :return: the hash of the key as an integer in [0, 2 ** 64)
+    """
+    hash = FNV_OFFSET_BASIS ^ (seed & _MASK_64)
+    for byte in key.encode('utf-8'):
+        hash = ((hash ^ byte) * FNV_PRIME) & _MASK_64
+    return hash
+
+
+def fnv1a_hash_batch(keys, seed=0):
+    """
+    Hash a list of keys with fnv1a_hash(). If NumPy is installed, all keys are
+    hashed together one byte column at a time.
+
+    :param keys: a list of keys as strings
+    :param seed: a seed mixed into the starting value of each hash
+    :return: a list of the hashes of the keys, in the same order
+    """
+    if not keys or _import_numpy() is None:
+        return [fnv1a_hash(key, seed) for key in keys]
+
+    # Lay the encoded keys out as the rows of a zero-padded byte matrix
+    encoded = [key.encode('utf-8') for key in keys]
+    lengths = numpy.fromiter(map(len, encoded), dtype=numpy.int64,
+                             count=len(encoded))
+    width = int(lengths.max())
+    in_key = numpy.arange(width) < lengths[:, None]  # False for padding
+    matrix = numpy.zeros((len(encoded), width), dtype=numpy.uint8)
+    matrix[in_key] = numpy.frombuffer(b''.join(encoded), dtype=numpy.uint8)
+
+    # Apply one FNV-1a step per column, leaving finished keys unchanged.
+    # uint64 multiplication wraps around, which does the masking for us.
+    hashes = numpy.full(len(encoded), FNV_OFFSET_BASIS ^ (seed & _MASK_64),
+                        dtype=numpy.uint64)
+    prime = numpy.uint64(FNV_PRIME)
+    for column in range(width):
+        stepped = (hashes ^ matrix[:, column]) * prime
+        hashes = numpy.where(in_key[:, column], stepped, hashes)
+    return hashes.tolist()
+
+
+def crc32_hash(key, seed=0):
+    """
+    Hash the UTF-8 bytes of a key with CRC-32. This runs in C through zlib, so
+    it is the fastest of the hash functions here while still spreading keys
+    evenly.
+
+    :param key: the key as a string
+    :param seed: the starting value of the CRC
+    :return: the hash of the key as an integer in [0, 2 ** 32)
+    """
+    return zlib.crc32(key.encode('utf-8'), seed)
+
+
+def crc32_hash_batch(keys, seed=0):
+    """
+    Hash a list of keys with crc32_hash().
+
+    :param keys: a list of keys as strings
+    :param seed: the starting value of each CRC
+    :return: a list of the hashes of the keys, in the same order
+    """
+    if seed == 0:
+        return list(map(zlib.crc32, map(str.encode, keys)))
+    return [zlib.crc32(key.encode('utf-8'), seed) for key in keys]
+
+
+# Hash functions that can be selected by name, each paired with a function
+# that hashes a whole list of keys at once (or None)
+HASH_FUNCTIONS = {
+    "hash_function_1": (hash_function_1, None),
+    "hash_function_2": (hash_function_2, None),
+    "fnv1a": (fnv1a_hash, fnv1a_hash_batch),
+    "crc32": (crc32_hash, crc32_hash_batch),
+}
+
+
+def register_hash_function(name, function, batch_function=None):
+    """
+    Make a hash function selectable by name, e.g. a seeded variant of one of
+    the functions above.
+
+    :param name: the name to register the function under
+    :param function: a function that takes a key and returns an integer
+    :param batch_function: an optional function that takes a list of keys and
+    returns a list of their hashes
+    """
+    HASH_FUNCTIONS[name] = (function, batch_function)
+
+
+def _lookup_hash_function(function):
+    """
+    Find the single-key and batch versions of a hash function.
+
+    :param function: the name of a registered hash function, or a function
+    :return: a tuple (function, batch_function), where batch_function is None
+    if the function has no registered batch version
+    """
+    if isinstance(function, str):
+        if function not in HASH_FUNCTIONS:
+            raise ValueError("unknown hash function: " + repr(function))
+        return HASH_FUNCTIONS[function]
+
+    # A function passed directly may still have a registered batch version
+    for registered, batch_function in HASH_FUNCTIONS.values():
+        if registered is function:
+            return function, batch_function
+    return function, None
+
+
+def get_hash_function(function):
+    """
+    Look up a hash function by name. Functions are returned as they are, so
+    callers can accept either a name or a function.
+
+    :param function: the name of a registered hash function, or a function
+    :return: the hash function
+    """
+    return _lookup_hash_function(function)[0]
+
+
+def hash_batch(function, keys):
+    """
+    Hash a list of keys, using the batch version of the hash function when one
+    is registered.
+
+    :param function: the name of a registered hash function, or a function
+    :param keys: a list of keys as strings
+    :return: a list of the hashes of the keys, in the same order
+    """
+    function, batch_function = _lookup_hash_function(function)
+    if batch_function is not None:
+        return batch_function(keys)
+    return [function(key) for key in keys]
+
+
+# Binary snapshots written by HashMap.dump() start with this header: the magic
+# bytes, the format version, and the maximum and minimum load factors (NaN for
+# None). The capacity, the starting capacity, the size and the name of the
+# hash function follow as varints, then every key and its value, bucket by
+# bucket.
+SNAPSHOT_MAGIC = b"HMAP"
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<4sBdd")
+
+
+def _hash_function_name(function):
+    """
+    Find the name a hash function is registered under.
+
+    :param function: a hash function
+    :return: the name of the function in HASH_FUNCTIONS, or None if it is not
+    registered
+    """
+    for name, (registered, batch_function) in HASH_FUNCTIONS.items():
+        if registered is function:
+            return name
+    return None
+
+
+def _write_varint(out, number):
+    """
+    Append a non-negative integer to a bytearray as a varint: 7 bits per byte,
+    lowest bits first, with the high bit set on every byte but the last.
+
+    :param out: the bytearray to append to
+    :param number: the integer to write
+    """
+    while number >= 0x80:
+        out.append((number & 0x7f) | 0x80)
+        number >>= 7
+    out.append(number)
+
+
+def _read_varint(data, pos):
+    """
+    Read a varint written by _write_varint().
+
+    :param data: a bytes-like object
+    :param pos: the index of the first byte of the varint
+    :return: a tuple (number, pos), where pos is the index just after the
+    varint
+    """
+    byte = data[pos]
+    pos += 1
+    # Most counts and key lengths fit in one byte
+    if byte < 0x80:
+        return byte, pos
+    number = byte & 0x7f
+    shift = 7
+    while True:
+        byte = data[pos]
+        pos += 1
+        number |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return number, pos
+        shift += 7
+
+
+def _zigzag(number):
+    """
+    Map a signed integer to a non-negative one, so that small negative counts
+    also make short varints: 0, -1, 1, -2, ... become 0, 1, 2, 3, ... The
+    mapping is undone with (number >> 1) ^ -(number & 1).
+
+    :param number: an integer
+    :return: a non-negative integer
+    """
+    return number * 2 if number >= 0 else -number * 2 - 1
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    """
+    Pause the cyclic garbage collector for the length of a `with` block, and
+    restore it afterwards if it was running. Building or relinking many nodes
+    at once makes no reference cycles, yet would set off the collector many
+    times over, each time rescanning the new objects.
+
+    :return: a context manager
+    """
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if collecting:
+            gc.enable()
+
+
+class _HashMapBase:
+    """
+    Hold the methods that HashMap and OpenHashMap share, which only rely on
+    the methods each engine implements itself: keys(), values(),
+    contains_key() and _update_many().
+    """
+    def __iter__(self):
+        return self.keys()
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        return self.contains_key(key)
+
+    def put_many(self, pairs):
+        """
+        Put a batch of key-value pairs in the table. This gives the same
+        result as calling put() for each pair in order, but each distinct key
+        is looked up only once and the table grows at most once.
+
+        :param pairs: an iterable of (key, value) tuples. If a key appears more
+        than once, its last value is kept.
+        """
+        self._update_many(dict(pairs), None)
+
+    def increment_many(self, keys, delta=1):
+        """
+        Add `delta` to the value of each key in a batch, inserting missing
+        keys. This gives the same result as calling increment() for each key
+        in order, but the repeats of a key within the batch are added up first,
+        so each distinct key is looked up only once, and the table grows at
+        most once.
+
+        :param keys: an iterable of keys, which may repeat
+        :param delta: the amount to add for each appearance of a key
+        """
+        counts = Counter(keys)
+        if delta != 1:
+            for key in counts:
+                counts[key] *= delta
+        self._update_many(counts, operator.add)
+
+    def merge(self, other, combine=operator.add):
+        """
+        Add every key-value pair of another hash map to this one. For keys
+        found in both, the value becomes `combine(this_value, other_value)`.
+        The pairs are added as one batch, like put_many().
+
+        :param other: the hash map (or any object with an items() method) to
+        merge into this one
+        :param combine: a function that takes the two values of a key found in
+        both tables and returns the merged value
+        """
+        self._update_many(dict(other.items()), combine)
+
+    def __getstate__(self):
+        """
+        Describe the table for pickle as its settings, a flat list of its keys
+        and a flat list of their values, rather than as its nodes or slot
+        arrays. This keeps tables sent between processes compact, and does not
+        depend on how the entries are laid out.
+
+        :return: a dictionary describing the table
+        """
+        return {
+            "capacity": self.capacity,
+            "function": self._hash_function,
+            "max_load_factor": self.max_load_factor,
+            "min_load_factor": self.min_load_factor,
+            "min_capacity": self._min_capacity,
+            "keys": list(self.keys()),
+            "values": list(self.values()),
+        }
+
+    def __setstate__(self, state):
+        """
+        Rebuild a table from the description made by __getstate__().
+
+        :param state: a dictionary describing the table
+        """
+        self.__init__(state["capacity"], state["function"],
+                      state["max_load_factor"], state["min_load_factor"])
+        self._min_capacity = state["min_capacity"]
+        self.put_many(zip(state["keys"], state["values"]))
+
+
+class HashMap(_HashMapBase):
     """
     Create a new hash map with the specified number of buckets.
 
+    When load factor thresholds are given, the table resizes itself: it doubles
+    its capacity when the load factor rises above `max_load_factor`, and halves
+    it (but never below the starting capacity) when the load factor falls below
+    `min_load_factor`.
+
     :param capacity: the total number of buckets to be created in the hash table
-    :param function: the hash function to use for hashing values
+    :param function: the hash function to use for hashing values, or the name
+    of a function in HASH_FUNCTIONS
+    :param max_load_factor: the load factor above which the table grows, or
+    None to never grow automatically
+    :param min_load_factor: the load factor below which the table shrinks, or
+    None to never shrink automatically
     """
-    def __init__(self, capacity, function):
-        self._buckets = []
-        for i in range(capacity):
-            self._buckets.append(LinkedList())
+    def __init__(self, capacity, function, max_load_factor=None,
+                 min_load_factor=None):
+        if max_load_factor is not None and max_load_factor <= 0:
+            raise ValueError("max_load_factor must be positive")
+
+        # Shrinking must leave the table below the growth threshold, otherwise
+        # a table could grow and shrink back and forth on every put/remove
+        if (min_load_factor is not None and max_load_factor is not None
+                and min_load_factor * 2 >= max_load_factor):
+            raise ValueError("min_load_factor must be less than half of "
+                             "max_load_factor")
+
+        self._buckets = [None] * capacity  # None marks an empty bucket
         self.capacity = capacity
-        self._hash_function = function
+        self._hash_function = get_hash_function(function)
         self.size = 0
+        self.max_load_factor = max_load_factor
+        self.min_load_factor = min_load_factor
+        self._min_capacity = capacity  # Automatic shrinking stops here
 
     def generate_hash_index(self, key):
         """
@@ -138,26 +546,96 @@ class HashMap:
         index = hash_key % self.capacity  # Between 0 and [# of buckets - 1]
         return index
 
-    def get_tuples(self):
+    def _find_bucket(self, key, hash_value=None):
         """
-        Helper method for top_words() that returns a list of tuples consisting
-        of all key-value pairs in the table.
+        Return the bucket that the given key hashes to, along with the hash.
 
-        :return tuple_list: a list of tuples for each key-value pair in the table
+        :param key: the key (string) to look for
+        :param hash_value: the hash of the key under the table's hash
+        function, if the caller already has it, or None to hash the key
+        :return: a tuple (bucket, hash_value), where bucket is the LinkedList
+        for the key, or None if the bucket is empty or the table has no buckets
         """
-        tuple_list = []  # Will store key-value pairs as tuples
+        # A table with no buckets has nowhere to look
+        if self.capacity == 0:
+            return None, hash_value
 
+        if hash_value is None:
+            hash_value = self._hash_function(key)
+        return self._buckets[hash_value % self.capacity], hash_value
+
+    def _find_or_create_bucket(self, key, hash_value=None):
+        """
+        Return the bucket that the given key hashes to, creating its linked
+        list if the bucket is empty. The table must have at least one bucket.
+
+        :param key: the key (string) to look for
+        :param hash_value: the hash of the key under the table's hash
+        function, if the caller already has it, or None to hash the key
+        :return: a tuple (bucket, hash_value), where bucket is the LinkedList
+        for the key
+        """
+        if hash_value is None:
+            hash_value = self._hash_function(key)
+        index = hash_value % self.capacity
+        bucket = self._buckets[index]
+        if bucket is None:
+            bucket = LinkedList()
+            self._buckets[index] = bucket
+        return bucket, hash_value
+
+    def items(self):
+        """
+        Generate the key-value pairs in the table one at a time, without
+        building a list of all of them first.
+
+        :return: a generator of (key, value) tuples
+        """
         # Iterate over each bucket in the table
         for bucket in self._buckets:
             # If the bucket is not empty, iterate over its nodes
-            if bucket.head is not None:
+            if bucket is not None:
                 cur = bucket.head  # Keep track of the current node
                 while cur is not None:
-                    # Add the key-value pair to tuple_list as a tuple
-                    tuple_list.append((cur.key, cur.value))
+                    yield cur.key, cur.value
                     cur = cur.next  # Go to the next node in the bucket
 
-        return tuple_list
+    def keys(self):
+        """
+        Generate the keys in the table one at a time, in the same order as
+        items() and values() as long as the table is not changed in between.
+
+        :return: a generator of keys
+        """
+        for bucket in self._buckets:
+            if bucket is not None:
+                cur = bucket.head
+                while cur is not None:
+                    yield cur.key
+                    cur = cur.next
+
+    def values(self):
+        """
+        Generate the values in the table one at a time, in the same order as
+        items() and keys() as long as the table is not changed in between.
+
+        :return: a generator of values
+        """
+        for bucket in self._buckets:
+            if bucket is not None:
+                cur = bucket.head
+                while cur is not None:
+                    yield cur.value
+                    cur = cur.next
+
+    def get_tuples(self):
+        """
+        Helper method for top_words() that returns a list of tuples consisting
+        of all key-value pairs in the table.
+
+        :return tuple_list: a list of tuples for each key-value pair in the table
+        """
+        return list(self.items())
 
     def clear(self):
         """
@@ -169,71 +647,97 @@ class HashMap:
         if self.capacity == 0:
             return
 
-        # Clear the buckets
-        self._buckets = []
-
-        # Add empty buckets to match the capacity
-        for i in range(self.capacity):
-            self._buckets.append(LinkedList())
+        # Replace the buckets with empty ones to match the capacity
+        self._buckets = [None] * self.capacity
 
         # Set the size of the table to 0 since all nodes have been removed
         self.size = 0
 
-    def get(self, key):
+    def get(self, key, hash_value=None):
         """
         Return the value associated with the given key.
 
         :param key: the key (string) to look for
+        :param hash_value: the hash of the key under the table's hash
+        function, if the caller already has it, or None to hash the key
         :return: the value associated with the key. If the key is not in the
         hash map, return None.
         """
-        # If the key is not in the hash map, return None
-        if not self.contains_key(key):
+        # Hash the key once and only search the bucket that could hold it
+        bucket, hash_value = self._find_bucket(key, hash_value)
+        if bucket is None:
             return None
 
-        # If the key is in the hash map, get its associated value
-        hash_index = self.generate_hash_index(key)  # Get the hash index
-        bucket = self._buckets[hash_index]  # Find the right bucket
-        target_node = bucket.contains(key)
+        target_node = bucket.contains(key, hash_value)  # Either a node or None
+        if target_node is None:
+            return None
         return target_node.value
 
     def resize_table(self, capacity):
         """
         Resize the hash table to have a number of buckets equal to the given
-        capacity. All existing key/value pairs remain in the new table and all
-        table links are rehashed in the resizing process.
+        capacity. All existing key/value pairs remain in the new table. The
+        existing links are moved into their new buckets rather than copied, and
+        each link's stored hash picks its new bucket, so no key is hashed
+        again.
 
         :param capacity: the new number of buckets that the table will have
         """
-        # Create a new hash table with the updated capacity but the same
-        # hash function
-        new_table = HashMap(capacity, self._hash_function)
+        # If the new table has no buckets, there is nowhere to keep the nodes
+        if capacity == 0:
+            self._buckets = []
+            self.capacity = 0
+            self.size = 0
+            return
 
-        # Iterate over each bucket in the original table, and for each node, put
-        # its rehashed form as a node in the new table
-        for bucket in self._buckets:
-            # If the bucket is not empty, iterate over its nodes
-            if bucket.head is not None:
+        # Create the new, empty buckets
+        new_buckets = [None] * capacity
+
+        # Relinking every node makes no cycles, so pause the garbage collector
+        with _gc_paused():
+            # Iterate over each bucket in the original table, and relink each
+            # of its nodes to the front of the bucket its stored hash picks.
+            # The nodes themselves are reused, so no new nodes are allocated.
+            for bucket in self._buckets:
+                if bucket is None:
+                    continue
                 cur = bucket.head  # Keep track of the current node
                 while cur is not None:
-                    # Rehash the original key and put the node in the new table
-                    new_table.put(cur.key, cur.value)
-                    cur = cur.next  # Go to the next node in the bucket
-
-        # Reset the original table as if it were newly made
-        self._buckets = []
-        self.capacity = 0
-        self.size = 0
+                    next_node = cur.next  # Save the rest of the old chain
+                    index = cur.hash % capacity
+                    new_bucket = new_buckets[index]
+                    if new_bucket is None:
+                        new_bucket = LinkedList()
+                        new_buckets[index] = new_bucket
+                    cur.next = new_bucket.head
+                    new_bucket.head = cur
+                    new_bucket.size += 1
+                    cur = next_node  # Go to the next node in the old bucket
+
+        # Swap in the new buckets. The size of the table does not change.
+        self._buckets = new_buckets
+        self.capacity = capacity
 
-        # Copy each bucket from the new table to the original table
-        for bucket in new_table._buckets:
-            self._buckets.append(bucket)
+    def _grow_if_needed(self):
+        """
+        Double the capacity of the table if its load factor is above the
+        maximum load factor.
+        """
+        if (self.max_load_factor is not None
+                and self.size > self.max_load_factor * self.capacity):
+            self.resize_table(self.capacity * 2)
 
-        # Update the size and capacity of the original table
-        self.capacity = capacity
-        self.size = new_table.size
+    def _shrink_if_needed(self):
+        """
+        Halve the capacity of the table if its load factor is below the minimum
+        load factor, without going below the capacity the table started with.
+        """
+        if (self.min_load_factor is not None
+                and self.capacity > self._min_capacity
+                and self.size < self.min_load_factor * self.capacity):
+            self.resize_table(max(self.capacity // 2, self._min_capacity))
 
-    def put(self, key, value):
+    def put(self, key, value, hash_value=None):
         """
         Update the given key-value pair in the hash table. If a node with the
         given key already exists, this will just update the value and skip
@@ -242,30 +746,178 @@ class HashMap:
 
         :param key: the key associated with the entry
         :param value: the value associated with the entry
+        :param hash_value: the hash of the key under the table's hash
+        function, if the caller already has it, or None to hash the key
         """
         # If the table has a capacity of 0, return None
         if self.capacity == 0:
             return None
 
-        # If the key exists in the table, update the node that has the key
-        if self.contains_key(key):
-            hash_index = self.generate_hash_index(key)  # Get the hash index
-            bucket = self._buckets[hash_index]  # Find the right bucket
+        # Hash the key once and find the only bucket that could hold it
+        bucket, hash_value = self._find_or_create_bucket(key, hash_value)
 
-            # Find and update the node that contains the key
-            node_to_update = bucket.contains(key)  # Either a node or None
-            if node_to_update is not None:
-                node_to_update.value = value  # Update the node's value
+        # If the key exists in the bucket, update the node that has the key
+        node_to_update = bucket.contains(key, hash_value)
+        if node_to_update is not None:
+            node_to_update.value = value  # Update the node's value
 
         # If the key does not exist in the table, create a new node with the
-        # given key and value and add it to the right bucket
+        # given key and value and add it to the front of the bucket
         else:
-            hash_index = self.generate_hash_index(key)  # Get the hash index
-            bucket = self._buckets[hash_index]  # Find the right bucket
-
-            # Create a new node and add it to the front of the bucket
-            bucket.add_front(key, value)
+            bucket.add_front(key, value, hash_value)
             self.size += 1  # Increment the size of the table
+            self._grow_if_needed()
+
+    def increment(self, key, delta=1, hash_value=None):
+        """
+        Add `delta` to the value associated with the given key, inserting the
+        key with a value of `delta` if it is not in the table yet. The key is
+        hashed and its bucket searched only once.
+
+        :param key: the key whose value is to be incremented
+        :param delta: the amount to add to the value
+        :param hash_value: the hash of the key under the table's hash
+        function, if the caller already has it, or None to hash the key
+        :return: the new value associated with the key, or None if the table
+        has a capacity of 0
+        """
+        # If the table has a capacity of 0, return None
+        if self.capacity == 0:
+            return None
+
+        # Hash the key once and find the only bucket that could hold it
+        bucket, hash_value = self._find_or_create_bucket(key, hash_value)
+
+        # If the key exists in the bucket, add to its value in place
+        node = bucket.contains(key, hash_value)
+        if node is not None:
+            node.value = node.value + delta
+            return node.value
+
+        # Otherwise, create a new node that starts at `delta`
+        bucket.add_front(key, delta, hash_value)
+        self.size += 1  # Increment the size of the table
+        self._grow_if_needed()
+        return delta
+
+    def upsert(self, key, function, default=None):
+        """
+        Replace the value associated with the given key with `function(value)`.
+        If the key is not in the table yet, insert it with a value of
+        `function(default)`. The key is hashed and its bucket searched only
+        once.
+
+        :param key: the key whose value is to be updated
+        :param function: a function that takes the current value and returns
+        the new value
+        :param default: the value passed to `function` when the key is new
+        :return: the new value associated with the key, or None if the table
+        has a capacity of 0
+        """
+        # If the table has a capacity of 0, return None
+        if self.capacity == 0:
+            return None
+
+        # Hash the key once and find the only bucket that could hold it
+        bucket, hash_value = self._find_or_create_bucket(key)
+
+        # If the key exists in the bucket, update its value in place
+        node = bucket.contains(key, hash_value)
+        if node is not None:
+            node.value = function(node.value)
+            return node.value
+
+        # Otherwise, create a new node from the default value
+        value = function(default)
+        bucket.add_front(key, value, hash_value)
+        self.size += 1  # Increment the size of the table
+        self._grow_if_needed()
+        return value
+
+    def _reserve(self, count):
+        """
+        Grow the table once, if needed, so that `count` more keys fit without
+        the load factor rising above the maximum load factor.
+
+        :param count: the number of keys about to be added
+        """
+        if self.max_load_factor is None:
+            return
+        capacity = self.capacity
+        while self.size + count > self.max_load_factor * capacity:
+            capacity = capacity * 2
+        if capacity != self.capacity:
+            self.resize_table(capacity)
+
+    def _update_many(self, entries, combine, hashes=None):
+        """
+        Helper method for put_many(), increment_many() and merge() that adds a
+        batch of distinct keys to the table. The keys are hashed together, the
+        keys already in the table are updated, and the table is then grown at
+        most once to fit all the new keys before they are linked in.
+
+        :param entries: a dictionary mapping each key to its value
+        :param combine: a function that takes the current value of a key found
+        in the table and its value in `entries` and returns the new value, or
+        None to replace the current value
+        :param hashes: the hashes of the keys of `entries` in order, or None to
+        hash the keys here
+        """
+        # If the table has a capacity of 0, there is nowhere to put the keys
+        if self.capacity == 0 or not entries:
+            return
+
+        # A batch of new keys makes many nodes at once but no cycles
+        with _gc_paused():
+            self._link_many(entries, combine, hashes)
+
+    def _link_many(self, entries, combine, hashes=None):
+        """
+        Helper method for _update_many() that does the work while the garbage
+        collector is paused.
+
+        :param entries: a dictionary mapping each key to its value
+        :param combine: a function that combines a current value with the
+        value in `entries`, or None to replace the current value
+        :param hashes: the hashes of the keys of `entries` in order, or None to
+        hash the keys here
+        """
+        keys = list(entries)
+        if hashes is None:
+            hashes = hash_batch(self._hash_function, keys)
+
+        # Update the keys already in the table, and set the others aside
+        buckets = self._buckets
+        capacity = self.capacity
+        new_keys = []
+        for key, hash_value in zip(keys, hashes):
+            bucket = buckets[hash_value % capacity]
+            node = None
+            if bucket is not None:
+                node = bucket.contains(key, hash_value)
+            if node is None:
+                new_keys.append((key, hash_value))
+            elif combine is None:
+                node.value = entries[key]
+            else:
+                node.value = combine(node.value, entries[key])
+
+        if not new_keys:
+            return
+
+        # Grow once for the whole batch, then link in the new keys. They are
+        # known to be distinct and absent, so no bucket is searched again.
+        self._reserve(len(new_keys))
+        buckets = self._buckets
+        capacity = self.capacity
+        for key, hash_value in new_keys:
+            index = hash_value % capacity
+            bucket = buckets[index]
+            if bucket is None:
+                bucket = LinkedList()
+                buckets[index] = bucket
+            bucket.add_front(key, entries[key], hash_value)
+        self.size += len(new_keys)
 
     def remove(self, key):
         """
@@ -274,53 +926,41 @@ class HashMap:
 
         :param key: the key belonging to the node that is to be removed
         """
-        # If the given key is not in the table, simply return None
-        if not self.contains_key(key):
+        # If the table has a capacity of 0, there is nothing to remove
+        if self.capacity == 0:
             return
 
-        # If the given key is in the table, remove the node that holds the key
-        hash_index = self.generate_hash_index(key)  # Get the hash index
-        bucket = self._buckets[hash_index]  # Find the right bucket
-
-        # Remove the target node (adapted from LinkedList's remove method)
-        if bucket.head is None:  # If the bucket is empty, return None
-            return
-        # If the head of the bucket has the target key, remove the head node
-        if bucket.head.key == key:
-            bucket.head = bucket.head.next  # Remove the head node
-            bucket.size -= 1  # Decrement the bucket size
+        # Hash the key once and find the only bucket that could hold it
+        hash_value = self._hash_function(key)
+        index = hash_value % self.capacity
+        bucket = self._buckets[index]
+        if bucket is None:
             return
 
-        # If a non-head node has the target key, iterate over the nodes until
-        # the node to be removed is reached
-        cur = bucket.head.next  # Track the current node
-        prev = bucket.head  # Track the previous node
-        while cur is not None:
-            if cur.key == key:  # If the current node has the target key
-                prev.next = cur.next  # Remove the current node from the table
-                bucket.size -= 1  # Decrement the bucket size
-
-            # If the current node does not have the target key, move to the
-            # next node in the bucket
-            prev = cur
-            cur = cur.next
+        # Remove the target node from the bucket, if it is there
+        if bucket.remove(key, hash_value):
+            self.size -= 1  # Decrement the size of the table
 
-        self.size -= 1  # Decrement the size of the table
+            # Let go of the bucket's linked list once it has no nodes left
+            if bucket.head is None:
+                self._buckets[index] = None
+            self._shrink_if_needed()
 
-    def contains_key(self, key):
+    def contains_key(self, key, hash_value=None):
         """
         Search to see if a key exists within the hash table.
 
         :param key: the key (string) to look for
+        :param hash_value: the hash of the key under the table's hash
+        function, if the caller already has it, or None to hash the key
         :return: True if the key is found, and False otherwise
         """
-        # Iterate over each linked list in the hash table array
-        for linked_list in self._buckets:
-            # Check each node in the linked list for the key
-            if linked_list.contains(key) is not None:
-                return True
+        # Hash the key once and only search the bucket that could hold it
+        bucket, hash_value = self._find_bucket(key, hash_value)
+        if bucket is None:
+            return False
 
-        return False  # If none of the linked lists has the key, return False
+        return bucket.contains(key, hash_value) is not None
 
     def empty_buckets(self):
         """
@@ -339,8 +979,8 @@ class HashMap:
 
         # Iterate over each bucket
         for bucket in self._buckets:
-            # If the bucket's head is None, the bucket is empty
-            if bucket.head is None:
+            # If the bucket is None or its head is None, the bucket is empty
+            if bucket is None or bucket.head is None:
                 empty_bucket_count += 1
 
         return empty_bucket_count
@@ -355,13 +995,144 @@ class HashMap:
         """
         return self.size / self.capacity
 
+    def dump(self, path):
+        """
+        Save the table to a file in a compact binary format. Keys are written
+        as length-prefixed UTF-8 and values as zigzag varints, bucket by
+        bucket. The hashes of the keys are not saved, since load() hashes all
+        the keys in one batch faster than it could read the hashes back.
+
+        :param path: the file to write
+        """
+        name = _hash_function_name(self._hash_function)
+        if name is None:
+            raise ValueError("only tables using a hash function registered in "
+                             "HASH_FUNCTIONS can be dumped")
+
+        # Values are written as varints, so only integers can be saved
+        for value in self.values():
+            if not isinstance(value, int):
+                raise ValueError("only tables of integer values can be "
+                                 "dumped, not " + type(value).__name__)
+
+        out = bytearray(_SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+            math.nan if self.max_load_factor is None else self.max_load_factor,
+            math.nan if self.min_load_factor is None
+            else self.min_load_factor))
+        _write_varint(out, self.capacity)
+        _write_varint(out, self._min_capacity)
+        _write_varint(out, self.size)
+        name = name.encode('utf-8')
+        _write_varint(out, len(name))
+        out += name
+
+        # Write the nodes of each bucket in order
+        for key, value in self.items():
+            key = key.encode('utf-8')
+            _write_varint(out, len(key))
+            out += key
+            _write_varint(out, _zigzag(value))
+
+        with open(path, 'wb') as f:
+            f.write(out)
+
+    @classmethod
+    def load(cls, path, function=None):
+        """
+        Load a table saved by dump(). The whole table is built in memory; to
+        look counts up in a snapshot without building a table, or to share one
+        read-only between processes, use frozen_hash_map.FrozenHashMap.
+
+        :param path: the file to read
+        :param function: the hash function for the loaded table, or None to use
+        the one the table was saved with
+        :return: a HashMap
+        """
+        # Loading makes two objects per key but no cycles
+        with _gc_paused(), open(path, 'rb') as f:
+            return cls._load_snapshot(f.read(), function)
+
+    @classmethod
+    def _load_snapshot(cls, data, function):
+        """
+        Build a table from the contents of a file written by dump().
+
+        :param data: the contents of the file
+        :param function: the hash function for the table, or None to use the
+        saved one
+        :return: a HashMap
+        """
+        if len(data) < _SNAPSHOT_HEADER.size:
+            raise ValueError("not a HashMap snapshot")
+        magic, version, max_load_factor, min_load_factor = \
+            _SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("not a HashMap snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError("unsupported snapshot version: " + str(version))
+
+        pos = _SNAPSHOT_HEADER.size
+        capacity, pos = _read_varint(data, pos)
+        min_capacity, pos = _read_varint(data, pos)
+        size, pos = _read_varint(data, pos)
+        length, pos = _read_varint(data, pos)
+        name = str(data[pos:pos + length], 'utf-8')
+        pos += length
+
+        if function is None:
+            function = name
+        table = cls(capacity, function,
+                    None if math.isnan(max_load_factor) else max_load_factor,
+                    None if math.isnan(min_load_factor) else min_load_factor)
+        table._min_capacity = min_capacity
+
+        keys = []
+        values = []
+        for _ in range(size):
+            # Read one-byte varints inline, since nearly every key length and
+            # many counts fit in one byte
+            length = data[pos]
+            if length < 0x80:
+                pos += 1
+            else:
+                length, pos = _read_varint(data, pos)
+            keys.append(str(data[pos:pos + length], 'utf-8'))
+            pos += length
+            value = data[pos]
+            if value < 0x80:
+                pos += 1
+            else:
+                value, pos = _read_varint(data, pos)
+            values.append((value >> 1) ^ -(value & 1))  # Undo _zigzag()
+
+        # Hash the keys in one batch, then link them in from the last one
+        # saved, so that each chain ends up in the order it was saved in (as
+        # long as the hash function is the same)
+        hashes = hash_batch(table._hash_function, keys)
+        buckets = table._buckets
+        for i in range(size - 1, -1, -1):
+            hash_value = hashes[i]
+            index = hash_value % capacity
+            bucket = buckets[index]
+            if bucket is None:
+                bucket = LinkedList()
+                buckets[index] = bucket
+            bucket.add_front(keys[i], values[i], hash_value)
+        table.size = size
+        return table
+
     def __str__(self):
         """
         Print all the links in each of the buckets in the table.
         """
-        out = ""
-        index = 0
-        for bucket in self._buckets:
-            out = out + str(index) + ': ' + str(bucket) + '\n'
-            index = index + 1
-        return out
+        # Collect the lines and join them once, since adding to a string in a
+        # loop copies everything built so far
+        out = []
+        for index, bucket in enumerate(self._buckets):
+            # Print empty buckets the way an empty linked list prints
+            if bucket is None:
+                out.append(str(index) + ': []\n')
+            else:
+                out.append(str(index) + ': ' + str(bucket) + '\n')
+        return ''.join(out)
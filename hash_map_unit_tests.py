@@ -1,57 +1,66 @@
 # Author: Timothy Yoon
 # Date: August 27, 2020
 # Description: This test file contains unit tests that use various assert
-# functions to test the HashMap class from hash_map.py.
+# functions to test the HashMap class from hash_map.py and the OpenHashMap class
+# from open_hash_map.py.
 
+import os
+import pickle
+import random
+import tempfile
 import unittest
 from hash_map import SLNode
 from hash_map import LinkedList
 from hash_map import hash_function_1
 from hash_map import hash_function_2
 from hash_map import HashMap
-from test_student_hashmap import create_random_tuple
-from test_student_hashmap import get_keys_from_map
-from test_student_hashmap import check_lists_are_equals
+from hash_map import HASH_FUNCTIONS
+from hash_map import crc32_hash
+from hash_map import fnv1a_hash
+from hash_map import fnv1a_hash_batch
+from hash_map import get_hash_function
+from hash_map import hash_batch
+from hash_map import register_hash_function
+from open_hash_map import OpenHashMap
+from frozen_hash_map import FrozenHashMap
+from hash_diagnostics import analyze
+from hash_diagnostics import compare_hash_functions
+from instrumentation import InstrumentedHashMap
+from frequency_index import FrequencyIndex
+from frequency_index import IndexedHashMap
 
 
 class HashMapTester(unittest.TestCase):
     """
-    Contain unit tests for the HashMap class.
+    Contain unit tests for the HashMap class. Every test creates its tables
+    through `map_class`, so that subclasses can run the same tests against
+    other hash map engines.
     """
+    map_class = HashMap
+
     def test_generate_hash_index_1(self):
         """
         Test generate_hash_index.
         :passed: yes
         """
-        hash_m = HashMap(6, hash_function_1)
+        hash_m = self.map_class(6, hash_function_1)
         print(hash_m.generate_hash_index("dog"))
         self.assertEqual(2, hash_m.generate_hash_index("dog"))
 
     def test_contains_key_1(self):
         """
-        Test contains_key with a hash map of 2 buckets.
+        Test contains_key with a hash map of 4 buckets.
         :passed: yes
         """
-        # Create some linked lists
-
-        # First linked list
-        ll_1 = LinkedList()
-        ll_1.add_front("cat", 3)
-        ll_1.add_front("bin", 2)
-        ll_1.add_front("ape", 1)
-        # print("ll_1:", ll_1)
-
-        # Second linked list
-        ll_2 = LinkedList()
-        ll_2.add_front("fin", 3)
-        ll_2.add_front("ewe", 2)
-        ll_2.add_front("dim", 1)
-        # print("ll_2:", ll_2)
-
-        # Create hash map
-        hash_m = HashMap(4, hash_function_1)
-        hash_m._buckets[0] = ll_1
-        hash_m._buckets[1] = ll_2
+        # Create a hash map and put the keys where they hash to, since
+        # contains_key() only searches the bucket that a key hashes to
+        hash_m = self.map_class(4, hash_function_1)
+        hash_m.put("ape", 1)
+        hash_m.put("bin", 2)
+        hash_m.put("cat", 3)
+        hash_m.put("dim", 1)
+        hash_m.put("ewe", 2)
+        hash_m.put("fin", 3)
 
         print(hash_m)
         print(hash_m.contains_key("ape"))
@@ -77,16 +86,11 @@ class HashMapTester(unittest.TestCase):
         Test contains_key with a hash map of 1 bucket.
         :passed: yes
         """
-        # Make a linked list
-        ll_1 = LinkedList()
-        ll_1.add_front("cot", 3)
-        ll_1.add_front("box", 2)
-        ll_1.add_front("axe", 1)
-        # print("ll_1:", ll_1)
-
-        # Make a hash map
-        hash_m = HashMap(7, hash_function_2)
-        hash_m._buckets[6] = ll_1
+        # Make a hash map with all keys in the bucket they hash to
+        hash_m = self.map_class(1, hash_function_2)
+        hash_m.put("cot", 3)
+        hash_m.put("box", 2)
+        hash_m.put("axe", 1)
 
         # Make calls to contains_key
         self.assertTrue(hash_m.contains_key("axe"))
@@ -109,7 +113,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         # Make an empty hash map
-        hash_m = HashMap(3, hash_function_2)
+        hash_m = self.map_class(3, hash_function_2)
         print(hash_m)
 
         self.assertFalse(hash_m.contains_key("cat"))
@@ -121,7 +125,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         # Make an empty hash map
-        hash_m = HashMap(0, hash_function_2)
+        hash_m = self.map_class(0, hash_function_2)
         print("hash_m:", hash_m)
 
         self.assertFalse(hash_m.contains_key("blue"))
@@ -136,7 +140,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         print("--- EXAMPLE 1 ---")
-        m = HashMap(50, hash_function_1)
+        m = self.map_class(50, hash_function_1)
         print(m.contains_key('key1'))
         m.put('key1', 10)
         m.put('key2', 20)
@@ -154,7 +158,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         print("--- EXAMPLE 2 ---")
-        m = HashMap(75, hash_function_2)
+        m = self.map_class(75, hash_function_2)
         keys = [i for i in range(1, 1000, 20)]
         for key in keys:
             m.put(str(key), key * 42)
@@ -167,12 +171,48 @@ class HashMapTester(unittest.TestCase):
             result = result and not m.contains_key(str(key + 1))
         print(result)
 
+    def test_contains_key_7(self):
+        """
+        Test that contains_key only searches the bucket a key hashes to.
+        """
+        hash_m = self.map_class(4, hash_function_1)
+
+        # "ape" hashes to bucket 2, so a node placed in any other bucket is
+        # never found
+        misplaced = LinkedList()
+        misplaced.add_front("ape", 1, hash_function_1("ape"))
+        hash_m._buckets[0] = misplaced
+        self.assertFalse(hash_m.contains_key("ape"))
+
+        hash_m._buckets[2] = misplaced
+        self.assertTrue(hash_m.contains_key("ape"))
+
+    def test_remove_keeps_size_1(self):
+        """
+        Test that remove() keeps the size of the table in sync with its nodes.
+        """
+        hash_m = self.map_class(1, hash_function_1)
+        for key in ["key1", "key2", "key3"]:
+            hash_m.put(key, 10)
+
+        # Remove a head node, a middle node and a missing key
+        hash_m.remove("key3")
+        self.assertEqual(2, hash_m.size)
+        hash_m.remove("key1")
+        self.assertEqual(1, hash_m.size)
+        hash_m.remove("key4")
+        self.assertEqual(1, hash_m.size)
+
+        self.assertEqual(None, hash_m.get("key1"))
+        self.assertEqual(10, hash_m.get("key2"))
+        self.assertEqual(None, hash_m.get("key3"))
+
     def test_put_1(self):
         """
         Test put() on a hash map of capacity 0.
         :passed: yes
         """
-        hash_m = HashMap(0, hash_function_1)
+        hash_m = self.map_class(0, hash_function_1)
         print("map before put():", hash_m)
 
         hash_m.put("key1", 10)
@@ -185,7 +225,7 @@ class HashMapTester(unittest.TestCase):
         Test put() on a hash map of capacity 1.
         :passed: yes
         """
-        hash_m = HashMap(1, hash_function_1)
+        hash_m = self.map_class(1, hash_function_1)
         print("map before put():", hash_m)
 
         hash_m.put("key1", 10)
@@ -217,7 +257,7 @@ class HashMapTester(unittest.TestCase):
         Test put() on a hash map of capacity 6.
         :passed: yes
         """
-        hash_m = HashMap(6, hash_function_1)
+        hash_m = self.map_class(6, hash_function_1)
         print("map before put():")
         print(hash_m)
 
@@ -279,7 +319,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         print("--- EXAMPLE 1 ---")
-        m = HashMap(50, hash_function_1)
+        m = self.map_class(50, hash_function_1)
         for i in range(150):
             m.put('str' + str(i), i * 100)
             if i % 25 == 24:
@@ -291,7 +331,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         print("--- EXAMPLE 2 ---")
-        m = HashMap(40, hash_function_2)
+        m = self.map_class(40, hash_function_2)
         for i in range(50):
             m.put('str' + str(i // 3), i * 100)
             if i % 10 == 9:
@@ -303,13 +343,13 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         print("--- EXAMPLE 1 ---")
-        m = HashMap(30, hash_function_1)
+        m = self.map_class(30, hash_function_1)
         print(m.get('key'))
         m.put('key1', 10)
         print(m.get('key1'))
 
         print("--- EXAMPLE 2 ---")
-        m = HashMap(150, hash_function_2)
+        m = self.map_class(150, hash_function_2)
         for i in range(200, 300, 7):
             m.put(str(i), i * 10)
         print(m.size, m.capacity)
@@ -323,7 +363,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         print("--- EXAMPLE 1 ---")
-        m = HashMap(50, hash_function_1)
+        m = self.map_class(50, hash_function_1)
         print(m.get('key1'))
         m.put('key1', 10)
         print(m.get('key1'))
@@ -336,7 +376,7 @@ class HashMapTester(unittest.TestCase):
         Test remove() on a HashMap of capacity 0.
         :passed: yes
         """
-        hash_m = HashMap(0, hash_function_1)
+        hash_m = self.map_class(0, hash_function_1)
         print(hash_m.remove("key1"))
 
     def test_remove_3(self):
@@ -344,7 +384,7 @@ class HashMapTester(unittest.TestCase):
         Test remove() on an empty HashMap.
         :passed: yes
         """
-        hash_m = HashMap(6, hash_function_1)
+        hash_m = self.map_class(6, hash_function_1)
         print(hash_m.remove("cat"))
 
     def test_empty_buckets_1(self):
@@ -353,7 +393,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         print("--- EXAMPLE 1 ---")
-        m = HashMap(100, hash_function_1)
+        m = self.map_class(100, hash_function_1)
         print(m.empty_buckets(), m.size, m.capacity)
         m.put('key1', 10)
         print(m.empty_buckets(), m.size, m.capacity)
@@ -370,7 +410,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         print("--- EXAMPLE 2 ---")
-        m = HashMap(50, hash_function_1)
+        m = self.map_class(50, hash_function_1)
         for i in range(150):
             m.put('key' + str(i), i * 100)
             if i % 30 == 0:
@@ -382,7 +422,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         print("--- EXAMPLE 1 ---")
-        m = HashMap(100, hash_function_1)
+        m = self.map_class(100, hash_function_1)
         print(m.table_load())
         m.put('key1', 10)
         print(m.table_load())
@@ -397,7 +437,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         print("--- EXAMPLE 2 ---")
-        m = HashMap(50, hash_function_1)
+        m = self.map_class(50, hash_function_1)
         for i in range(50):
             m.put('key' + str(i), i * 100)
             if i % 10 == 0:
@@ -409,7 +449,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         print("--- EXAMPLE 1 ---")
-        m = HashMap(100, hash_function_1)
+        m = self.map_class(100, hash_function_1)
         print(m.size, m.capacity)
         m.put('key1', 10)
         m.put('key2', 20)
@@ -424,7 +464,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         print("--- EXAMPLE 2 ---")
-        m = HashMap(50, hash_function_1)
+        m = self.map_class(50, hash_function_1)
         print(m.size, m.capacity)
         m.put('key1', 10)
         print(m.size, m.capacity)
@@ -441,7 +481,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         print("--- EXAMPLE 1 ---")
-        m = HashMap(20, hash_function_1)
+        m = self.map_class(20, hash_function_1)
         m.put('key1', 10)
         print(m.size, m.capacity, m.get('key1'), m.contains_key('key1'))
         m.resize_table(30)
@@ -453,7 +493,7 @@ class HashMapTester(unittest.TestCase):
         :passed: yes
         """
         print("--- EXAMPLE 2 ---")
-        m = HashMap(75, hash_function_2)
+        m = self.map_class(75, hash_function_2)
         keys = [i for i in range(1, 1000, 13)]
         for key in keys:
             m.put(str(key), key * 42)
@@ -466,3 +506,834 @@ class HashMapTester(unittest.TestCase):
                 result = result and not m.contains_key(str(key + 1))
             print(capacity, result, m.size, m.capacity,
                   round(m.table_load(), 2))
+
+    def test_auto_resize_1(self):
+        """
+        Test that a table with a maximum load factor doubles its capacity
+        when the load factor is exceeded.
+        """
+        m = self.map_class(4, hash_function_2, max_load_factor=1.0)
+        for i in range(4):
+            m.put('key' + str(i), i)
+        self.assertEqual(4, m.capacity)
+
+        m.put('key4', 4)
+        self.assertEqual(8, m.capacity)
+
+        for i in range(100):
+            m.put('key' + str(i), i)
+        self.assertEqual(100, m.size)
+        self.assertLessEqual(m.table_load(), 1.0)
+        for i in range(100):
+            self.assertEqual(i, m.get('key' + str(i)))
+
+    def test_resize_does_not_rehash_1(self):
+        """
+        Test that resizing reuses the stored hash of every key instead of
+        hashing it again.
+        """
+        hashed = []
+
+        def counting_hash(key):
+            hashed.append(key)
+            return hash_function_2(key)
+
+        m = self.map_class(2, counting_hash, max_load_factor=0.5)
+        for i in range(100):
+            m.put('key' + str(i), i)
+        self.assertGreater(m.capacity, 100)
+        self.assertEqual(100, len(hashed))
+
+        m.resize_table(1000)
+        self.assertEqual(100, len(hashed))
+        for i in range(100):
+            self.assertEqual(i, m.get('key' + str(i)))
+
+    def test_auto_resize_2(self):
+        """
+        Test that a table with a minimum load factor shrinks as keys are
+        removed, but never below its starting capacity.
+        """
+        m = self.map_class(4, hash_function_2, max_load_factor=1.0,
+                    min_load_factor=0.25)
+        for i in range(64):
+            m.put('key' + str(i), i)
+        self.assertEqual(64, m.capacity)
+
+        for i in range(60):
+            m.remove('key' + str(i))
+        self.assertEqual(4, m.size)
+        self.assertEqual(16, m.capacity)
+        for i in range(60, 64):
+            self.assertEqual(i, m.get('key' + str(i)))
+
+        for i in range(60, 63):
+            m.remove('key' + str(i))
+        self.assertEqual(1, m.size)
+        self.assertEqual(4, m.capacity)
+        self.assertEqual(63, m.get('key63'))
+
+        with self.assertRaises(ValueError):
+            self.map_class(4, hash_function_2, max_load_factor=1.0,
+                    min_load_factor=0.5)
+
+    def test_resize_table_relinks_nodes(self):
+        """
+        Test that resize_table() moves the existing nodes into the new buckets
+        instead of creating new ones.
+        """
+        m = self.map_class(3, hash_function_1)
+        for i in range(20):
+            m.put('key' + str(i), i)
+        nodes_before = set()
+        for bucket in m._buckets:
+            if bucket is None:
+                continue
+            cur = bucket.head
+            while cur is not None:
+                nodes_before.add(id(cur))
+                cur = cur.next
+
+        m.resize_table(17)
+        nodes_after = set()
+        for index, bucket in enumerate(m._buckets):
+            if bucket is None:
+                continue
+            cur = bucket.head
+            while cur is not None:
+                nodes_after.add(id(cur))
+                self.assertEqual(index, m.generate_hash_index(cur.key))
+                cur = cur.next
+
+        self.assertEqual(nodes_before, nodes_after)
+        self.assertEqual(20, m.size)
+
+    def test_increment_1(self):
+        """
+        Test that increment() inserts new keys and adds to existing ones.
+        """
+        m = self.map_class(3, hash_function_1)
+        self.assertEqual(1, m.increment('key1'))
+        self.assertEqual(2, m.increment('key1'))
+        self.assertEqual(7, m.increment('key1', 5))
+        self.assertEqual(-2, m.increment('key2', -2))
+        self.assertEqual(7, m.get('key1'))
+        self.assertEqual(-2, m.get('key2'))
+        self.assertEqual(2, m.size)
+
+        # A table with no buckets cannot hold the key
+        self.assertEqual(None, self.map_class(0, hash_function_1).increment('key1'))
+
+    def test_put_many_1(self):
+        """
+        Test that put_many() gives the same table as put() called for each
+        pair, with the last value of a repeated key kept.
+        """
+        pairs = [('key' + str(i % 30), i) for i in range(50)]
+        m = self.map_class(3, hash_function_2, max_load_factor=1.0)
+        expected = self.map_class(3, hash_function_2, max_load_factor=1.0)
+        m.put('key0', -1)
+        expected.put('key0', -1)
+        m.put_many(pairs)
+        for key, value in pairs:
+            expected.put(key, value)
+
+        self.assertEqual(30, m.size)
+        self.assertEqual(40, m.get('key10'))
+        self.assertEqual(29, m.get('key29'))
+        self.assertEqual(sorted(expected.items()), sorted(m.items()))
+
+        # A table with no buckets cannot hold the keys
+        empty = self.map_class(0, hash_function_1)
+        empty.put_many(pairs)
+        self.assertEqual(0, empty.size)
+
+    def test_increment_many_1(self):
+        """
+        Test that increment_many() adds up repeated keys, and grows the table
+        at most once per batch.
+        """
+        words = ['the', 'cat', 'the', 'hat', 'The', 'the'] * 5
+        m = self.map_class(2, "crc32", max_load_factor=1.0)
+        m.increment('cat', 10)
+        resizes = []
+        resize_table = m.resize_table
+        m.resize_table = lambda capacity: (resizes.append(capacity),
+                                           resize_table(capacity))
+        m.increment_many(words)
+        self.assertEqual(1, len(resizes))
+        self.assertEqual(4, m.size)
+        self.assertEqual(15, m.get('the'))
+        self.assertEqual(15, m.get('cat'))
+        self.assertEqual(5, m.get('The'))
+
+        m.increment_many(['cat', 'dog'], 3)
+        self.assertEqual(18, m.get('cat'))
+        self.assertEqual(3, m.get('dog'))
+        m.increment_many([])
+        self.assertEqual(5, m.size)
+        self.assertLessEqual(m.table_load(), 1.0)
+
+    def test_increment_many_2(self):
+        """
+        Test that a batch hashes each distinct key once.
+        """
+        hashed = []
+
+        def counting_hash(key):
+            hashed.append(key)
+            return hash_function_1(key)
+
+        m = self.map_class(8, counting_hash)
+        m.increment_many(['a', 'b', 'a', 'c'])
+        self.assertEqual(['a', 'b', 'c'], sorted(hashed))
+
+        other = self.map_class(8, hash_function_1)
+        other.put('b', 2)
+        other.put('d', 4)
+        del hashed[:]
+        m.merge(other)
+        self.assertEqual(['b', 'd'], sorted(hashed))
+        self.assertEqual(3, m.get('b'))
+
+    def test_hash_value_1(self):
+        """
+        Test that put(), get(), increment() and contains_key() use a hash
+        passed by the caller instead of hashing the key.
+        """
+        m = self.map_class(7, hash_function_1)
+        hash_value = hash_function_1('key1')
+        m.put('key1', 1, hash_value)
+        self.assertEqual(3, m.increment('key1', 2, hash_value))
+        self.assertEqual(3, m.get('key1', hash_value))
+        self.assertTrue(m.contains_key('key1', hash_value))
+        self.assertEqual(3, m.get('key1'))
+
+        # The given hash decides where the key is looked for
+        m.put('key2', 5, hash_value)
+        self.assertEqual(5, m.get('key2', hash_value))
+        self.assertFalse(m.contains_key('key2', hash_value + 1))
+
+    def test_upsert_1(self):
+        """
+        Test that upsert() applies the function to the current value, or to the
+        default value for new keys.
+        """
+        m = self.map_class(3, hash_function_1, max_load_factor=1.0)
+        self.assertEqual(['a'], m.upsert('key1', lambda v: v + ['a'], []))
+        self.assertEqual(['a', 'b'], m.upsert('key1', lambda v: v + ['b'], []))
+        for i in range(10):
+            m.upsert('key' + str(i), lambda v: v * 2, 1)
+        self.assertEqual(2, m.get('key9'))
+        self.assertEqual(['a', 'b', 'a', 'b'], m.get('key1'))
+        self.assertEqual(10, m.size)
+
+    def test_empty_buckets_not_allocated(self):
+        """
+        Test that empty buckets do not hold a linked list, including after
+        clear() and after their last node is removed.
+        """
+        m = self.map_class(10, hash_function_1)
+        self.assertEqual([None] * 10, m._buckets)
+
+        m.put('key1', 10)
+        self.assertEqual(9, m._buckets.count(None))
+        self.assertEqual(9, m.empty_buckets())
+        m.remove('key1')
+        self.assertEqual([None] * 10, m._buckets)
+
+        m.put('key1', 10)
+        m.clear()
+        self.assertEqual([None] * 10, m._buckets)
+        self.assertEqual(10, m.empty_buckets())
+
+    def test_hash_function_by_name(self):
+        """
+        Test that a table can be created with the name of a registered hash
+        function.
+        """
+        for name in HASH_FUNCTIONS:
+            m = self.map_class(10, name)
+            for i in range(50):
+                m.put('key' + str(i), i)
+            for i in range(50):
+                self.assertEqual(i, m.get('key' + str(i)))
+
+        with self.assertRaises(ValueError):
+            self.map_class(10, "no_such_function")
+
+    def test_items_1(self):
+        """
+        Test that items() generates every key-value pair exactly once.
+        """
+        m = self.map_class(7, hash_function_2)
+        self.assertEqual([], list(m.items()))
+        for i in range(30):
+            m.put('key' + str(i), i)
+        m.remove('key3')
+
+        expected = [('key' + str(i), i) for i in range(30) if i != 3]
+        self.assertEqual(sorted(expected), sorted(m.items()))
+        self.assertEqual(sorted(m.get_tuples()), sorted(m.items()))
+
+    def test_merge_1(self):
+        """
+        Test that merge() adds new keys and combines the values of shared keys.
+        """
+        m = self.map_class(3, hash_function_2, max_load_factor=1.0)
+        other = self.map_class(5, hash_function_1)
+        for i in range(10):
+            m.put('key' + str(i), i)
+        for i in range(5, 20):
+            other.put('key' + str(i), 100)
+
+        m.merge(other)
+        self.assertEqual(20, m.size)
+        self.assertEqual(4, m.get('key4'))
+        self.assertEqual(105, m.get('key5'))
+        self.assertEqual(100, m.get('key19'))
+        self.assertEqual(15, other.size)
+
+        m.merge(other, combine=min)
+        self.assertEqual(100, m.get('key5'))
+        self.assertEqual(4, m.get('key4'))
+
+    def test_keys_values_1(self):
+        """
+        Test keys(), values() and the container protocol.
+        """
+        m = self.map_class(7, hash_function_2)
+        self.assertEqual(0, len(m))
+        self.assertEqual([], list(m))
+        for i in range(30):
+            m.put('key' + str(i), i)
+        m.remove('key3')
+
+        self.assertEqual(29, len(m))
+        self.assertEqual(list(m.items()), list(zip(m.keys(), m.values())))
+        self.assertEqual(list(m.keys()), list(m))
+        self.assertEqual(sorted(key for key, value in m.items()), sorted(m))
+        self.assertIn('key4', m)
+        self.assertNotIn('key3', m)
+        self.assertNotIn('key3', self.map_class(0, hash_function_1))
+
+    def test_str_1(self):
+        """
+        Test that __str__ lists every bucket or slot on its own line.
+        """
+        m = self.map_class(5, hash_function_1)
+        m.put('b', 2)
+        lines = str(m).splitlines()
+        self.assertEqual(5, len(lines))
+        self.assertEqual(['0', '1', '2', '3', '4'],
+                         [line.split(':')[0] for line in lines])
+        self.assertEqual(1, sum('(b, 2)' in line for line in lines))
+
+    def test_pickle_1(self):
+        """
+        Test that a table survives being pickled and unpickled.
+        """
+        m = self.map_class(6, "crc32", max_load_factor=1.0)
+        for i in range(40):
+            m.put('key' + str(i), i)
+        m.remove('key7')
+
+        copy = pickle.loads(pickle.dumps(m))
+        self.assertEqual(sorted(m.items()), sorted(copy.items()))
+        self.assertEqual(m.capacity, copy.capacity)
+        self.assertFalse(copy.contains_key('key7'))
+        copy.put('key7', 7)
+        self.assertEqual(40, copy.size)
+
+
+class HashMapSnapshotTester(unittest.TestCase):
+    """
+    Contain unit tests for HashMap.dump() and HashMap.load().
+    """
+    def snapshot_path(self):
+        """
+        Return the name of a temporary file that is removed after the test.
+
+        :return: the name of the file
+        """
+        f = tempfile.NamedTemporaryFile(suffix=".hmap", delete=False)
+        f.close()
+        self.addCleanup(os.remove, f.name)
+        return f.name
+
+    def test_dump_load_1(self):
+        """
+        Test that a table keeps its entries, settings and bucket layout when
+        dumped and loaded.
+        """
+        m = HashMap(6, "crc32", max_load_factor=1.0, min_load_factor=0.25)
+        for i in range(40):
+            m.put('key' + str(i), i * 1000 - 5000)
+        m.put('café', 2 ** 40)
+        m.remove('key7')
+        path = self.snapshot_path()
+        m.dump(path)
+
+        copy = HashMap.load(path)
+        self.assertEqual(str(m), str(copy))
+        self.assertEqual(m.size, copy.size)
+        self.assertEqual(m.capacity, copy.capacity)
+        self.assertEqual(m.max_load_factor, copy.max_load_factor)
+        self.assertEqual(m.min_load_factor, copy.min_load_factor)
+        self.assertEqual(2 ** 40, copy.get('café'))
+        self.assertFalse(copy.contains_key('key7'))
+
+        # The loaded table keeps working like the original
+        copy.put('key7', 7)
+        self.assertEqual(41, copy.size)
+        for i in range(40):
+            copy.remove('key' + str(i))
+        self.assertEqual(6, copy.capacity)
+
+    def test_dump_size_1(self):
+        """
+        Test that a snapshot is smaller than a pickle of the same table.
+        """
+        for function in ["crc32", "fnv1a"]:
+            m = HashMap(2500, function, max_load_factor=1.0)
+            m.increment_many("word" + str(i % 3000) for i in range(10000))
+            path = self.snapshot_path()
+            m.dump(path)
+            self.assertLess(os.path.getsize(path),
+                            len(pickle.dumps(m, pickle.HIGHEST_PROTOCOL)))
+
+    def test_dump_load_2(self):
+        """
+        Test loading with a different hash function, loading an empty table,
+        and the errors for tables and files that cannot be used.
+        """
+        m = HashMap(5, hash_function_1)
+        for i in range(12):
+            m.put('key' + str(i), i)
+        path = self.snapshot_path()
+        m.dump(path)
+
+        copy = HashMap.load(path, function="fnv1a")
+        self.assertEqual(sorted(m.items()), sorted(copy.items()))
+        self.assertEqual(12, copy.size)
+        for i in range(12):
+            self.assertEqual(i, copy.get('key' + str(i)))
+
+        HashMap(0, "crc32").dump(path)
+        empty = HashMap.load(path)
+        self.assertEqual(0, empty.capacity)
+        self.assertEqual([], empty.get_tuples())
+
+        with self.assertRaises(ValueError):
+            HashMap(5, lambda key: 0).dump(path)
+        m.put('key3', 'three')
+        with self.assertRaises(ValueError):
+            m.dump(path)
+        with open(path, 'wb') as f:
+            f.write(b"not a snapshot at all, just some text")
+        with self.assertRaises(ValueError):
+            HashMap.load(path)
+
+
+class OpenHashMapTester(HashMapTester):
+    """
+    Run the HashMap unit tests against the OpenHashMap class, replacing the
+    tests that depend on chained buckets.
+    """
+    map_class = OpenHashMap
+
+    def test_contains_key_7(self):
+        """
+        Test that contains_key follows the probe sequence past collisions and
+        tombstones.
+        """
+        # With hash_function_1, anagrams share a hash and so a probe sequence
+        m = self.map_class(8, hash_function_1, max_load_factor=1.0)
+        m.put("abc", 1)
+        m.put("bca", 2)
+        m.put("cab", 3)
+        self.assertEqual(3, m.get("cab"))
+
+        # Removing an entry in the middle of the sequence leaves a tombstone
+        m.remove("bca")
+        self.assertFalse(m.contains_key("bca"))
+        self.assertTrue(m.contains_key("cab"))
+        self.assertEqual(1, m._tombstones)
+
+        # A new entry on the same probe sequence reuses the tombstone
+        m.put("acb", 4)
+        self.assertEqual(0, m._tombstones)
+        self.assertEqual(3, m.size)
+        self.assertEqual(4, m.get("acb"))
+
+    def test_resize_table_relinks_nodes(self):
+        """
+        Test that resize_table() keeps every entry and drops tombstones.
+        """
+        m = self.map_class(40, hash_function_2)
+        for i in range(20):
+            m.put('key' + str(i), i)
+        for i in range(0, 20, 2):
+            m.remove('key' + str(i))
+        self.assertEqual(10, m._tombstones)
+
+        m.resize_table(17)
+        self.assertEqual(0, m._tombstones)
+        self.assertEqual(10, m.size)
+        for i in range(20):
+            self.assertEqual(i % 2 == 1, m.contains_key('key' + str(i)))
+
+        with self.assertRaises(ValueError):
+            m.resize_table(9)
+
+    def test_tombstones_do_not_fill_table(self):
+        """
+        Test that repeatedly adding and removing keys does not fill the table
+        with tombstones.
+        """
+        m = self.map_class(8, hash_function_2, max_load_factor=1.0)
+        for i in range(1000):
+            m.put('key' + str(i), i)
+            m.remove('key' + str(i))
+        self.assertEqual(0, m.size)
+        self.assertEqual(8, m.capacity)
+        self.assertFalse(m.contains_key('key999'))
+
+    def test_empty_buckets_not_allocated(self):
+        """
+        Test that removing and clearing entries leaves the slots empty.
+        """
+        m = self.map_class(10, hash_function_1)
+        m.put('key1', 10)
+        self.assertEqual(9, m.empty_buckets())
+        m.remove('key1')
+        self.assertEqual(10, m.empty_buckets())
+
+        m.put('key1', 10)
+        m.clear()
+        self.assertEqual([None] * 10, m._keys)
+        self.assertEqual(10, m.empty_buckets())
+
+class InstrumentedHashMapTester(HashMapTester):
+    """
+    Run the HashMap unit tests against the InstrumentedHashMap class, which
+    must behave exactly like a HashMap, and test its counters.
+    """
+    map_class = InstrumentedHashMap
+
+    def test_stats_1(self):
+        """
+        Test that lookups, chain walks and resizes are counted.
+        """
+        # With hash_function_1, anagrams share a hash and so a chain
+        m = self.map_class(4, hash_function_1, max_load_factor=1.0)
+        for key in ["abc", "bca", "cab"]:
+            m.put(key, 1)
+        stats = m.stats
+        self.assertEqual(3, stats.puts)
+        self.assertEqual(0 + 1 + 2, stats.probes)
+
+        # "abc" was added first, so it is at the end of the chain
+        self.assertEqual(1, m.get("abc"))
+        self.assertEqual(3, stats.longest_walk)
+        self.assertFalse(m.contains_key("acb"))
+        self.assertEqual(3 + 3 + 3, stats.probes)
+        self.assertEqual(5, stats.lookups)
+        self.assertEqual(0, stats.resizes)
+
+        # Two new keys make five, so the batch grows the table once
+        m.increment_many(["x", "y", "x", "abc"])
+        self.assertEqual(1, stats.batches)
+        self.assertEqual(5 + 3, stats.lookups)
+        self.assertEqual(2, m.get("abc"))
+        self.assertEqual(1, stats.resizes)
+        self.assertGreater(stats.resize_seconds, 0)
+        self.assertAlmostEqual(stats.probes / stats.lookups,
+                               stats.as_dict()["probes_per_lookup"])
+
+        stats.reset()
+        self.assertEqual(0, stats.lookups)
+        self.assertEqual(0.0, stats.probes_per_lookup())
+
+
+class IndexedHashMapTester(HashMapTester):
+    """
+    Run the HashMap unit tests against the IndexedHashMap class, which must
+    behave exactly like a HashMap, and test its index.
+    """
+    map_class = IndexedHashMap
+
+    def assertIndexed(self, m):
+        """
+        Assert that the index of a table matches its values.
+        """
+        expected = sorted(m.items())
+        expected.sort(key=lambda entry: entry[1], reverse=True)
+        self.assertEqual(expected, m.top_k(None))
+        self.assertEqual(len(m), len(m.index))
+        for number in [0, 1, 3, len(m) + 1]:
+            self.assertEqual(expected[:number], m.top_k(number))
+
+    def test_upsert_1(self):
+        """
+        Test upsert with numeric values, which the index needs.
+        """
+        m = self.map_class(5, hash_function_1)
+        self.assertEqual(1, m.upsert("a", lambda value: value + 1, 0))
+        self.assertEqual(2, m.upsert("a", lambda value: value + 1, 0))
+        self.assertEqual(10, m.upsert("b", lambda value: value * 2, 5))
+        self.assertEqual([("b", 10), ("a", 2)], m.top_k(5))
+
+    def test_top_k_1(self):
+        """
+        Test that top_k follows every kind of update.
+        """
+        m = self.map_class(5, hash_function_2, max_load_factor=1.0,
+                           min_load_factor=0.1)
+        for word in "the cat and the dog and the bird".split():
+            m.increment(word)
+        self.assertEqual([("the", 3), ("and", 2), ("bird", 1)], m.top_k(3))
+        self.assertIndexed(m)
+
+        # Counts that go down, jump and disappear
+        m.increment("the", -1)
+        m.increment("cat", 5)
+        m.put("dog", 4)
+        m.remove("bird")
+        m.remove("missing")
+        self.assertEqual([("cat", 6), ("dog", 4), ("and", 2), ("the", 2)],
+                         m.top_k(None))
+        self.assertIndexed(m)
+
+        # Batches and merges
+        m.increment_many(["and", "and", "fox", "the"], 2)
+        m.put_many([("cat", 1), ("eel", 7)])
+        other = self.map_class(5, hash_function_2)
+        other.put("fox", 3)
+        other.put("gnu", 6)
+        m.merge(other)
+        self.assertEqual([("eel", 7), ("and", 6), ("gnu", 6)], m.top_k(3))
+        self.assertIndexed(m)
+
+        m.clear()
+        self.assertEqual([], m.top_k(3))
+        self.assertEqual(0, len(m.index))
+
+    def test_top_k_2(self):
+        """
+        Test the index against a dictionary over random updates, and that it
+        survives pickling and dump/load.
+        """
+        rng = random.Random(7)
+        m = self.map_class(4, "crc32", max_load_factor=1.0)
+        expected = {}
+        for i in range(3000):
+            key = "w" + str(rng.randrange(60))
+            delta = rng.choice([1, 1, 1, -1, 3])
+            if m.increment(key, delta) == 0:
+                m.remove(key)
+            expected[key] = expected.get(key, 0) + delta
+            if expected[key] == 0:
+                del expected[key]
+        self.assertEqual(expected, dict(m.items()))
+        self.assertIndexed(m)
+
+        self.assertIndexed(pickle.loads(pickle.dumps(m)))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "counts.bin")
+            m.dump(path)
+            self.assertIndexed(self.map_class.load(path))
+            self.assertIndexed(self.map_class.load(path, "fnv1a"))
+
+    def test_frequency_index_1(self):
+        """
+        Test that FrequencyIndex keeps its groups in order of count.
+        """
+        index = FrequencyIndex()
+        index.update("a", None, 5)
+        index.update("b", None, 1)
+        index.update("c", None, 3)
+        index.update("d", None, -2)
+        self.assertEqual([("a", 5), ("c", 3), ("b", 1), ("d", -2)],
+                         index.top_k(None))
+
+        # Moving the only key of a group links in a new group next to it
+        index.update("c", 3, 2)
+        index.update("a", 5, 0)
+        index.update("d", -2, None)
+        self.assertEqual([("c", 2), ("b", 1), ("a", 0)], index.top_k(None))
+        self.assertEqual([("c", 2)], index.top_k(1))
+        self.assertEqual(3, len(index))
+
+
+class FrozenHashMapTester(unittest.TestCase):
+    """
+    Contain unit tests for the FrozenHashMap class.
+    """
+    def freeze(self, table):
+        """
+        Freeze a table into a temporary file that is removed after the test.
+
+        :param table: the HashMap or OpenHashMap to freeze
+        :return: the FrozenHashMap, which is closed after the test
+        """
+        f = tempfile.NamedTemporaryFile(suffix=".fhm", delete=False)
+        f.close()
+        self.addCleanup(os.remove, f.name)
+        frozen = FrozenHashMap.build(table, f.name)
+        self.addCleanup(frozen.close)
+        return frozen
+
+    def test_frozen_1(self):
+        """
+        Test that a frozen table finds the same entries as the table it was
+        built from.
+        """
+        for map_class in [HashMap, OpenHashMap]:
+            m = map_class(10, "fnv1a", max_load_factor=0.5)
+            for i in range(300):
+                m.put('key' + str(i), i - 100)
+            m.put('café', 2 ** 40)
+            frozen = self.freeze(m)
+
+            self.assertEqual(301, frozen.size)
+            self.assertEqual(1024, frozen.capacity)
+            self.assertEqual(sorted(m.get_tuples()),
+                             sorted(frozen.get_tuples()))
+            for key, value in m.items():
+                self.assertTrue(frozen.contains_key(key))
+                self.assertEqual(value, frozen.get(key))
+            self.assertEqual(2 ** 40, frozen.get('café'))
+            self.assertIsNone(frozen.get('key300'))
+            self.assertFalse(frozen.contains_key('cafe'))
+
+            self.assertEqual(301, len(frozen))
+            self.assertEqual(list(frozen.items()),
+                             list(zip(frozen.keys(), frozen.values())))
+            self.assertEqual(list(frozen.keys()), list(frozen))
+            self.assertIn('café', frozen)
+            self.assertNotIn('cafe', frozen)
+
+    def test_frozen_2(self):
+        """
+        Test freezing an empty table, colliding keys, pickling a frozen table
+        and the errors for tables and files that cannot be used.
+        """
+        frozen = self.freeze(HashMap(5, "crc32"))
+        self.assertEqual([], frozen.get_tuples())
+        self.assertFalse(frozen.contains_key('key1'))
+
+        # With hash_function_1, anagrams share a hash and so a probe sequence
+        m = HashMap(5, "hash_function_1")
+        for key in ["abc", "bca", "cab", "xyz"]:
+            m.put(key, len(m.get_tuples()))
+        frozen = self.freeze(m)
+        self.assertEqual(2, frozen.get("cab"))
+        self.assertFalse(frozen.contains_key("acb"))
+
+        # A process receiving a frozen table maps the same file
+        copy = pickle.loads(pickle.dumps(frozen))
+        self.addCleanup(copy.close)
+        self.assertEqual(frozen.path, copy.path)
+        self.assertEqual(sorted(m.items()), sorted(copy.items()))
+
+        with self.assertRaises(ValueError):
+            self.freeze(HashMap(5, lambda key: 0))
+        f = tempfile.NamedTemporaryFile(suffix=".fhm", delete=False)
+        with f:
+            f.write(b"not a frozen table, just some text")
+        self.addCleanup(os.remove, f.name)
+        with self.assertRaises(ValueError):
+            FrozenHashMap(f.name)
+
+
+class HashFunctionTester(unittest.TestCase):
+    """
+    Contain unit tests for the hash functions and the hash function registry.
+    """
+    def test_fnv1a_hash(self):
+        """
+        Test fnv1a_hash() against known 64-bit FNV-1a values.
+        """
+        self.assertEqual(0xcbf29ce484222325, fnv1a_hash(""))
+        self.assertEqual(0xaf63dc4c8601ec8c, fnv1a_hash("a"))
+        self.assertEqual(0x85944171f73967e8, fnv1a_hash("foobar"))
+
+        # Seeds change the hash, and anagrams do not collide
+        self.assertNotEqual(fnv1a_hash("foobar"), fnv1a_hash("foobar", 1))
+        self.assertNotEqual(fnv1a_hash("abc"), fnv1a_hash("cba"))
+
+    def test_hash_batch(self):
+        """
+        Test that the batch hash functions match hashing one key at a time.
+        """
+        keys = ["apple", "", "caf\u00e9", "x" * 40, "key1"]
+        for name, (function, batch_function) in HASH_FUNCTIONS.items():
+            expected = [function(key) for key in keys]
+            self.assertEqual(expected, hash_batch(name, keys))
+            self.assertEqual(expected, hash_batch(function, keys))
+        self.assertEqual([fnv1a_hash(key, 99) for key in keys],
+                         fnv1a_hash_batch(keys, 99))
+        self.assertEqual([], hash_batch("fnv1a", []))
+
+    def test_register_hash_function(self):
+        """
+        Test registering a seeded hash function under a new name.
+        """
+        register_hash_function("crc32_seed_7", lambda key: crc32_hash(key, 7))
+        try:
+            function = get_hash_function("crc32_seed_7")
+            self.assertEqual(crc32_hash("abc", 7), function("abc"))
+            self.assertIs(crc32_hash, get_hash_function(crc32_hash))
+        finally:
+            del HASH_FUNCTIONS["crc32_seed_7"]
+
+
+class HashDiagnosticsTester(unittest.TestCase):
+    """
+    Contain unit tests for the hash map diagnostics in hash_diagnostics.py.
+    """
+    def test_analyze_chained(self):
+        """
+        Test analyze() on a HashMap with known chain lengths.
+        """
+        # With hash_function_1 and 4 buckets, "cat" and "act" go to bucket 0,
+        # "bin" to bucket 1 and "ape" to bucket 2
+        m = HashMap(4, hash_function_1)
+        for key in ["cat", "act", "bin", "ape"]:
+            m.put(key, 1)
+
+        report = analyze(m)
+        self.assertEqual({0: 1, 1: 2, 2: 1}, report["chain_histogram"])
+        self.assertEqual(2, report["max_chain"])
+        self.assertEqual(1.25, report["avg_probes_hit"])
+        self.assertEqual(1.0, report["avg_probes_miss"])
+        self.assertEqual(2.0, report["chi_square"])
+        self.assertEqual(1, report["empty_buckets"])
+
+    def test_analyze_open(self):
+        """
+        Test analyze() on an OpenHashMap with known probe sequences.
+        """
+        # "cat" and "act" both start at slot 0, and "bin" at slot 1
+        m = OpenHashMap(4, hash_function_1, max_load_factor=None)
+        for key in ["cat", "act", "bin"]:
+            m.put(key, 1)
+
+        report = analyze(m)
+        self.assertEqual({0: 2, 1: 1, 2: 1}, report["chain_histogram"])
+        self.assertEqual(5 / 3, report["avg_probes_hit"])
+        self.assertEqual(2.5, report["avg_probes_miss"])
+
+    def test_compare_hash_functions(self):
+        """
+        Test that a well-spread hash function scores better than one that
+        maps anagrams to the same bucket.
+        """
+        keys = ["abcd", "abdc", "acbd", "acdb", "adbc", "adcb", "bacd", "badc",
+                "bcad", "bcda"]
+        results = dict(compare_hash_functions(
+            keys, 16, names=["hash_function_1", "fnv1a"]))
+        self.assertEqual(10, results["hash_function_1"]["max_chain"])
+        self.assertLess(results["fnv1a"]["chi_square"],
+                        results["hash_function_1"]["chi_square"])
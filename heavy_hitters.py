@@ -0,0 +1,352 @@
+# Date: October 18, 2026
+
+# heavy_hitters.py
+# ===================================================
+# Approximate word counts in fixed memory. A Count-Min
+# Sketch estimates the count of any word, and a
+# Space-Saving summary keeps the words most likely to
+# be the most common ones. Neither grows with the
+# vocabulary, so a stream with a long tail of rare
+# words (typos, IDs, hashes) can be counted in bounded
+# memory, at the price of counts that may be too high
+# by a bounded amount.
+# ===================================================
+
+import heapq
+import math
+import zlib
+from array import array
+from collections import Counter
+
+
+class CountMinSketch:
+    """
+    Create a Count-Min Sketch of `depth` rows of `width` counters. Each word
+    adds to one counter per row, and its count is estimated by the smallest of
+    its counters. An estimate is never too low, and is too high by at most
+    `epsilon * total` with probability at least `1 - delta`, where `total` is
+    the sum of all counts added.
+
+    :param width: the number of counters in each row
+    :param depth: the number of rows
+    :param seed: a number that changes which counters the words map to
+    """
+    def __init__(self, width, depth, seed=0):
+        if width <= 0 or depth <= 0:
+            raise ValueError("width and depth must be positive")
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.total = 0
+        self._counters = array('q', bytes(8 * width * depth))
+
+    @classmethod
+    def from_error(cls, epsilon, delta, seed=0):
+        """
+        Create a sketch just large enough for the given error bounds.
+
+        :param epsilon: the largest overestimate, as a fraction of the total
+        count
+        :param delta: the probability that an estimate is off by more than
+        `epsilon` times the total count
+        :param seed: a number that changes which counters the words map to
+        :return: a CountMinSketch
+        """
+        if not 0 < epsilon < 1 or not 0 < delta < 1:
+            raise ValueError("epsilon and delta must be in (0, 1)")
+        return cls(math.ceil(math.e / epsilon),
+                   math.ceil(math.log(1 / delta)), seed)
+
+    @property
+    def epsilon(self):
+        """
+        The largest overestimate, as a fraction of the total count.
+        """
+        return math.e / self.width
+
+    @property
+    def delta(self):
+        """
+        The probability that an estimate is off by more than `epsilon` times
+        the total count.
+        """
+        return math.exp(-self.depth)
+
+    def _indexes(self, key):
+        """
+        Find the counter of a word in each row. The rows use the hashes
+        h1 + row * h2 of two CRC32 hashes of the word, which behave like
+        independent hashes for this purpose.
+
+        :param key: the word
+        :return: a list with the index of one counter per row
+        """
+        data = key.encode('utf-8')
+        h1 = zlib.crc32(data, self.seed)
+        h2 = zlib.crc32(data, h1) | 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width
+                for row in range(self.depth)]
+
+    def add(self, key, count=1):
+        """
+        Add to the count of a word.
+
+        :param key: the word
+        :param count: the amount to add, which must not be negative
+        :return: the new estimate of the count of the word
+        """
+        counters = self._counters
+        estimate = None
+        for index in self._indexes(key):
+            value = counters[index] + count
+            counters[index] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        self.total += count
+        return estimate
+
+    def estimate(self, key):
+        """
+        Estimate the count of a word.
+
+        :param key: the word
+        :return: the smallest counter of the word, which is at least its count
+        """
+        counters = self._counters
+        return min(counters[index] for index in self._indexes(key))
+
+    def memory(self):
+        """
+        Return the number of bytes used by the counters.
+
+        :return: the size of the counter array in bytes
+        """
+        return self._counters.itemsize * len(self._counters)
+
+
+class SpaceSaving:
+    """
+    Create a Space-Saving summary that follows at most `capacity` words. A word
+    that is not followed replaces the followed word with the smallest count,
+    and takes over that count as its possible overestimate. Every word whose
+    count is above `total / capacity` is guaranteed to be followed.
+
+    Followed words are grouped by count, so the word with the smallest count is
+    found without searching.
+
+    :param capacity: the largest number of words to follow
+    """
+    def __init__(self, capacity):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.total = 0
+        self._counts = {}  # Maps each followed word to its count
+        self._errors = {}  # Maps each followed word to its overestimate
+
+        # Maps each count to the words with that count. Each group is a dict
+        # used as an ordered set, so that ties are replaced oldest first.
+        self._groups = {}
+        self._min_count = 0
+
+    def __len__(self):
+        return len(self._counts)
+
+    def min_count(self):
+        """
+        Return the smallest count of a followed word. Once the summary is full,
+        this bounds the overestimate of every count and the count of every
+        word that is not followed.
+
+        :return: the smallest count, or 0 if fewer than `capacity` words are
+        followed
+        """
+        if len(self._counts) < self.capacity:
+            return 0
+        return self._min_count
+
+    def add(self, key, count=1):
+        """
+        Add to the count of a word.
+
+        :param key: the word
+        :param count: the amount to add, which must be positive
+        """
+        counts = self._counts
+        groups = self._groups
+        self.total += count
+        old = counts.get(key)
+
+        if old is not None:
+            group = groups[old]
+            del group[key]
+            if not group:
+                del groups[old]
+        elif len(counts) < self.capacity:
+            # There is room to follow one more word
+            old = 0
+            self._errors[key] = 0
+            if not counts or count < self._min_count:
+                self._min_count = count
+        else:
+            # Replace the oldest word with the smallest count, whose count the
+            # new word may not really have
+            old = self._min_count
+            group = groups[old]
+            victim = next(iter(group))
+            del group[victim]
+            if not group:
+                del groups[old]
+            del counts[victim]
+            del self._errors[victim]
+            self._errors[key] = old
+
+        new = old + count
+        counts[key] = new
+        group = groups.get(new)
+        if group is None:
+            groups[new] = {key: None}
+        else:
+            group[key] = None
+
+        # If the smallest count had no words left, the next smallest is the
+        # new count when counting one at a time, and has to be looked for
+        # otherwise
+        if old == self._min_count and old not in groups and old:
+            self._min_count = new if count == 1 else min(groups)
+
+    def get(self, key):
+        """
+        Return the count of a followed word and its possible overestimate.
+
+        :param key: the word
+        :return: a tuple (count, error), where the true count is between
+        count - error and count, or None if the word is not followed
+        """
+        count = self._counts.get(key)
+        if count is None:
+            return None
+        return count, self._errors[key]
+
+    def items(self):
+        """
+        Generate the followed words one at a time.
+
+        :return: a generator of (word, count, error) tuples
+        """
+        errors = self._errors
+        for key, count in self._counts.items():
+            yield key, count, errors[key]
+
+
+def _get_rank(entry):
+    """
+    Helper function for HeavyHitters.top() that orders entries by descending
+    count, breaking ties by the word, like word_count.get_rank().
+
+    :return: a tuple that sorts before the entries of less common words
+    """
+    return -entry[1], entry[0]
+
+
+class HeavyHitters:
+    """
+    Count the most common words of a stream approximately, in memory that does
+    not depend on the number of distinct words. A Space-Saving summary follows
+    `capacity` candidate words, and a Count-Min Sketch tightens their counts.
+    A reported count is never below the true count, and is above it by at
+    most the `error_bound` of report().
+
+    :param capacity: the number of candidate words to follow. The most common
+    words are found reliably when this is several times the number of words
+    asked for.
+    :param epsilon: the largest overestimate of the sketch, as a fraction of
+    the number of words counted
+    :param delta: the probability that the sketch is off by more than that
+    :param seed: a number that changes which counters of the sketch the words
+    map to
+    """
+    def __init__(self, capacity=1000, epsilon=0.0001, delta=0.01, seed=0):
+        self.summary = SpaceSaving(capacity)
+        self.sketch = CountMinSketch.from_error(epsilon, delta, seed)
+
+    def add(self, key, count=1):
+        """
+        Count a word.
+
+        :param key: the word
+        :param count: the number of times to count it
+        """
+        self.sketch.add(key, count)
+        self.summary.add(key, count)
+
+    def add_many(self, keys):
+        """
+        Count a batch of words. Each distinct word of the batch is added once
+        with its number of appearances, which gives the same error bounds as
+        adding the words one at a time for much less work on repetitive text.
+
+        :param keys: an iterable of words
+        """
+        sketch_add = self.sketch.add
+        summary_add = self.summary.add
+        for key, count in Counter(keys).items():
+            sketch_add(key, count)
+            summary_add(key, count)
+
+    def estimate(self, key):
+        """
+        Estimate the count of any word.
+
+        :param key: the word
+        :return: a count that is at least the true count
+        """
+        estimate = self.sketch.estimate(key)
+        followed = self.summary.get(key)
+        if followed is not None and followed[0] < estimate:
+            return followed[0]
+        return estimate
+
+    def top(self, number):
+        """
+        Return the most common words counted so far.
+
+        :param number: the number of top results to return, or None to return
+        every candidate word
+        :return: a list of tuples of the form (word, count), sorted by most
+        common word and then alphabetically
+        """
+        estimate = self.sketch.estimate
+        entries = [(key, min(count, estimate(key)))
+                   for key, count, error in self.summary.items()]
+        if number is None:
+            return sorted(entries, key=_get_rank)
+        return heapq.nsmallest(number, entries, key=_get_rank)
+
+    def report(self):
+        """
+        Describe the error bounds of the counts.
+
+        :return: a dictionary with the keys words (the number of words
+        counted), capacity, width, depth, epsilon, delta, memory (the bytes
+        used by the sketch counters), summary_bound (the most any count of the
+        summary is too high by), sketch_bound (the most any estimate of the
+        sketch is too high by, with probability 1 - delta) and error_bound
+        (the smaller of the two)
+        """
+        sketch = self.sketch
+        summary_bound = self.summary.min_count()
+        sketch_bound = sketch.epsilon * sketch.total
+        return {
+            "words": sketch.total,
+            "capacity": self.summary.capacity,
+            "width": sketch.width,
+            "depth": sketch.depth,
+            "epsilon": sketch.epsilon,
+            "delta": sketch.delta,
+            "memory": sketch.memory(),
+            "summary_bound": summary_bound,
+            "sketch_bound": sketch_bound,
+            "error_bound": min(summary_bound, sketch_bound),
+        }
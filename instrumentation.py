@@ -0,0 +1,292 @@
+# Date: October 18, 2026
+
+# instrumentation.py
+# ===================================================
+# Opt-in counters, timers and profilers for finding
+# where a slow count spends its time. HashMap itself
+# carries no instrumentation: InstrumentedHashMap is a
+# subclass that counts lookups, chain walks and resizes,
+# and top_words() only times its phases when it is
+# given a TopWordsStats. Profile wraps any code in
+# cProfile and tracemalloc.
+# ===================================================
+
+import time
+from hash_map import HashMap
+from hash_map import hash_batch
+
+
+class HashMapStats:
+    """
+    Create a set of counters for an InstrumentedHashMap.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Set every counter back to zero.
+        """
+        self.gets = 0
+        self.puts = 0
+        self.increments = 0
+        self.removes = 0
+        self.contains = 0
+        self.batches = 0  # Calls to put_many(), increment_many() and merge()
+        self.lookups = 0  # Keys looked up, one per key of a batch
+        self.hashes = 0  # Keys hashed by the table itself
+        self.probes = 0  # Nodes compared with a key while walking chains
+        self.longest_walk = 0
+        self.resizes = 0
+        self.resize_seconds = 0.0
+
+    def probes_per_lookup(self):
+        """
+        Return the average number of nodes compared per key looked up.
+
+        :return: the average as a float, or 0.0 before the first lookup
+        """
+        return self.probes / self.lookups if self.lookups else 0.0
+
+    def as_dict(self):
+        """
+        Return the counters.
+
+        :return: a dictionary mapping the name of each counter to its value,
+        including probes_per_lookup
+        """
+        counters = dict(vars(self))
+        counters["probes_per_lookup"] = self.probes_per_lookup()
+        return counters
+
+
+class InstrumentedHashMap(HashMap):
+    """
+    Create a HashMap that counts its work in a HashMapStats. Each lookup walks
+    the chain of its key once more to count the nodes compared, so timings of
+    an instrumented table overstate the cost of a lookup; the counts
+    themselves are exact.
+
+    :param capacity: the total number of buckets to be created in the hash table
+    :param function: the hash function to use for hashing values, or the name
+    of a function in HASH_FUNCTIONS
+    :param max_load_factor: the load factor above which the table grows, or
+    None to never grow automatically
+    :param min_load_factor: the load factor below which the table shrinks, or
+    None to never shrink automatically
+    :param stats: the HashMapStats to count into, or None to create one
+    """
+    def __init__(self, capacity, function, max_load_factor=None,
+                 min_load_factor=None, stats=None):
+        self.stats = HashMapStats() if stats is None else stats
+        super().__init__(capacity, function, max_load_factor, min_load_factor)
+
+    def _walk(self, key, hash_value=None):
+        """
+        Count the nodes a lookup of the given key compares it with.
+
+        :param key: the key to look up
+        :param hash_value: the hash of the key, or None to hash the key
+        :return: the hash of the key, to pass on so that it is not hashed
+        again, or None if the table has no buckets
+        """
+        stats = self.stats
+        stats.lookups += 1
+        if self.capacity == 0:
+            return hash_value
+        if hash_value is None:
+            hash_value = self._hash_function(key)
+            stats.hashes += 1
+
+        probes = 0
+        bucket = self._buckets[hash_value % self.capacity]
+        if bucket is not None:
+            cur = bucket.head
+            while cur is not None:
+                probes += 1
+                if cur.hash == hash_value and cur.key == key:
+                    break
+                cur = cur.next
+        stats.probes += probes
+        if probes > stats.longest_walk:
+            stats.longest_walk = probes
+        return hash_value
+
+    def get(self, key, hash_value=None):
+        self.stats.gets += 1
+        return super().get(key, self._walk(key, hash_value))
+
+    def put(self, key, value, hash_value=None):
+        self.stats.puts += 1
+        return super().put(key, value, self._walk(key, hash_value))
+
+    def increment(self, key, delta=1, hash_value=None):
+        self.stats.increments += 1
+        return super().increment(key, delta, self._walk(key, hash_value))
+
+    def contains_key(self, key, hash_value=None):
+        self.stats.contains += 1
+        return super().contains_key(key, self._walk(key, hash_value))
+
+    def remove(self, key):
+        self.stats.removes += 1
+        self._walk(key)
+        return super().remove(key)
+
+    def _update_many(self, entries, combine, hashes=None):
+        """
+        Count the lookups of a batch before adding it with
+        HashMap._update_many(), which is given the hashes so that the keys are
+        hashed once.
+        """
+        stats = self.stats
+        stats.batches += 1
+        if self.capacity != 0 and entries:
+            keys = list(entries)
+            if hashes is None:
+                hashes = hash_batch(self._hash_function, keys)
+                stats.hashes += len(keys)
+            for key, hash_value in zip(keys, hashes):
+                self._walk(key, hash_value)
+        return super()._update_many(entries, combine, hashes)
+
+    def resize_table(self, capacity):
+        start = time.perf_counter()
+        super().resize_table(capacity)
+        self.stats.resize_seconds += time.perf_counter() - start
+        self.stats.resizes += 1
+
+
+class TopWordsStats:
+    """
+    Create a record of where top_words() spent its time. Pass it to
+    top_words() as `stats`; top_words() then also counts with an
+    InstrumentedHashMap when the engine is "chained" and keeps its counters in
+    `table`.
+
+    The time spent reading, decoding, splitting and lowercasing the text is
+    recorded as tokenize_seconds, the time spent adding the words to the table
+    as count_seconds, and the time spent picking the most common words as
+    select_seconds. When several workers count, tokenizing and counting happen
+    in the workers and are recorded together as count_seconds.
+    """
+    def __init__(self):
+        self.bytes_read = 0
+        self.tokens = 0
+        self.distinct = 0
+        self.tokenize_seconds = 0.0
+        self.count_seconds = 0.0
+        self.select_seconds = 0.0
+        self.total_seconds = 0.0
+        self.table = None  # A HashMapStats, when the table was instrumented
+
+    def as_dict(self):
+        """
+        Return the measurements, with those of the table under "table".
+
+        :return: a dictionary mapping the name of each measurement to its value
+        """
+        measurements = dict(vars(self))
+        if self.table is not None:
+            measurements["table"] = self.table.as_dict()
+        return measurements
+
+    def format_report(self):
+        """
+        Format the measurements as lines of text.
+
+        :return: the report as a string
+        """
+        lines = ["%d bytes, %d tokens, %d distinct words"
+                 % (self.bytes_read, self.tokens, self.distinct)]
+        for phase in ["tokenize", "count", "select", "total"]:
+            seconds = getattr(self, phase + "_seconds")
+            lines.append("%-8s  %8.3f s" % (phase, seconds))
+        if self.table is not None:
+            table = self.table
+            lines.append("%d lookups, %.2f nodes compared per lookup, longest "
+                         "walk %d, %d resizes in %.3f s"
+                         % (table.lookups, table.probes_per_lookup(),
+                            table.longest_walk, table.resizes,
+                            table.resize_seconds))
+        return "\n".join(lines)
+
+
+class Profile:
+    """
+    Profile the code run inside a `with` block with cProfile, tracemalloc or
+    both. The modules are imported only when profiling is asked for.
+
+        with Profile() as profile:
+            top_words("alice.txt", 10)
+        print(profile.format_report())
+
+    :param cpu: True to profile function calls with cProfile
+    :param memory: True to trace memory allocations with tracemalloc
+    """
+    def __init__(self, cpu=True, memory=True):
+        self.cpu = cpu
+        self.memory = memory
+        self.profiler = None
+        self.snapshot = None  # A tracemalloc snapshot taken at the end
+        self.peak_memory = None  # The peak of traced memory in bytes
+        self.seconds = None
+
+    def __enter__(self):
+        if self.memory:
+            import tracemalloc
+
+            tracemalloc.start()
+        if self.cpu:
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds = time.perf_counter() - self._start
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.memory:
+            import cProfile
+            import profile
+            import tracemalloc
+
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+
+            # Leave out the memory held by the profilers themselves
+            self.snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False,
+                                   "<frozen importlib._bootstrap_external>"),
+                tracemalloc.Filter(False, cProfile.__file__),
+                tracemalloc.Filter(False, profile.__file__),
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            ])
+            tracemalloc.stop()
+
+    def format_report(self, limit=15):
+        """
+        Format the functions that took the most time and the lines that
+        still held the most memory at the end of the block.
+
+        :param limit: the number of functions and of lines to list
+        :return: the report as a string
+        """
+        lines = ["%.3f s" % self.seconds]
+        if self.profiler is not None:
+            import io
+            import pstats
+
+            out = io.StringIO()
+            pstats.Stats(self.profiler, stream=out).sort_stats(
+                "cumulative").print_stats(limit)
+            lines.append(out.getvalue().strip())
+        if self.snapshot is not None:
+            lines.append("peak traced memory: %d bytes" % self.peak_memory)
+            lines.append("memory still held at the end, by line:")
+            for stat in self.snapshot.statistics("lineno")[:limit]:
+                lines.append(str(stat))
+        return "\n".join(lines)
@@ -0,0 +1,501 @@
+# Date: October 18, 2026
+# Description: This file contains an implementation of a hash map that uses
+# open addressing. Instead of a bucket of linked lists, the table is stored in
+# three parallel arrays holding the hash, key and value of each slot. Collisions
+# are resolved with linear probing, and removed entries leave a tombstone behind
+# so that probe sequences passing through them are not broken.
+
+# open_hash_map.py
+# ===================================================
+# Implement a hash map with open addressing
+# ===================================================
+
+from hash_map import _HashMapBase
+from hash_map import get_hash_function
+from hash_map import hash_batch
+
+
+# Marker stored in the keys array for a slot whose entry was removed
+_TOMBSTONE = object()
+
+
+class OpenHashMap(_HashMapBase):
+    """
+    Create a new open addressing hash map with the specified number of slots.
+    This class has the same public interface as HashMap in hash_map.py.
+
+    The table always resizes itself when it runs out of room. It doubles its
+    capacity when the load factor rises above `max_load_factor`, and halves it
+    (but never below the starting capacity) when the load factor falls below
+    `min_load_factor`.
+
+    :param capacity: the total number of slots to be created in the hash table
+    :param function: the hash function to use for hashing values, or the name
+    of a function in hash_map.HASH_FUNCTIONS
+    :param max_load_factor: the load factor above which the table grows, or
+    None to only grow when the table is full
+    :param min_load_factor: the load factor below which the table shrinks, or
+    None to never shrink automatically
+    """
+    def __init__(self, capacity, function, max_load_factor=0.5,
+                 min_load_factor=None):
+        if max_load_factor is not None and not 0 < max_load_factor <= 1:
+            raise ValueError("max_load_factor must be in (0, 1]")
+
+        # Shrinking must leave the table below the growth threshold, otherwise
+        # a table could grow and shrink back and forth on every put/remove
+        if (min_load_factor is not None and max_load_factor is not None
+                and min_load_factor * 2 >= max_load_factor):
+            raise ValueError("min_load_factor must be less than half of "
+                             "max_load_factor")
+
+        self._hashes = [None] * capacity  # Full hash of the key in each slot
+        self._keys = [None] * capacity  # None marks a slot never used
+        self._values = [None] * capacity
+        self.capacity = capacity
+        self._hash_function = get_hash_function(function)
+        self.size = 0
+        self._tombstones = 0  # Number of slots holding _TOMBSTONE
+        self.max_load_factor = max_load_factor
+        self.min_load_factor = min_load_factor
+        self._min_capacity = capacity  # Automatic shrinking stops here
+
+    def generate_hash_index(self, key):
+        """
+        Use the hash map's hash function to generate the index of the first
+        slot probed for the given key.
+
+        :param key: the original key as a string
+        :return: an integer representing the hash index, or None if the table
+        has no slots
+        """
+        # If the capacity of the table is zero, return None to prevent modulo by
+        # zero errors
+        if self.capacity == 0:
+            return None
+
+        return self._hash_function(key) % self.capacity
+
+    def _find_slot(self, key, hash_value):
+        """
+        Probe the table for the given key.
+
+        :param key: the key (string) to look for
+        :param hash_value: the full hash of the key
+        :return: a tuple (index, found). If the key is in the table, index is
+        its slot and found is True. Otherwise, index is the slot a new entry
+        for the key should go into (the first tombstone or empty slot on the
+        probe sequence, or None if there is none) and found is False.
+        """
+        keys = self._keys
+        hashes = self._hashes
+        capacity = self.capacity
+        index = hash_value % capacity
+        first_free = None  # First tombstone passed on the probe sequence
+
+        # Probe at most once per slot, since a table without empty slots has
+        # no slot that ends the probe sequence
+        for _ in range(capacity):
+            slot_key = keys[index]
+
+            # An empty slot ends the probe sequence
+            if slot_key is None:
+                if first_free is None:
+                    first_free = index
+                return first_free, False
+
+            # Remember the first tombstone so that a new entry can reuse it
+            if slot_key is _TOMBSTONE:
+                if first_free is None:
+                    first_free = index
+
+            # Compare hashes before comparing the keys themselves
+            elif hashes[index] == hash_value and slot_key == key:
+                return index, True
+
+            index = index + 1
+            if index == capacity:
+                index = 0
+
+        return first_free, False
+
+    def items(self):
+        """
+        Generate the key-value pairs in the table one at a time, without
+        building a list of all of them first.
+
+        :return: a generator of (key, value) tuples
+        """
+        # Iterate over each slot and keep the ones that hold an entry
+        keys = self._keys
+        values = self._values
+        for index in range(self.capacity):
+            key = keys[index]
+            if key is not None and key is not _TOMBSTONE:
+                yield key, values[index]
+
+    def keys(self):
+        """
+        Generate the keys in the table one at a time, in the same order as
+        items() and values() as long as the table is not changed in between.
+
+        :return: a generator of keys
+        """
+        for key in self._keys:
+            if key is not None and key is not _TOMBSTONE:
+                yield key
+
+    def values(self):
+        """
+        Generate the values in the table one at a time, in the same order as
+        items() and keys() as long as the table is not changed in between.
+
+        :return: a generator of values
+        """
+        keys = self._keys
+        values = self._values
+        for index in range(self.capacity):
+            key = keys[index]
+            if key is not None and key is not _TOMBSTONE:
+                yield values[index]
+
+    def get_tuples(self):
+        """
+        Return a list of tuples consisting of all key-value pairs in the table.
+
+        :return tuple_list: a list of tuples for each key-value pair in the table
+        """
+        return list(self.items())
+
+    def clear(self):
+        """
+        Empty out the hash table. The underlying hash table capacity is not
+        changed.
+        """
+        self._hashes = [None] * self.capacity
+        self._keys = [None] * self.capacity
+        self._values = [None] * self.capacity
+        self.size = 0
+        self._tombstones = 0
+
+    def get(self, key, hash_value=None):
+        """
+        Return the value associated with the given key.
+
+        :param key: the key (string) to look for
+        :param hash_value: the hash of the key under the table's hash
+        function, if the caller already has it, or None to hash the key
+        :return: the value associated with the key. If the key is not in the
+        hash map, return None.
+        """
+        if self.capacity == 0:
+            return None
+
+        if hash_value is None:
+            hash_value = self._hash_function(key)
+        index, found = self._find_slot(key, hash_value)
+        if not found:
+            return None
+        return self._values[index]
+
+    def resize_table(self, capacity):
+        """
+        Resize the hash table to have a number of slots equal to the given
+        capacity. All existing key/value pairs are moved into the new table
+        using their stored hashes, so no key is hashed again. Tombstones are
+        dropped in the process.
+
+        :param capacity: the new number of slots that the table will have
+        """
+        # Every entry needs a slot of its own
+        if capacity < self.size:
+            raise ValueError("capacity %d cannot hold %d entries"
+                             % (capacity, self.size))
+
+        old_hashes = self._hashes
+        old_keys = self._keys
+        old_values = self._values
+
+        # Create the new, empty slots
+        hashes = [None] * capacity
+        keys = [None] * capacity
+        values = [None] * capacity
+
+        # Move each entry to the first empty slot on its new probe sequence.
+        # All keys are distinct and the new table has no tombstones, so there
+        # is no need to compare keys.
+        for old_index in range(self.capacity):
+            key = old_keys[old_index]
+            if key is None or key is _TOMBSTONE:
+                continue
+            hash_value = old_hashes[old_index]
+            index = hash_value % capacity
+            while keys[index] is not None:
+                index = index + 1
+                if index == capacity:
+                    index = 0
+            hashes[index] = hash_value
+            keys[index] = key
+            values[index] = old_values[old_index]
+
+        self._hashes = hashes
+        self._keys = keys
+        self._values = values
+        self.capacity = capacity
+        self._tombstones = 0
+
+    def _make_room(self, count=1):
+        """
+        Make sure the table has room for `count` more entries, growing it if
+        the new entries would push the load factor above the maximum (or fill
+        the table), and clearing out tombstones if they are taking up the room.
+
+        :param count: the number of entries about to be added
+        """
+        used = self.size + self._tombstones + count
+        limit = self.capacity
+        if self.max_load_factor is not None:
+            limit = self.max_load_factor * self.capacity
+
+        # There is still room for the new entries
+        if used <= limit:
+            return
+
+        # If the live entries alone need more room, double the capacity until
+        # they fit. Otherwise tombstones are taking up the room, so rebuild the
+        # table at the same capacity to clear them out.
+        capacity = self.capacity
+        while self.size + count > limit:
+            capacity = capacity * 2
+            limit = capacity
+            if self.max_load_factor is not None:
+                limit = self.max_load_factor * capacity
+        self.resize_table(capacity)
+
+    def _insert(self, key, hash_value, value):
+        """
+        Insert a key that is known not to be in the table.
+
+        :param key: the key of the new entry
+        :param hash_value: the full hash of the key
+        :param value: the value of the new entry
+        """
+        self._make_room()
+        self._store(key, hash_value, value)
+
+    def _store(self, key, hash_value, value):
+        """
+        Store a key that is known not to be in the table, in a table known to
+        have room for it.
+
+        :param key: the key of the new entry
+        :param hash_value: the full hash of the key
+        :param value: the value of the new entry
+        """
+        index = self._find_slot(key, hash_value)[0]
+
+        # If a tombstone is reused, it no longer counts as one
+        if self._keys[index] is _TOMBSTONE:
+            self._tombstones -= 1
+
+        self._hashes[index] = hash_value
+        self._keys[index] = key
+        self._values[index] = value
+        self.size += 1  # Increment the size of the table
+
+    def put(self, key, value, hash_value=None):
+        """
+        Update the given key-value pair in the hash table. If an entry with the
+        given key already exists, its value is replaced. Otherwise, a new entry
+        is added to the table.
+
+        :param key: the key associated with the entry
+        :param value: the value associated with the entry
+        :param hash_value: the hash of the key under the table's hash
+        function, if the caller already has it, or None to hash the key
+        """
+        # If the table has a capacity of 0, return None
+        if self.capacity == 0:
+            return None
+
+        # Hash the key once and probe for it
+        if hash_value is None:
+            hash_value = self._hash_function(key)
+        index, found = self._find_slot(key, hash_value)
+        if found:
+            self._values[index] = value  # Update the entry's value
+        else:
+            self._insert(key, hash_value, value)
+
+    def increment(self, key, delta=1, hash_value=None):
+        """
+        Add `delta` to the value associated with the given key, inserting the
+        key with a value of `delta` if it is not in the table yet. The key is
+        hashed and probed for only once.
+
+        :param key: the key whose value is to be incremented
+        :param delta: the amount to add to the value
+        :param hash_value: the hash of the key under the table's hash
+        function, if the caller already has it, or None to hash the key
+        :return: the new value associated with the key, or None if the table
+        has a capacity of 0
+        """
+        if self.capacity == 0:
+            return None
+
+        if hash_value is None:
+            hash_value = self._hash_function(key)
+        index, found = self._find_slot(key, hash_value)
+        if found:
+            value = self._values[index] + delta
+            self._values[index] = value
+            return value
+
+        self._insert(key, hash_value, delta)
+        return delta
+
+    def upsert(self, key, function, default=None):
+        """
+        Replace the value associated with the given key with `function(value)`.
+        If the key is not in the table yet, insert it with a value of
+        `function(default)`. The key is hashed and probed for only once.
+
+        :param key: the key whose value is to be updated
+        :param function: a function that takes the current value and returns
+        the new value
+        :param default: the value passed to `function` when the key is new
+        :return: the new value associated with the key, or None if the table
+        has a capacity of 0
+        """
+        if self.capacity == 0:
+            return None
+
+        hash_value = self._hash_function(key)
+        index, found = self._find_slot(key, hash_value)
+        if found:
+            value = function(self._values[index])
+            self._values[index] = value
+            return value
+
+        value = function(default)
+        self._insert(key, hash_value, value)
+        return value
+
+    def _update_many(self, entries, combine, hashes=None):
+        """
+        Helper method for put_many(), increment_many() and merge() that adds a
+        batch of distinct keys to the table. The keys are hashed together, the
+        keys already in the table are updated, and the table then makes room
+        for all the new keys at once before they are stored.
+
+        :param entries: a dictionary mapping each key to its value
+        :param combine: a function that takes the current value of a key found
+        in the table and its value in `entries` and returns the new value, or
+        None to replace the current value
+        :param hashes: the hashes of the keys of `entries` in order, or None to
+        hash the keys here
+        """
+        # If the table has a capacity of 0, there is nowhere to put the keys
+        if self.capacity == 0 or not entries:
+            return
+
+        keys = list(entries)
+        if hashes is None:
+            hashes = hash_batch(self._hash_function, keys)
+
+        # Update the keys already in the table, and set the others aside
+        find_slot = self._find_slot
+        values = self._values
+        new_keys = []
+        for key, hash_value in zip(keys, hashes):
+            index, found = find_slot(key, hash_value)
+            if not found:
+                new_keys.append((key, hash_value))
+            elif combine is None:
+                values[index] = entries[key]
+            else:
+                values[index] = combine(values[index], entries[key])
+
+        # Grow (or clear out tombstones) once for the whole batch
+        if new_keys:
+            self._make_room(len(new_keys))
+            for key, hash_value in new_keys:
+                self._store(key, hash_value, entries[key])
+
+    def remove(self, key):
+        """
+        Remove the entry with the given key from the table. If no such entry
+        exists, do nothing. The slot is left holding a tombstone.
+
+        :param key: the key belonging to the entry that is to be removed
+        """
+        if self.capacity == 0:
+            return
+
+        index, found = self._find_slot(key, self._hash_function(key))
+        if not found:
+            return
+
+        # Leave a tombstone so that probe sequences through the slot still
+        # reach the entries after it
+        self._hashes[index] = None
+        self._keys[index] = _TOMBSTONE
+        self._values[index] = None
+        self._tombstones += 1
+        self.size -= 1  # Decrement the size of the table
+
+        # Shrink the table if the load factor has fallen below the minimum
+        if (self.min_load_factor is not None
+                and self.capacity > self._min_capacity
+                and self.size < self.min_load_factor * self.capacity):
+            self.resize_table(max(self.capacity // 2, self._min_capacity))
+
+    def contains_key(self, key, hash_value=None):
+        """
+        Search to see if a key exists within the hash table.
+
+        :param key: the key (string) to look for
+        :param hash_value: the hash of the key under the table's hash
+        function, if the caller already has it, or None to hash the key
+        :return: True if the key is found, and False otherwise
+        """
+        if self.capacity == 0:
+            return False
+
+        if hash_value is None:
+            hash_value = self._hash_function(key)
+        return self._find_slot(key, hash_value)[1]
+
+    def empty_buckets(self):
+        """
+        Return the number of slots in the table that do not hold an entry.
+
+        :return: the number of empty slots, counting tombstones
+        """
+        return self.capacity - self.size
+
+    def table_load(self):
+        """
+        Return the current hash table load factor (the fraction of slots that
+        hold an entry).
+
+        :return: the ratio of number of entries to number of slots in the
+        table as a float
+        """
+        return self.size / self.capacity
+
+    def __str__(self):
+        """
+        Print the entry held by each slot in the table.
+        """
+        out = []
+        for index in range(self.capacity):
+            key = self._keys[index]
+            if key is None:
+                slot = 'None'
+            elif key is _TOMBSTONE:
+                slot = 'TS'
+            else:
+                slot = '(' + str(key) + ', ' + str(self._values[index]) + ')'
+            out.append(str(index) + ': ' + slot + '\n')
+        return ''.join(out)
@@ -0,0 +1,113 @@
+# Date: October 18, 2026
+
+# token_cache.py
+# ===================================================
+# A bounded cache from raw tokens to the key a hash
+# map stores them under (lowercased and interned) and
+# the hash of that key. Frequent words are looked up
+# in the cache instead of being lowercased and hashed
+# again every time they appear.
+# ===================================================
+
+import sys
+from hash_map import get_hash_function
+
+
+# Eviction policies: "lru" evicts the token used least recently, and "fifo"
+# evicts the token added first, which makes hits cheaper since they never
+# reorder the cache
+POLICIES = ("lru", "fifo")
+
+
+class TokenCache:
+    """
+    Create a cache of at most `maxsize` tokens, each mapped to a tuple
+    (key, hash_value) that can be passed to HashMap.increment().
+
+    :param function: the hash function of the table the keys go into, or the
+    name of a function in hash_map.HASH_FUNCTIONS
+    :param maxsize: the largest number of tokens to keep
+    :param policy: the eviction policy, "lru" or "fifo"
+    """
+    def __init__(self, function, maxsize=4096, policy="lru"):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if policy not in POLICIES:
+            raise ValueError("unknown eviction policy: " + repr(policy))
+
+        self.hash_function = get_hash_function(function)
+        self.maxsize = maxsize
+        self.policy = policy
+        self._entries = {}  # Kept in eviction order, the next victim first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, token):
+        """
+        Return the key and hash for a token, computing them if the token is not
+        in the cache.
+
+        :param token: a word as found in the text
+        :return: a tuple (key, hash_value), where key is the interned lowercase
+        token and hash_value is its hash
+        """
+        entries = self._entries
+        entry = entries.get(token)
+        if entry is not None:
+            self.hits += 1
+
+            # Move the token to the back of the eviction order
+            if self.policy == "lru":
+                del entries[token]
+                entries[token] = entry
+            return entry
+
+        self.misses += 1
+        key = sys.intern(token.lower())
+        entry = (key, self.hash_function(key))
+
+        # Make room by evicting the token at the front of the eviction order
+        if len(entries) >= self.maxsize:
+            del entries[next(iter(entries))]
+            self.evictions += 1
+        entries[token] = entry
+        return entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def hit_rate(self):
+        """
+        Return the fraction of lookups that were answered from the cache.
+
+        :return: the hit rate as a float, or 0.0 before the first lookup
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        :return: a dictionary with the keys size, maxsize, policy, hits,
+        misses, evictions and hit_rate
+        """
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate(),
+        }
+
+    def clear(self):
+        """
+        Empty the cache and reset its counters.
+        """
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
@@ -9,12 +9,62 @@
 # by the user.
 # ===================================================
 
+import codecs
+import glob
+import heapq
+import itertools
+import marshal
+import mmap
+import os
 import re
+import sys
+import time
+from collections import Counter
 from hash_map import HashMap
+from hash_map import HASH_FUNCTIONS
+from hash_map import get_hash_function
+from open_hash_map import OpenHashMap
+
+# Modules needed only by some ways of counting (worker processes, sketches,
+# JSON output and the command line) are imported by the functions that use
+# them, so that importing this module and starting the script stay fast
 
 
 # Regular expression used to capture words
-rgx = re.compile("(\w[\w']*\w|\w)")
+rgx = re.compile(r"(\w[\w']*\w|\w)")
+
+# Regular expression that matches one character that cannot be part of a word
+boundary_rgx = re.compile(r"[^\w']")
+
+# The same pattern for UTF-8 encoded bytes. Every byte of a multi-byte
+# character counts as a word character, so each match covers whole characters
+# and is split into words by `rgx` once decoded. Matches made of ASCII bytes
+# only are already the same words `rgx` would find.
+byte_rgx = re.compile(
+    rb"([\w\x80-\xff][\w'\x80-\xff]*[\w\x80-\xff]|[\w\x80-\xff])")
+
+# Regular expression that matches one byte that can be part of a match of
+# `byte_rgx`, and one that cannot
+word_byte_rgx = re.compile(rb"[\w'\x80-\xff]")
+boundary_byte_rgx = re.compile(rb"[^\w'\x80-\xff]")
+
+# Number of bytes read from a file at a time
+CHUNK_SIZE = 1 << 16
+
+# Largest number of distinct matches whose words iter_buffer_token_batches()
+# remembers. The memo is emptied when it grows past this, so a vocabulary
+# that never repeats is not kept a second time next to the table.
+DECODE_MEMO_SIZE = 1 << 14
+
+# Number of words counted at a time in the approximate mode of top_words()
+SKETCH_BATCH_SIZE = 1 << 14
+
+# Hash map engines that top_words() can count with, each paired with the load
+# factor above which its table grows
+ENGINES = {
+    "chained": (HashMap, 1.0),
+    "open": (OpenHashMap, 0.5),
+}
 
 
 def hash_function_2(key):
@@ -29,6 +79,392 @@ def hash_function_2(key):
     return hash
 
 
+def read_text_chunks(source, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Read a file as a sequence of decoded text chunks. The file is read in
+    fixed-size binary blocks, so a file without line breaks is never held in
+    memory all at once. A character split across two blocks is decoded once
+    both halves have been read.
+
+    :param source: the file name containing the text
+    :param chunk_size: the number of bytes to read at a time
+    :param encoding: the encoding of the file
+    :return: a generator of strings
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    with open(source, "rb") as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            yield decoder.decode(data)
+    yield decoder.decode(b"", final=True)
+
+
+def tokenize_chunks(chunks, lowercase=True):
+    """
+    Split a sequence of text chunks into words, generating one list of words
+    per chunk.
+
+    A word that runs up to the end of a chunk may continue in the next one
+    (e.g. "don" + "'t"), so the run of word characters and apostrophes at the
+    end of each chunk is held back and put in front of the next chunk. Words
+    never span a character outside of that run, so the words found this way
+    are the same as the words found in the whole text at once.
+
+    :param chunks: an iterable of strings
+    :param lowercase: True to convert the words to lowercase, or False to
+    keep them as they appear in the text
+    :return: a generator of lists of words
+    """
+    find_words = _find_lower_words if lowercase else rgx.findall
+    carry = TrailingRun()
+    for chunk in chunks:
+        text = carry.split(chunk)
+        if text:
+            yield find_words(text)
+
+    # Whatever is left at the end of the text is complete
+    text = carry.flush()
+    if text:
+        yield find_words(text)
+
+
+def _find_trailing_run(text, boundary):
+    """
+    Find where the run of word characters at the end of a string or bytes
+    object starts. The reversed text is searched for its first boundary, so
+    the run is found in linear time however long it is.
+
+    :param text: a string, or bytes holding UTF-8 text
+    :param boundary: a regular expression matching one character (or byte)
+    that cannot be part of a word, such as `boundary_rgx`
+    :return: the position where the trailing run starts, which is len(text)
+    if the text ends with a boundary
+    """
+    match = boundary.search(text[::-1])
+    if match is None:
+        return 0
+    return len(text) - match.start()
+
+
+class TrailingRun:
+    """
+    Hold back the run of word characters at the end of each chunk of a stream,
+    which may be the start of a word that continues in the next chunk.
+
+    Only the new chunk is searched for the end of a run, and the chunks of a
+    run longer than a chunk are kept as a list of pieces and joined once the
+    run ends, so a stream made of one long word is still handled in linear
+    time.
+
+    :param boundary: a regular expression matching one character that cannot
+    be part of a word: `boundary_rgx` for text, or `boundary_byte_rgx` for
+    UTF-8 bytes
+    :param carry: a run held back from an earlier stream to continue from
+    """
+    def __init__(self, boundary=boundary_rgx, carry=None):
+        self._boundary = boundary
+        self._empty = boundary.pattern[:0]  # "" or b""
+        self._pieces = [carry] if carry else []
+
+    def split(self, chunk):
+        """
+        Add a chunk to the stream.
+
+        :param chunk: the next chunk of text (or bytes)
+        :return: the text that is complete now, which starts with the run
+        held back so far and stops before the run at the end of `chunk`
+        """
+        cut = _find_trailing_run(chunk, self._boundary)
+        pieces = self._pieces
+        if cut == 0:
+            # The whole chunk continues the run
+            if chunk:
+                pieces.append(chunk)
+            return self._empty
+
+        pieces.append(chunk[:cut])
+        text = self._empty.join(pieces)
+        self._pieces = [chunk[cut:]] if cut < len(chunk) else []
+        return text
+
+    def flush(self):
+        """
+        Return the run held back and forget it, at the end of the stream.
+
+        :return: the run as a string (or bytes)
+        """
+        text = self._empty.join(self._pieces)
+        self._pieces = []
+        return text
+
+
+def _find_lower_words(text):
+    """
+    Helper function for tokenize_chunks() that finds the words in a piece of
+    text and converts them to lowercase.
+
+    :param text: the text to search
+    :return: a list of lowercase words
+    """
+    # Lowercasing ASCII text never changes where the words are, so lowercase
+    # it in one call. Some other characters change length when lowercased, so
+    # otherwise lowercase the words one at a time.
+    if text.isascii():
+        return rgx.findall(text.lower())
+    return [w.lower() for w in rgx.findall(text)]
+
+
+def iter_token_batches(source, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Generate the lowercase words of a file one list per chunk read. Only about
+    `chunk_size` bytes of the file are held in memory at once, however long its
+    lines are.
+
+    :param source: the file name containing the text
+    :param chunk_size: the number of bytes to read at a time
+    :param encoding: the encoding of the file
+    :return: a generator of lists of lowercase words
+    """
+    return tokenize_chunks(read_text_chunks(source, chunk_size, encoding))
+
+
+def iter_tokens(source, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Generate the lowercase words of a file one at a time. Only about
+    `chunk_size` bytes of the file are held in memory at once, however long its
+    lines are.
+
+    :param source: the file name containing the text
+    :param chunk_size: the number of bytes to read at a time
+    :param encoding: the encoding of the file
+    :return: a generator of lowercase words
+    """
+    for words in iter_token_batches(source, chunk_size, encoding):
+        yield from words
+
+
+def find_word_boundary(buffer, position):
+    """
+    Find the first position at or after `position` that does not fall inside a
+    run of word bytes, so that no word is split by cutting the buffer there.
+
+    :param buffer: a bytes-like object holding UTF-8 text
+    :param position: the position to start from
+    :return: a position between `position` and len(buffer)
+    """
+    end = len(buffer)
+    if 0 < position < end and word_byte_rgx.match(buffer, position - 1):
+        # Skip to the end of the run of word bytes, if any, that the
+        # position is in
+        match = boundary_byte_rgx.search(buffer, position)
+        return end if match is None else match.start()
+    return min(position, end)
+
+
+def iter_buffer_tokens(buffer, start=0, end=None, chunk_size=CHUNK_SIZE,
+                       encoding="utf-8"):
+    """
+    Generate the lowercase words of UTF-8 text held in a bytes-like object,
+    such as an mmap of a file, one at a time.
+
+    :param buffer: a bytes-like object holding the text
+    :param start: the position of the first byte to read, which should not be
+    inside a word
+    :param end: the position after the last byte to read, which should not be
+    inside a word, or None for the end of the buffer
+    :param chunk_size: the approximate number of bytes to search at a time
+    :param encoding: the encoding of the text (an ASCII-compatible encoding)
+    :return: a generator of lowercase words
+    """
+    for words in iter_buffer_token_batches(buffer, start, end, chunk_size,
+                                           encoding):
+        yield from words
+
+
+def iter_buffer_token_batches(buffer, start=0, end=None, chunk_size=CHUNK_SIZE,
+                              encoding="utf-8"):
+    """
+    Generate the lowercase words of UTF-8 text held in a bytes-like object,
+    such as an mmap of a file, one list per window searched. The regular
+    expression runs over the buffer itself, one window of about `chunk_size`
+    bytes at a time, and each distinct match is decoded and lowercased only
+    the first time it is seen, as long as at most DECODE_MEMO_SIZE distinct
+    matches have been seen since the memo was last emptied.
+
+    :param buffer: a bytes-like object holding the text
+    :param start: the position of the first byte to read, which should not be
+    inside a word
+    :param end: the position after the last byte to read, which should not be
+    inside a word, or None for the end of the buffer
+    :param chunk_size: the approximate number of bytes to search at a time
+    :param encoding: the encoding of the text (an ASCII-compatible encoding)
+    :return: a generator of lists of lowercase words
+    """
+    if end is None:
+        end = len(buffer)
+
+    # Map each distinct match to its lowercase word. A match that holds
+    # non-ASCII punctuation may hold several words (or none), so it maps to a
+    # tuple of words instead and is also added to `multi_word`.
+    decoded = {}
+    multi_word = set()
+
+    def decode(raw):
+        if raw.isascii():
+            word = raw.lower().decode("ascii")
+        else:
+            words = [w.lower() for w in rgx.findall(raw.decode(encoding))]
+            if len(words) == 1:
+                word = words[0]
+            else:
+                word = tuple(words)
+                multi_word.add(raw)
+        decoded[raw] = word
+        return word
+
+    get = decoded.get
+    position = start
+    while position < end:
+        # Forget the words seen so far once there are too many of them. The
+        # common words are decoded again and come back with the next window.
+        if len(decoded) > DECODE_MEMO_SIZE:
+            decoded.clear()
+            multi_word.clear()
+
+        # End the window where it does not split a word
+        window_end = min(find_word_boundary(buffer, position + chunk_size),
+                         end)
+        raws = byte_rgx.findall(buffer, position, window_end)
+        words = [get(raw) or decode(raw) for raw in raws]
+
+        # Flatten the rare matches that hold several words
+        if multi_word and not multi_word.isdisjoint(raws):
+            flat = []
+            for word in words:
+                if isinstance(word, tuple):
+                    flat.extend(word)
+                else:
+                    flat.append(word)
+            words = flat
+
+        yield words
+        position = window_end
+
+
+def iter_mmap_tokens(source, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Generate the lowercase words of a file one at a time by memory-mapping it
+    and searching the mapped bytes with iter_buffer_tokens(). The file is never
+    copied into Python strings apart from the words themselves.
+
+    :param source: the file name containing the text
+    :param chunk_size: the approximate number of bytes to search at a time
+    :param encoding: the encoding of the file (an ASCII-compatible encoding)
+    :return: a generator of lowercase words
+    """
+    for words in iter_mmap_token_batches(source, chunk_size, encoding):
+        yield from words
+
+
+def iter_mmap_token_batches(source, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Generate the lowercase words of a memory-mapped file one list per window
+    searched, like iter_buffer_token_batches().
+
+    :param source: the file name containing the text
+    :param chunk_size: the approximate number of bytes to search at a time
+    :param encoding: the encoding of the file (an ASCII-compatible encoding)
+    :return: a generator of lists of lowercase words
+    """
+    with open(source, "rb") as f:
+        # An empty file cannot be memory-mapped and has no words
+        if f.seek(0, 2) == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield from iter_buffer_token_batches(buffer, chunk_size=chunk_size,
+                                                 encoding=encoding)
+
+
+def split_file(source, parts):
+    """
+    Split a file into byte ranges of about equal size whose ends do not fall
+    inside a word, so that each range can be counted on its own.
+
+    :param source: the file name containing the text
+    :param parts: the number of ranges to split the file into
+    :return: a list of (start, end) tuples covering the whole file, without
+    empty ranges
+    """
+    size = os.path.getsize(source)
+    if size == 0:
+        return []
+
+    with open(source, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            ranges = []
+            start = 0
+            for part in range(1, parts + 1):
+                end = find_word_boundary(buffer, size * part // parts)
+                if end > start:
+                    ranges.append((start, end))
+                    start = end
+            return ranges
+
+
+def new_table(engine="chained", hash_function="crc32", instrumented=False,
+              indexed=False):
+    """
+    Create an empty hash map for counting words.
+
+    :param engine: the name of the hash map engine, "chained" (HashMap) or
+    "open" (OpenHashMap)
+    :param hash_function: the name of a hash function in
+    hash_map.HASH_FUNCTIONS (or a hash function) for the table to use
+    :param instrumented: True to create an instrumentation.InstrumentedHashMap,
+    which counts its work in its `stats`, if the engine is "chained"
+    :param indexed: True to create a frequency_index.IndexedHashMap, which
+    keeps its words sorted by count for top_entries(), if the engine is
+    "chained" and the table is not instrumented
+    :return: an empty hash map that grows with the vocabulary
+    """
+    # Let the table grow with the vocabulary instead of letting chains grow
+    table_class, max_load_factor = ENGINES[engine]
+    if instrumented and table_class is HashMap:
+        from instrumentation import InstrumentedHashMap
+
+        table_class = InstrumentedHashMap
+    elif indexed and table_class is HashMap:
+        from frequency_index import IndexedHashMap
+
+        table_class = IndexedHashMap
+    return table_class(2500, hash_function, max_load_factor=max_load_factor)
+
+
+def count_range(source, start, end, engine="chained", hash_function="crc32",
+                chunk_size=CHUNK_SIZE):
+    """
+    Count the words in one byte range of a file. This runs in the worker
+    processes of top_words().
+
+    :param source: the file name containing the text
+    :param start: the position of the first byte of the range
+    :param end: the position after the last byte of the range
+    :param engine: the name of the hash map engine to count with
+    :param hash_function: the hash function for the table to use
+    :param chunk_size: the approximate number of bytes to search at a time
+    :return: a hash map of the word counts in the range
+    """
+    ht = new_table(engine, hash_function)
+    with open(source, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for words in iter_buffer_token_batches(buffer, start, end,
+                                                   chunk_size):
+                ht.increment_many(words)
+    return ht
+
+
 def get_count(tup):
     """
     Helper function for top_words() that returns the second element in a tuple.
@@ -43,50 +479,503 @@ def get_count(tup):
     return tup[1]
 
 
-def top_words(source, number):
+def get_rank(tup):
+    """
+    Helper function for top_entries() that orders (word, count) tuples by
+    descending count, breaking ties by the word itself so that the result does
+    not depend on where the words sit in the hash table.
+
+    :return: a tuple that sorts before the tuples of less common words
+    """
+    return -tup[1], tup[0]
+
+
+def top_entries(table, number):
+    """
+    Select the `number` most common words from a hash map of word counts. The
+    entries are streamed from the table into a heap that holds at most `number`
+    of them, which takes O(V log number) time for a vocabulary of V words. A
+    table that keeps its words sorted by count, such as an IndexedHashMap,
+    answers from its top_k() instead, without visiting the other words.
+
+    :param table: a hash map of word counts
+    :param number: the number of top results to return, or None to return
+    every entry
+    :return: a list of tuples of the form (word, count), sorted by descending
+    count and then by word
+    """
+    top_k = getattr(table, "top_k", None)
+    if top_k is not None:
+        return top_k(number)
+
+    # Return every count, sorted. Sorting by word first and then stably by
+    # count puts words with the same count in alphabetical order.
+    if number is None:
+        tuple_list = sorted(table.items())
+        tuple_list.sort(key=get_count, reverse=True)
+        return tuple_list
+
+    return heapq.nsmallest(number, table.items(), key=get_rank)
+
+
+def _count_batches_timed(table, batches, stats):
+    """
+    Helper function for top_words() that counts batches of words like its
+    plain loop does, timing how long the batches take to produce and to count.
+
+    :param table: the hash map to count into
+    :param batches: an iterable of lists of words
+    :param stats: the instrumentation.TopWordsStats to record the times in
+    """
+    clock = time.perf_counter
+    batches = iter(batches)
+    while True:
+        start = clock()
+        words = next(batches, None)
+        produced = clock()
+        if words is None:
+            stats.tokenize_seconds += produced - start
+            return
+        table.increment_many(words)
+        stats.tokenize_seconds += produced - start
+        stats.count_seconds += clock() - produced
+        stats.tokens += len(words)
+
+
+def _select_timed(table, number, stats, start):
+    """
+    Helper function for top_words() that selects the most common words like
+    top_entries(), recording the time taken and the size of the vocabulary.
+
+    :param table: a hash map of word counts
+    :param number: the number of top results to return, or None
+    :param stats: the instrumentation.TopWordsStats to record in
+    :param start: the time.perf_counter() value when top_words() started
+    :return: the result of top_entries()
+    """
+    selected = time.perf_counter()
+    entries = top_entries(table, number)
+    stats.distinct = table.size
+    stats.select_seconds = time.perf_counter() - selected
+    stats.total_seconds = time.perf_counter() - start
+    stats.table = getattr(table, "stats", None)
+    return entries
+
+
+def top_words(source, number, engine="chained", hash_function="crc32",
+              chunk_size=CHUNK_SIZE, mode="stream", workers=1,
+              token_cache=None, sketch=None, stats=None):
     """
     Take a plain text file and count the number of occurrences of case insensitive words.
     Return the top `number` of words in a list of tuples of the form (word, count).
 
     :param source: the file name containing the text
-    :param number: the number of top results to return (e.g. 5 would return the 5 most common words)
-    :return: a list of tuples of the form (word, count), sorted by most common word (e.g. [("a", 23), ("the", 20), ("it", 10)])
+    :param number: the number of top results to return (e.g. 5 would return the 5 most common words), or None to return the counts of all words
+    :param engine: the name of the hash map engine to count with, "chained"
+    (HashMap) or "open" (OpenHashMap)
+    :param hash_function: the name of a hash function in
+    hash_map.HASH_FUNCTIONS (or a hash function) for the table to use
+    :param chunk_size: the number of bytes of the file to read at a time
+    :param mode: "stream" to read the file in decoded chunks, or "mmap" to
+    memory-map the file and search its bytes directly
+    :param workers: the number of processes to count with. With more than
+    one, the file is split into byte ranges that are counted in separate
+    processes (always in "mmap" mode) and the counts are merged.
+    :param token_cache: a token_cache.TokenCache using the same hash function
+    as the table, which is given the words as they appear in the text and
+    lowercases and hashes each one once while it stays in the cache, or None
+    to lowercase and hash every word. It is not used when counting with
+    several workers, and can only be used in "stream" mode, since "mmap" mode
+    already decodes and lowercases each distinct word once.
+    :param sketch: a heavy_hitters.HeavyHitters to count the words into
+    instead of a hash map, which uses fixed memory but gives approximate
+    counts (its report() describes the error bounds), or None to count
+    exactly. It cannot be used with several workers.
+    :param stats: an instrumentation.TopWordsStats to record the bytes read,
+    the number of words and the time spent in each phase in, or None to record
+    nothing. With the "chained" engine, the words are then counted with an
+    InstrumentedHashMap, whose counters end up in `stats.table`. Words and the
+    time spent tokenizing are only recorded when counting exactly in one
+    process without a token cache.
+    :return: a list of tuples of the form (word, count), sorted by most common word and then alphabetically (e.g. [("a", 23), ("the", 20), ("it", 10)])
     """
     keys = set()
 
-    ht = HashMap(2500,hash_function_2)
+    if sketch is not None and workers > 1:
+        raise ValueError("a sketch cannot be used with several workers")
 
-    # Read the file one word at a time and put the word in `w`
-    with open(source) as f:
-        for line in f:
-            words = rgx.findall(line)
-            for w in words:
-                # Convert the word to lowercase to enforce case insensitivity
-                word_lower = w.lower()
+    if stats is not None:
+        start = time.perf_counter()
+        stats.bytes_read = os.path.getsize(source)
 
-                # If the word already exists in the table, get and update its
-                # current count
-                if ht.contains_key(word_lower):
-                    cur_count = ht.get(word_lower)  # Get current count
-                    ht.put(word_lower, cur_count + 1)  # Update current count
+    # Count byte ranges of the file in parallel and merge the counts
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
 
-                # If the word does not exist in the table, add it and set its
-                # count to 1
-                else:
-                    ht.put(word_lower, 1)
+        ht = new_table(engine, hash_function, stats is not None)
+        ranges = split_file(source, workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(count_range, source, start, end, engine,
+                                       hash_function, chunk_size)
+                       for start, end in ranges]
+            for future in futures:
+                ht.merge(future.result())
+        if stats is not None:
+            stats.count_seconds = time.perf_counter() - start
+            return _select_timed(ht, number, stats, start)
+        return top_entries(ht, number)
+
+    # Read the file one chunk of lowercase words at a time
+    if mode == "mmap":
+        batches = iter_mmap_token_batches(source, chunk_size)
+    elif mode == "stream":
+        batches = iter_token_batches(source, chunk_size)
+    else:
+        raise ValueError("unknown mode: " + repr(mode))
+    tokens = itertools.chain.from_iterable(batches)
+
+    # Count approximately in fixed memory, without a table of every word
+    if sketch is not None:
+        # Hand the words over in batches, so that each distinct word of a
+        # batch is added to the sketch once
+        while True:
+            batch = list(itertools.islice(tokens, SKETCH_BATCH_SIZE))
+            if not batch:
+                break
+            sketch.add_many(batch)
+        if stats is not None:
+            stats.total_seconds = time.perf_counter() - start
+        return sketch.top(number)
+
+    ht = new_table(engine, hash_function, stats is not None)
+
+    if token_cache is not None:
+        # A hash from another function would send words to the wrong buckets
+        if token_cache.hash_function is not get_hash_function(hash_function):
+            raise ValueError("token_cache uses a different hash function")
+        if mode != "stream":
+            raise ValueError("a token cache can only be used in stream mode")
+
+        # Find the words as they appear in the text, so that the cache does
+        # the lowercasing. Add up the repeats of each spelling within a chunk
+        # first, as increment_many() does, then look up its key and hash and
+        # count it without lowercasing or hashing it again.
+        lookup = token_cache.lookup
+        chunks = read_text_chunks(source, chunk_size)
+        for tokens in tokenize_chunks(chunks, lowercase=False):
+            for token, count in Counter(tokens).items():
+                key, hash_value = lookup(token)
+                ht.increment(key, count, hash_value)
+        if stats is not None:
+            stats.count_seconds = time.perf_counter() - start
+            return _select_timed(ht, number, stats, start)
+        return top_entries(ht, number)
+
+    # Time each phase only when asked to, so the plain loop stays plain
+    if stats is not None:
+        _count_batches_timed(ht, batches, stats)
+        return _select_timed(ht, number, stats, start)
+
+    for words in batches:
+        # Count each distinct word of the chunk once, with one probe
+        ht.increment_many(words)
+
+    # Select the most common words without sorting the whole table
+    return top_entries(ht, number)
+
+
+def expand_sources(specs):
+    """
+    Generate the file names named by a list of files, directories and glob
+    patterns. Directories are searched recursively. Files are generated lazily
+    and in sorted order within each directory or pattern.
+
+    :param specs: a list of file names, directory names and glob patterns
+    :return: a generator of file names
+    """
+    for spec in specs:
+        if os.path.isdir(spec):
+            for root, dirs, files in os.walk(spec):
+                dirs.sort()  # Walk subdirectories in a stable order
+                for name in sorted(files):
+                    yield os.path.join(root, name)
+        elif glob.has_magic(spec):
+            for name in sorted(glob.iglob(spec, recursive=True)):
+                if os.path.isfile(name):
+                    yield name
+        else:
+            yield spec
+
+
+def serialize_counts(table):
+    """
+    Pack the word counts of a hash map into a compact byte string that can be
+    sent between processes more cheaply than the hash map itself.
+
+    :param table: a hash map of word counts
+    :return: a byte string that unpacks with merge_serialized_counts()
+    """
+    return marshal.dumps((list(table.keys()), list(table.values())))
+
+
+def merge_serialized_counts(table, data):
+    """
+    Add word counts packed by serialize_counts() to a hash map.
+
+    :param table: the hash map of word counts to add to
+    :param data: a byte string made by serialize_counts()
+    """
+    words, counts = marshal.loads(data)
+    table.merge(dict(zip(words, counts)))
+
+
+def count_file(source, engine="chained", hash_function="crc32",
+               chunk_size=CHUNK_SIZE):
+    """
+    Count the words in one file of a corpus. This runs in the worker processes
+    of count_corpus().
+
+    :param source: the file name containing the text
+    :param engine: the name of the hash map engine to count with
+    :param hash_function: the hash function for the table to use
+    :param chunk_size: the approximate number of bytes to search at a time
+    :return: a tuple (source, seconds, data), where data holds the word counts
+    of the file packed by serialize_counts()
+    """
+    start = time.perf_counter()
+    ht = new_table(engine, hash_function)
+    _count_file_into(ht, source, chunk_size)
+    return source, time.perf_counter() - start, serialize_counts(ht)
+
+
+def _count_file_into(table, source, chunk_size=CHUNK_SIZE):
+    """
+    Helper function for count_file() and count_corpus() that adds the words
+    of a file to a hash map.
+
+    :param table: the hash map of word counts to add to
+    :param source: the file name containing the text
+    :param chunk_size: the approximate number of bytes to search at a time
+    """
+    for words in iter_mmap_token_batches(source, chunk_size):
+        table.increment_many(words)
+
+
+def count_corpus(sources, workers=None, engine="chained", hash_function="crc32",
+                 chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Count the words in every file of a corpus with a pool of worker processes
+    and merge the counts into one hash map.
+
+    Only a few files per worker are handed to the pool at a time, so memory
+    stays bounded however many files the corpus has.
+
+    :param sources: a list of file names, directory names and glob patterns
+    :param workers: the number of processes to count with, or None for one
+    per CPU. With 1, the files are counted in this process.
+    :param engine: the name of the hash map engine to count with
+    :param hash_function: the hash function for the tables to use
+    :param chunk_size: the approximate number of bytes to search at a time
+    :param progress: an optional function called after each file is counted
+    with the number of files counted so far, the file name and the number of
+    seconds the file took
+    :return: a hash map of the word counts of the whole corpus
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    ht = new_table(engine, hash_function)
+    done = 0
+
+    # Count the files one after another in this process, straight into the
+    # table
+    if workers == 1:
+        for source in expand_sources(sources):
+            start = time.perf_counter()
+            _count_file_into(ht, source, chunk_size)
+            done += 1
+            if progress is not None:
+                progress(done, source, time.perf_counter() - start)
+        return ht
+
+    from concurrent.futures import FIRST_COMPLETED
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures import wait
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        files = expand_sources(sources)
+        while True:
+            # Keep at most two files per worker in flight
+            for source in files:
+                pending.add(executor.submit(count_file, source, engine,
+                                            hash_function, chunk_size))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+
+            # Merge the counts of whichever files finish first
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                source, seconds, data = future.result()
+                merge_serialized_counts(ht, data)
+                done += 1
+                if progress is not None:
+                    progress(done, source, seconds)
+
+    return ht
+
+
+def print_progress(done, source, seconds):
+    """
+    Report that a file of a corpus has been counted on standard error.
+
+    :param done: the number of files counted so far
+    :param source: the file name
+    :param seconds: the number of seconds the file took to count
+    """
+    print("[%d] %s (%.3f s)" % (done, source, seconds), file=sys.stderr)
+
+
+def write_entries(entries, output_format="python", out=None):
+    """
+    Write (word, count) entries to a text stream. With "tsv" and "json", each
+    entry is written as soon as it is reached, one per line, so a long list is
+    never formatted all at once.
+
+    :param entries: an iterable of (word, count) tuples
+    :param output_format: "python" to write the list as a Python literal,
+    "tsv" to write a word and its count per line separated by a tab, or
+    "json" to write a JSON array of [word, count] arrays
+    :param out: the text stream to write to, or None for standard output
+    """
+    if out is None:
+        out = sys.stdout
+
+    if output_format == "python":
+        print(list(entries), file=out)
+    elif output_format == "tsv":
+        for word, count in entries:
+            out.write("%s\t%d\n" % (word, count))
+    elif output_format == "json":
+        import json
+
+        separator = "["
+        for word, count in entries:
+            out.write(separator + json.dumps([word, count],
+                                             ensure_ascii=False))
+            separator = ",\n "
+        out.write("[]\n" if separator == "[" else "]\n")
+    else:
+        raise ValueError("unknown output format: " + repr(output_format))
+
+
+def main(argv=None):
+    """
+    Print the most common words of one or more files. With no files, print the
+    10 most common words of alice.txt.
+
+    :param argv: the command line arguments, or None to use sys.argv
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Count the most common words in text files.")
+    parser.add_argument("sources", nargs="*", default=["alice.txt"],
+                        help="files, directories or glob patterns to count")
+    parser.add_argument("-n", "--number", type=int, default=10,
+                        help="the number of top words to print, or 0 to "
+                             "print every word")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="the number of worker processes (default: one "
+                             "per CPU for a corpus, one for a single file)")
+    parser.add_argument("--engine", choices=sorted(ENGINES),
+                        default="chained", help="the hash map to count with")
+    parser.add_argument("--hash", choices=sorted(HASH_FUNCTIONS),
+                        default="crc32", dest="hash_function",
+                        help="the hash function of the hash map")
+    parser.add_argument("--mode", choices=["stream", "mmap", "sketch"],
+                        default="stream",
+                        help="how to read a single file: decoded chunks, a "
+                             "memory map, or decoded chunks counted "
+                             "approximately in fixed memory")
+    parser.add_argument("--format", choices=["python", "tsv", "json"],
+                        default="python", dest="output_format",
+                        help="how to print the words and their counts")
+    parser.add_argument("--progress", action="store_true",
+                        help="report each file and its time on stderr")
+    parser.add_argument("--stats", action="store_true",
+                        help="report the time spent in each phase of "
+                             "counting a single file on stderr")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile the count with cProfile and "
+                             "tracemalloc and report on stderr")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        from instrumentation import Profile
+
+        with Profile() as profile:
+            _run(parser, args)
+        print(profile.format_report(), file=sys.stderr)
+    else:
+        _run(parser, args)
+
+
+def _run(parser, args):
+    """
+    Helper function for main() that counts the words the command line asks
+    for and prints them.
+
+    :param parser: the argparse.ArgumentParser, to report usage errors with
+    :param args: the parsed command line arguments
+    """
+    if args.number < 0:
+        parser.error("--number must not be negative")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    number = args.number or None
+
+    # Report missing files before any counting starts
+    for spec in args.sources:
+        if not glob.has_magic(spec) and not os.path.exists(spec):
+            parser.error("no such file or directory: " + spec)
 
-    # Get a list of tuples consisting of all the key-value pairs in the table
-    tuple_list = ht.get_tuples()
+    # A single file is counted the same way as before
+    if len(args.sources) == 1 and os.path.isfile(args.sources[0]):
+        mode = args.mode
+        sketch = None
+        if mode == "sketch":
+            if args.workers is not None and args.workers > 1:
+                parser.error("--mode sketch counts in a single process")
+            from heavy_hitters import HeavyHitters
 
-    # Sort the list of tuples in descending order by word count
-    tuple_list.sort(key=get_count, reverse=True)
-    # print("sorted tuple_list:", tuple_list)
+            mode = "stream"
+            sketch = HeavyHitters(capacity=max(1000, 10 * (number or 0)))
+        stats = None
+        if args.stats:
+            from instrumentation import TopWordsStats
 
-    # Slice the list of tuples to contain `number` amount of tuples
-    sliced_list = tuple_list[0:number]
+            stats = TopWordsStats()
+        entries = top_words(args.sources[0], number, args.engine,
+                            args.hash_function, mode=mode,
+                            workers=args.workers or 1, sketch=sketch,
+                            stats=stats)
+        write_entries(entries, args.output_format)
+        if stats is not None:
+            print(stats.format_report(), file=sys.stderr)
+        return
 
-    # Return the sliced list of tuples
-    return sliced_list
+    if args.mode == "sketch":
+        parser.error("--mode sketch counts a single file")
+    if args.stats:
+        parser.error("--stats reports on a single file")
+    ht = count_corpus(args.sources, args.workers, args.engine,
+                      args.hash_function,
+                      progress=print_progress if args.progress else None)
+    write_entries(top_entries(ht, number), args.output_format)
 
 
-print(top_words("alice.txt", 10))
+if __name__ == "__main__":
+    main()
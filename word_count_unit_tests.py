@@ -0,0 +1,756 @@
+# Date: October 18, 2026
+# Description: This test file contains unit tests that use various assert
+# functions to test the word counter from word_count.py.
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from async_count import count_streams
+from async_count import open_pipe
+from async_count import top_words_async
+from bench_suite import compare_results
+from bench_suite import run_micro
+from benchmarks import write_corpus
+from concordance import Concordance
+from frequency_index import IndexedHashMap
+from hash_map import HashMap
+from hash_map import crc32_hash
+from hash_map import fnv1a_hash
+from heavy_hitters import CountMinSketch
+from heavy_hitters import HeavyHitters
+from heavy_hitters import SpaceSaving
+from instrumentation import Profile
+from instrumentation import TopWordsStats
+from token_cache import TokenCache
+from word_count import TrailingRun
+from word_count import boundary_byte_rgx
+from word_count import count_corpus
+from word_count import expand_sources
+from word_count import iter_buffer_tokens
+from word_count import iter_mmap_tokens
+from word_count import iter_tokens
+from word_count import main
+from word_count import rgx
+from word_count import split_file
+from word_count import tokenize_chunks
+from word_count import top_entries
+from word_count import top_words
+from word_count import write_entries
+
+
+# A short text with mixed case, punctuation and contractions, which several
+# tests count
+SAMPLE_TEXT = "The cat and the hat.\nThe END, the end!\nDon't stop; don't."
+
+
+class WordCountTester(unittest.TestCase):
+    """
+    Contain unit tests for the top_words() function and its helpers.
+    """
+    def write_text(self, text):
+        """
+        Write text to a temporary file that is removed after the test.
+
+        :param text: the text to write
+        :return: the name of the file
+        """
+        f = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False,
+                                        encoding="utf-8")
+        with f:
+            f.write(text)
+        self.addCleanup(os.remove, f.name)
+        return f.name
+
+    def test_top_entries_1(self):
+        """
+        Test that top_entries() orders by count and breaks ties by word.
+        """
+        m = HashMap(5, "crc32")
+        for word, count in [("b", 2), ("c", 3), ("a", 2), ("d", 1), ("e", 3)]:
+            m.put(word, count)
+
+        self.assertEqual([("c", 3), ("e", 3), ("a", 2)], top_entries(m, 3))
+        self.assertEqual([("c", 3), ("e", 3), ("a", 2), ("b", 2), ("d", 1)],
+                         top_entries(m, None))
+        self.assertEqual(top_entries(m, None), top_entries(m, 10))
+        self.assertEqual([], top_entries(m, 0))
+
+    def test_top_words_1(self):
+        """
+        Test top_words() with both hash map engines.
+        """
+        source = self.write_text(SAMPLE_TEXT)
+        expected = [("the", 4), ("don't", 2), ("end", 2)]
+        self.assertEqual(expected, top_words(source, 3))
+        self.assertEqual(expected, top_words(source, 3, engine="open"))
+        self.assertEqual(7, len(top_words(source, None)))
+
+    def test_top_words_token_cache_1(self):
+        """
+        Test that counting through a token cache gives the same counts.
+        """
+        source = self.write_text(SAMPLE_TEXT)
+        for engine in ["chained", "open"]:
+            cache = TokenCache("fnv1a", maxsize=2)
+            self.assertEqual(top_words(source, None, engine, "fnv1a"),
+                             top_words(source, None, engine, "fnv1a",
+                                       token_cache=cache))
+
+        # The cache is given the words as they appear in the text, so it holds
+        # each spelling ("The", "the", "END", ...) and lowercases it itself
+        cache = TokenCache("fnv1a")
+        top_words(source, None, hash_function="fnv1a", token_cache=cache)
+        self.assertEqual(10, len(cache))
+        self.assertEqual(("the", fnv1a_hash("the")), cache.lookup("The"))
+
+        # Counting the text again finds every spelling in the cache
+        misses = cache.misses
+        top_words(source, None, hash_function="fnv1a", token_cache=cache)
+        self.assertEqual(misses, cache.misses)
+
+        with self.assertRaises(ValueError):
+            top_words(source, 3, token_cache=TokenCache("fnv1a"))
+        with self.assertRaises(ValueError):
+            top_words(source, 3, hash_function="fnv1a", mode="mmap",
+                      token_cache=TokenCache("fnv1a"))
+
+    def test_top_words_sketch_1(self):
+        """
+        Test counting approximately with a sketch that is large enough to be
+        exact.
+        """
+        source = self.write_text(SAMPLE_TEXT)
+        sketch = HeavyHitters(capacity=10, epsilon=0.01)
+        self.assertEqual(top_words(source, 3),
+                         top_words(source, 3, sketch=sketch))
+        self.assertEqual(12, sketch.report()["words"])
+        self.assertEqual(0, sketch.report()["error_bound"])
+
+        with self.assertRaises(ValueError):
+            top_words(source, 3, workers=2, sketch=HeavyHitters())
+
+    def test_top_words_stats_1(self):
+        """
+        Test that top_words() records its phases without changing its result.
+        """
+        source = self.write_text(SAMPLE_TEXT)
+        expected = top_words(source, None)
+        for engine in ["chained", "open"]:
+            stats = TopWordsStats()
+            self.assertEqual(expected, top_words(source, None, engine,
+                                                 stats=stats))
+            self.assertEqual(os.path.getsize(source), stats.bytes_read)
+            self.assertEqual(12, stats.tokens)
+            self.assertEqual(7, stats.distinct)
+            self.assertGreaterEqual(stats.total_seconds,
+                                    stats.tokenize_seconds
+                                    + stats.count_seconds)
+            self.assertEqual(engine == "chained", stats.table is not None)
+            self.assertIn("12 tokens", stats.format_report())
+
+        stats = TopWordsStats()
+        self.assertEqual(expected, top_words(source, None, workers=2,
+                                             stats=stats))
+        self.assertEqual(7, stats.distinct)
+
+        # Each word is looked up once per range it is found in
+        self.assertGreaterEqual(stats.as_dict()["table"]["lookups"], 7)
+
+    def test_profile_1(self):
+        """
+        Test that Profile reports the calls and memory of the profiled code.
+        """
+        source = self.write_text("The cat and the hat.")
+        with Profile() as profile:
+            top_words(source, 1)
+        report = profile.format_report()
+        self.assertIn("top_words", report)
+        self.assertGreater(profile.peak_memory, 0)
+
+        with Profile(cpu=False, memory=False) as profile:
+            pass
+        self.assertIsNone(profile.peak_memory)
+        self.assertGreaterEqual(profile.seconds, 0)
+
+    def test_tokenize_chunks_1(self):
+        """
+        Test that splitting text into chunks at every possible point finds the
+        same words as searching the whole text.
+        """
+        text = ("Don't stop, it's o'clock... rock'n'roll ''quoted'' "
+                "x'' a_b 42nd\nEND word")
+        expected = [w.lower() for w in rgx.findall(text)]
+
+        for size in range(1, len(text) + 1):
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            words = []
+            for batch in tokenize_chunks(chunks):
+                words.extend(batch)
+            self.assertEqual(expected, words, "chunk size %d" % size)
+
+    def test_trailing_run_1(self):
+        """
+        Test that a run longer than a chunk is held back whole, for text and
+        for bytes.
+        """
+        carry = TrailingRun()
+        self.assertEqual("the ", carry.split("the lo"))
+        self.assertEqual("", carry.split("ooo"))
+        self.assertEqual("", carry.split(""))
+        self.assertEqual("loooong ", carry.split("ng wo"))
+        self.assertEqual("wo", carry.flush())
+        self.assertEqual("", carry.flush())
+
+        carry = TrailingRun(boundary_byte_rgx, b"caf")
+        self.assertEqual(b"", carry.split(b"\xc3"))
+        self.assertEqual(b"caf\xc3\xa9, ", carry.split(b"\xa9, it's"))
+        self.assertEqual(b"it's", carry.flush())
+
+    def test_iter_tokens_1(self):
+        """
+        Test iter_tokens() on a file without line breaks, with multi-byte
+        characters split across chunks.
+        """
+        text = "Caf\u00e9 na\u00efve \u0130stanbul don't " * 50
+        source = self.write_text(text)
+        expected = [w.lower() for w in rgx.findall(text)]
+
+        for chunk_size in [1, 2, 3, 7, 64, 1 << 16]:
+            self.assertEqual(expected, list(iter_tokens(source, chunk_size)))
+
+    def test_iter_tokens_2(self):
+        """
+        Test iter_tokens() on empty files and files without words.
+        """
+        self.assertEqual([], list(iter_tokens(self.write_text(""))))
+        self.assertEqual([], list(iter_tokens(self.write_text(" ,.'' \n"))))
+        self.assertEqual(["a"], list(iter_tokens(self.write_text("'A'"), 1)))
+
+    def test_iter_buffer_tokens_1(self):
+        """
+        Test that searching UTF-8 bytes finds the same words as searching the
+        decoded text, for every window size.
+        """
+        text = ("\u201cDon't\u201d \u00c9T\u00c9 caf\u00e9's na\u00efve "
+                "\u0130stanbul x\u00b2 '\u00e9'' \u2014em\u2014dash "
+                "ABC_def 42")
+        data = text.encode("utf-8")
+        expected = [w.lower() for w in rgx.findall(text)]
+
+        for chunk_size in range(1, len(data) + 2):
+            self.assertEqual(expected, list(iter_buffer_tokens(
+                data, chunk_size=chunk_size)), "chunk size %d" % chunk_size)
+
+        # Emptying the memo of decoded matches between windows changes nothing
+        with mock.patch("word_count.DECODE_MEMO_SIZE", 1):
+            for chunk_size in range(1, len(data) + 2):
+                words = list(iter_buffer_tokens(data, chunk_size=chunk_size))
+                self.assertEqual(expected, words, "chunk size %d" % chunk_size)
+
+    def test_iter_mmap_tokens_1(self):
+        """
+        Test that the mmap mode of top_words() matches the stream mode.
+        """
+        source = self.write_text(SAMPLE_TEXT + " caf\u00e9 CAF\u00c9")
+        self.assertEqual(list(iter_tokens(source)),
+                         list(iter_mmap_tokens(source, 4)))
+        self.assertEqual(top_words(source, None),
+                         top_words(source, None, mode="mmap"))
+        self.assertEqual([], list(iter_mmap_tokens(self.write_text(""))))
+
+    def test_split_file_1(self):
+        """
+        Test that split_file() covers the file without splitting any word.
+        """
+        text = "alpha beta\u00e9\u00e9 gamma,delta  epsilon don't " * 20
+        source = self.write_text(text)
+        with open(source, "rb") as f:
+            data = f.read()
+
+        for parts in [1, 2, 3, 8, 50, 5000]:
+            ranges = split_file(source, parts)
+            self.assertEqual(0, ranges[0][0])
+            self.assertEqual(len(data), ranges[-1][1])
+            words = []
+            for start, end in ranges:
+                words.extend(iter_buffer_tokens(data, start, end))
+            self.assertEqual(list(iter_tokens(source)), words)
+
+        self.assertEqual([], split_file(self.write_text(""), 4))
+
+    def test_top_words_parallel_1(self):
+        """
+        Test that counting with several processes matches counting serially.
+        """
+        source = self.write_text("The cat and the hat. Don't stop. " * 200 +
+                                 "\u00c9t\u00e9 caf\u00e9 the end")
+        expected = top_words(source, None)
+        self.assertEqual(expected, top_words(source, None, workers=3))
+        self.assertEqual(expected, top_words(source, None, engine="open",
+                                             workers=2))
+
+    def test_count_corpus_1(self):
+        """
+        Test counting a directory of files, with and without worker processes.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, directory)
+        texts = {"a.txt": "The cat. The hat.", "b.txt": "the END",
+                 "c.md": "Cat and hat and \u00c9T\u00c9"}
+        for name, text in texts.items():
+            path = os.path.join(directory, name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            self.addCleanup(os.remove, path)
+
+        self.assertEqual(sorted(os.path.join(directory, name)
+                                for name in texts),
+                         list(expand_sources([directory])))
+        self.assertEqual([os.path.join(directory, "c.md")],
+                         list(expand_sources([os.path.join(directory,
+                                                           "*.md")])))
+
+        expected = top_words(self.write_text(" ".join(texts.values())), None)
+        reports = []
+        ht = count_corpus([directory], workers=1,
+                          progress=lambda *report: reports.append(report))
+        self.assertEqual(expected, top_entries(ht, None))
+        self.assertEqual([1, 2, 3], [report[0] for report in reports])
+
+        ht = count_corpus([os.path.join(directory, "*.txt"),
+                           os.path.join(directory, "c.md")], workers=2)
+        self.assertEqual(expected, top_entries(ht, None))
+
+    def test_write_entries_1(self):
+        """
+        Test writing entries as a Python list, TSV and JSON.
+        """
+        entries = [("the", 3), ("caf\u00e9", 1)]
+        outputs = {}
+        for output_format in ["python", "tsv", "json"]:
+            out = io.StringIO()
+            write_entries(iter(entries), output_format, out)
+            outputs[output_format] = out.getvalue()
+
+        self.assertEqual(str(entries) + "\n", outputs["python"])
+        self.assertEqual("the\t3\ncaf\u00e9\t1\n", outputs["tsv"])
+        self.assertEqual([list(entry) for entry in entries],
+                         json.loads(outputs["json"]))
+
+        out = io.StringIO()
+        write_entries([], "json", out)
+        self.assertEqual([], json.loads(out.getvalue()))
+        with self.assertRaises(ValueError):
+            write_entries(entries, "xml")
+
+    def test_main_1(self):
+        """
+        Test the command line with a single file and with a glob pattern.
+        """
+        source = self.write_text(SAMPLE_TEXT)
+        expected = top_words(source, None)
+
+        def run(*argv):
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                main(list(argv))
+            return out.getvalue()
+
+        self.assertEqual(str(expected[:2]) + "\n", run(source, "-n", "2"))
+        self.assertEqual(expected, [tuple(entry) for entry in json.loads(
+            run(source, "-n", "0", "--format", "json", "--engine", "open",
+                "--hash", "fnv1a", "--mode", "mmap"))])
+        self.assertEqual("the\t4\n", run(source, "-n", "1", "--format", "tsv",
+                                          "--mode", "sketch"))
+        self.assertEqual("the\t4\n", run(source + "*", "-n", "1", "-j", "1",
+                                          "--format", "tsv"))
+
+        # Bad input is reported as a usage error, not a traceback
+        for argv in [[source, "--mode", "sketch", "-j", "2"],
+                     [source + ".missing"],
+                     [source, source + ".missing"],
+                     [source, "-n", "-1"],
+                     [source, "-j", "0"],
+                     [source, source, "-j", "0"]]:
+            err = io.StringIO()
+            with contextlib.redirect_stderr(err):
+                with self.assertRaises(SystemExit) as raised:
+                    run(*argv)
+            self.assertEqual(2, raised.exception.code)
+            self.assertIn("error:", err.getvalue())
+
+    def test_import_1(self):
+        """
+        Test that importing word_count reads no file and imports none of the
+        modules that only some ways of counting need.
+        """
+        code = ("import sys, word_count; print(sorted(name for name in "
+                "['argparse', 'concurrent.futures', 'heavy_hitters', 'json', "
+                "'numpy'] if name in sys.modules))")
+        here = os.path.dirname(os.path.abspath(__file__))
+        env = dict(os.environ, PYTHONPATH=here)
+        result = subprocess.run([sys.executable, "-c", code],
+                                cwd=tempfile.gettempdir(), env=env,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual("[]\n", result.stdout)
+
+    def test_concordance_1(self):
+        """
+        Test refreshing a concordance after appending to, replacing and saving
+        a file.
+        """
+        source = self.write_text("The cat do")
+        concordance = Concordance(chunk_size=4)
+        self.assertEqual(10, concordance.refresh([source]))
+        self.assertEqual(top_words(source, None), concordance.top_words(None))
+
+        # Only the appended bytes are read, and the word split by the append
+        # is counted once
+        with open(source, "ab") as f:
+            f.write("n't stop caf\u00e9 THE".encode("utf-8"))
+        self.assertEqual(18, concordance.refresh([source]))
+        self.assertEqual(0, concordance.refresh([source]))
+        self.assertEqual(top_words(source, None), concordance.top_words(None))
+        self.assertEqual([("the", 2)], concordance.top_words(1))
+
+        # A saved concordance continues where it left off
+        path = self.write_text("")
+        concordance.save(path)
+        concordance = Concordance.load(path)
+        with open(source, "ab") as f:
+            f.write(b"n end")
+        self.assertEqual(5, concordance.refresh([source]))
+        self.assertEqual(top_words(source, None), concordance.top_words(None))
+
+        # A rewritten file is recounted from the start
+        with open(source, "w", encoding="utf-8") as f:
+            f.write("New words")
+        self.assertEqual(9, concordance.refresh([source]))
+        self.assertEqual([("new", 1), ("words", 1)],
+                         concordance.top_words(None))
+
+    def test_concordance_2(self):
+        """
+        Test that an indexed concordance gives the same top words while words
+        split across refreshes are uncounted and counted again.
+        """
+        source = self.write_text("the cat sat on the ca")
+        concordance = Concordance(chunk_size=4, indexed=True)
+        concordance.refresh([source])
+        self.assertIsInstance(concordance.counts, IndexedHashMap)
+        self.assertEqual([("the", 2), ("ca", 1)], concordance.top_words(2))
+
+        with open(source, "ab") as f:
+            f.write(b"t and the cat")
+        concordance.refresh([source])
+        self.assertEqual(top_words(source, None), concordance.top_words(None))
+        self.assertEqual([("cat", 3), ("the", 3)], concordance.top_words(2))
+        self.assertEqual(top_words(source, 3),
+                         top_entries(concordance.counts, 3))
+
+        path = self.write_text("")
+        concordance.save(path)
+        self.assertEqual([("cat", 3)], Concordance.load(path).top_words(1))
+
+
+class TokenCacheTester(unittest.TestCase):
+    """
+    Contain unit tests for the TokenCache class.
+    """
+    def test_lookup_1(self):
+        """
+        Test that lookup() lowercases, interns and hashes tokens, and counts
+        hits and misses.
+        """
+        cache = TokenCache("crc32", maxsize=3)
+        key, hash_value = cache.lookup("Alice")
+        self.assertEqual("alice", key)
+        self.assertEqual(crc32_hash("alice"), hash_value)
+        self.assertIs(key, cache.lookup("ALICE")[0])
+        self.assertEqual((key, hash_value), cache.lookup("Alice"))
+        self.assertEqual((1, 2, 0), (cache.hits, cache.misses,
+                                     cache.evictions))
+        self.assertEqual(1 / 3, cache.hit_rate())
+
+        cache.clear()
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0.0, cache.hit_rate())
+
+        with self.assertRaises(ValueError):
+            TokenCache("crc32", maxsize=0)
+        with self.assertRaises(ValueError):
+            TokenCache("crc32", policy="random")
+
+    def test_eviction_1(self):
+        """
+        Test that the LRU policy evicts the token used least recently, and the
+        FIFO policy the token added first.
+        """
+        for policy, kept in [("lru", "a"), ("fifo", "b")]:
+            cache = TokenCache("crc32", maxsize=2, policy=policy)
+            cache.lookup("a")
+            cache.lookup("b")
+            cache.lookup("a")  # A hit, which only LRU counts as a use
+            cache.lookup("c")  # Evicts one of "a" and "b"
+            self.assertEqual(1, cache.evictions)
+            self.assertEqual(2, len(cache))
+
+            hits = cache.hits
+            cache.lookup(kept)
+            self.assertEqual(hits + 1, cache.hits)
+            self.assertEqual(policy, cache.stats()["policy"])
+
+
+
+class HeavyHittersTester(unittest.TestCase):
+    """
+    Contain unit tests for the approximate counters in heavy_hitters.py.
+    """
+    def zipf_stream(self, words):
+        """
+        Make a stream in which the i-th word appears about 1000 / i times.
+
+        :param words: the number of distinct words
+        :return: a tuple (stream, counts), where stream is a list of words and
+        counts maps each word to its number of appearances
+        """
+        counts = {"w" + str(i): 1000 // i for i in range(1, words + 1)}
+        stream = []
+        for i in range(1000):
+            stream.extend(word for word, count in counts.items()
+                          if count > i)
+        return stream, counts
+
+    def test_count_min_sketch_1(self):
+        """
+        Test that estimates are never too low and stay within the error bound.
+        """
+        stream, counts = self.zipf_stream(300)
+        sketch = CountMinSketch.from_error(0.01, 0.01)
+        self.assertEqual((272, 5), (sketch.width, sketch.depth))
+        for word in stream:
+            sketch.add(word)
+        self.assertEqual(len(stream), sketch.total)
+
+        bound = sketch.epsilon * sketch.total
+        for word, count in counts.items():
+            self.assertLessEqual(count, sketch.estimate(word))
+            self.assertLessEqual(sketch.estimate(word), count + bound)
+        self.assertEqual(1000, CountMinSketch(10000, 3).add("w1", 1000))
+
+        with self.assertRaises(ValueError):
+            CountMinSketch.from_error(0, 0.01)
+        with self.assertRaises(ValueError):
+            CountMinSketch(0, 3)
+
+    def test_space_saving_1(self):
+        """
+        Test that a full summary replaces the oldest word with the smallest
+        count and keeps track of the overestimate.
+        """
+        summary = SpaceSaving(2)
+        for word in ["a", "a", "b", "c", "a", "d"]:
+            summary.add(word)
+        self.assertEqual(2, len(summary))
+        self.assertEqual((3, 0), summary.get("a"))
+        self.assertIsNone(summary.get("b"))
+        self.assertIsNone(summary.get("c"))  # Replaced by "d"
+        self.assertEqual((3, 2), summary.get("d"))
+        self.assertEqual(3, summary.min_count())
+
+        summary.add("a", 5)
+        self.assertEqual([("a", 8, 0), ("d", 3, 2)],
+                         sorted(summary.items()))
+        self.assertEqual(3, summary.min_count())
+
+    def test_heavy_hitters_1(self):
+        """
+        Test that the most common words of a long-tailed stream are found, with
+        counts that are never too low and within the reported bound.
+        """
+        stream, counts = self.zipf_stream(2000)
+        exact = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        hitters = HeavyHitters(capacity=100, epsilon=0.001)
+        for word in stream:
+            hitters.add(word)
+
+        report = hitters.report()
+        self.assertEqual(len(stream), report["words"])
+        self.assertGreater(report["error_bound"], 0)
+        top = hitters.top(10)
+        self.assertEqual([word for word, count in exact[:10]],
+                         [word for word, count in top])
+        for word, count in hitters.top(None):
+            self.assertLessEqual(counts[word], count)
+            self.assertLessEqual(count, counts[word] + report["error_bound"])
+            self.assertEqual(count, hitters.estimate(word))
+
+class AsyncCountTester(unittest.TestCase):
+    """
+    Contain unit tests for counting words from asyncio streams.
+    """
+    @staticmethod
+    def feed(pieces):
+        """
+        Create a stream that returns the given pieces of bytes and then ends.
+        Must be called while an event loop is running.
+
+        :param pieces: a list of bytes objects
+        :return: an asyncio.StreamReader
+        """
+        reader = asyncio.StreamReader()
+        for piece in pieces:
+            reader.feed_data(piece)
+        reader.feed_eof()
+        return reader
+
+    def test_count_streams_1(self):
+        """
+        Test that words and characters split between reads are counted once.
+        """
+        text = "The caf\u00e9 and the hat. The END, the end! Don't stop; don't."
+        data = text.encode("utf-8")
+
+        async def count(chunk_size):
+            # Split the stream in the middle of "caf\u00e9" and its "\u00e9"
+            cut = data.index("\u00e9".encode("utf-8")) + 1
+            reader = self.feed([data[:cut - 3], data[cut - 3:cut],
+                                data[cut:]])
+            return await top_words_async([reader], None,
+                                         chunk_size=chunk_size)
+
+        expected = sorted(rgx.findall(text.lower()))
+        for chunk_size in [1, 3, 1 << 16]:
+            result = asyncio.run(count(chunk_size))
+            self.assertEqual(len(set(expected)), len(result))
+            self.assertEqual(len(expected), sum(c for w, c in result))
+            self.assertIn(("caf\u00e9", 1), result)
+            self.assertEqual(("the", 4), result[0])
+
+    def test_count_streams_2(self):
+        """
+        Test counting many streams into one table through a queue of one batch.
+        """
+        texts = ["one two three two\n", "three three\n", "", "four\n" * 50]
+
+        async def count():
+            readers = [self.feed([text.encode("utf-8")]) for text in texts]
+            return await count_streams(readers, engine="open", chunk_size=4,
+                                       queue_size=1)
+
+        table = asyncio.run(count())
+        self.assertEqual(4, table.size)
+        self.assertEqual(50, table.get("four"))
+        self.assertEqual(3, table.get("three"))
+        self.assertEqual(2, table.get("two"))
+
+    def test_open_pipe_1(self):
+        """
+        Test counting words written to a pipe, as top_words() counts a file.
+        """
+        text = "Don't stop; don't. The cat and the hat.\n" * 1000
+        path = os.path.join(self.tmp.name, "pipe.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+        async def count():
+            read_fd, write_fd = os.pipe()
+            with open(read_fd, "rb", buffering=0) as pipe:
+                reader = await open_pipe(pipe)
+
+                # Write from a thread, since the pipe holds less than the text
+                loop = asyncio.get_running_loop()
+                writing = loop.run_in_executor(None, self.write_pipe, write_fd,
+                                               text.encode("utf-8"))
+                result = await top_words_async([reader], 3)
+                await writing
+                return result
+
+        self.assertEqual(top_words(path, 3), asyncio.run(count()))
+
+    @staticmethod
+    def write_pipe(fd, data):
+        """
+        Write data to the write end of a pipe and close it.
+
+        :param fd: the file descriptor of the write end
+        :param data: the bytes to write
+        """
+        with open(fd, "wb") as f:
+            f.write(data)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+class BenchSuiteTester(unittest.TestCase):
+    """
+    Contain unit tests for the helpers of the benchmark suite.
+    """
+    def test_write_corpus_1(self):
+        """
+        Test that a perturbed corpus depends only on its size and seed.
+        """
+        contents = []
+        for seed in [1, 1, 2, None]:
+            path = write_corpus(1, seed=seed)
+            self.addCleanup(os.remove, path)
+            with open(path, "rb") as f:
+                contents.append(f.read())
+
+        self.assertEqual(contents[0], contents[1])
+        self.assertNotEqual(contents[0], contents[2])
+        self.assertNotEqual(contents[0], contents[3])
+        self.assertEqual(len(contents[3].split()), len(contents[0].split()))
+
+    def test_run_micro_1(self):
+        """
+        Test that every operation is timed.
+        """
+        for engine in ["chained", "open"]:
+            times = run_micro(engine, 200, repeat=2)
+            self.assertEqual(["contains_key", "get", "miss", "put", "remove",
+                              "resize_table"], sorted(times))
+            for ns in times.values():
+                self.assertGreater(ns, 0)
+
+    def test_compare_results_1(self):
+        """
+        Test that results are flagged by whether lower or higher is better.
+        """
+        def results(put_ns, speed, memory):
+            return {"results": {
+                "micro/chained/put/1000": {"value": put_ns, "unit": "ns/op",
+                                           "better": "lower"},
+                "top_words/speed": {"value": speed, "unit": "MB/s",
+                                    "better": "higher"},
+                "top_words/memory": {"value": memory, "unit": "MB",
+                                     "better": "lower"},
+            }}
+
+        rows = compare_results(results(100, 10, 50), results(120, 12, 52))
+        flags = {row[0]: row[4] for row in rows}
+        self.assertEqual({"micro/chained/put/1000": "regression",
+                          "top_words/speed": "improvement",
+                          "top_words/memory": ""}, flags)
+        self.assertAlmostEqual(0.2, rows[0][3])
+
+        # Results missing from the baseline are not compared
+        baseline = results(100, 10, 50)
+        del baseline["results"]["top_words/speed"]
+        self.assertEqual(2, len(compare_results(baseline,
+                                                results(100, 5, 50))))
+
+
+if __name__ == "__main__":
+    unittest.main()